@@ -0,0 +1,56 @@
+""" Compares memory use and speed of VariantComponents and FrozenVariantComponents.
+
+Usage:
+
+    python benchmarks/bench_components.py [N]
+"""
+
+import sys
+import time
+import tracemalloc
+
+from metavariant import Variant
+from metavariant.components import VariantComponents, FrozenVariantComponents
+
+SEQVARS = [Variant(hgvs_text) for hgvs_text in ('NM_014874.3:c.891C>T',
+                                                'NM_007294.3:c.4964_4982delCTGGCCTGACCCCAGAAGA',
+                                                'NM_213599.2:c.191dup',
+                                                'NP_932173.1:p.Phe1596Ile',
+                                               )]
+
+
+def build(cls, n):
+    return [cls(SEQVARS[idx % len(SEQVARS)]) for idx in range(n)]
+
+
+def measure_memory(cls, n):
+    tracemalloc.start()
+    objs = build(cls, n)
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current / float(n), objs
+
+
+def measure_slang(objs, repeat=5):
+    started = time.time()
+    for _ in range(repeat):
+        for comp in objs:
+            comp.posedit
+            comp.posedit_slang
+    return (time.time() - started) / (repeat * len(objs)) * 1e6
+
+
+def main(n=100000):
+    print('%-26s %14s %14s %18s' % ('class', 'bytes/object', 'build us/obj', 'slang us/access'))
+    for cls in (VariantComponents, FrozenVariantComponents):
+        started = time.time()
+        build(cls, n)
+        build_us = (time.time() - started) / n * 1e6
+
+        bytes_per_obj, objs = measure_memory(cls, n)
+        slang_us = measure_slang(objs)
+        print('%-26s %14.1f %14.2f %18.2f' % (cls.__name__, bytes_per_obj, build_us, slang_us))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
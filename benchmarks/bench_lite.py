@@ -0,0 +1,53 @@
+""" Compares memory use of VariantLVG and LiteLVG results.
+
+LVGs are built with deadline=0 (no UTA mapping), with enrichment variants standing in for mapped ones.
+LiteLVGs are loaded from the LVGs' JSON, so that they don't share strings with the LVGs.
+
+Usage:
+
+    python benchmarks/bench_lite.py [N]
+"""
+
+import gc
+import sys
+import tracemalloc
+
+from metavariant import VariantLVG
+from metavariant.lite import LiteLVG
+
+TRANSCRIPTS = ['NM_000155.3', 'NM_000155.4', 'NM_001258332.1', 'NR_027641.1']
+
+
+def build_lvg(idx):
+    pos = 100 + idx
+    return VariantLVG('NM_000155.3:c.%iC>T' % pos,
+                      hgvs_c=['NM_000155.4:c.%iC>T' % pos, 'NM_001258332.1:c.%iC>T' % (pos - 60)],
+                      hgvs_g=['NC_000009.12:g.%iC>T' % (34646000 + pos), 'NC_000009.11:g.%iC>T' % (34646000 + pos)],
+                      hgvs_n=['NM_000155.3:n.%iC>T' % (pos + 40), 'NR_027641.1:n.%iC>T' % (pos + 10)],
+                      hgvs_p=['NP_000146.2:p.(Arg%iCys)' % (pos // 3)],
+                      transcripts=TRANSCRIPTS, gene_name='GALT', deadline=0)
+
+
+def measure(build, n):
+    tracemalloc.start()
+    objs = [build(idx) for idx in range(n)]
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return current / float(n), objs
+
+
+def main(n=1000):
+    lvg_bytes, lvgs = measure(build_lvg, n)
+    json_strs = [lex.to_json() for lex in lvgs]
+    lite_bytes, lites = measure(lambda idx: LiteLVG.from_json(json_strs[idx]), n)
+    assert lites[0].hgvs_c == lvgs[0].hgvs_c
+
+    print('%-12s %14s' % ('class', 'bytes/result'))
+    print('%-12s %14.1f' % ('VariantLVG', lvg_bytes))
+    print('%-12s %14.1f' % ('LiteLVG', lite_bytes))
+    print('ratio: %.1fx' % (lvg_bytes / lite_bytes))
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,62 @@
+""" Compares pickled size and round-trip time of VariantLVG and VariantComponents, before and after
+compact pickling.
+
+"before" pickles what default pickling would: the instance __dict__, including every SequenceVariant.
+"after" pickles the objects themselves (see VariantLVG.__reduce__ and VariantComponents.__reduce__);
+"after + parse" also touches the seqvars, as a consumer needing them would.
+
+LVGs are built with deadline=0 (no UTA mapping), with enrichment variants standing in for mapped ones.
+
+Usage:
+
+    python benchmarks/bench_pickle.py [N]
+"""
+
+import pickle
+import sys
+import time
+
+from metavariant import VariantComponents
+
+from bench_lite import build_lvg
+
+PROTOCOL = pickle.HIGHEST_PROTOCOL
+
+
+def default_state(obj):
+    state = dict(vars(obj))
+    state.pop('_pool', None)
+    return state
+
+
+def measure(objs, dump, touch=None):
+    start = time.time()
+    data = [pickle.dumps(dump(obj), protocol=PROTOCOL) for obj in objs]
+    loaded = [pickle.loads(item) for item in data]
+    if touch:
+        for obj in loaded:
+            touch(obj)
+    elapsed = time.time() - start
+    return sum(len(item) for item in data) / float(len(objs)), elapsed * 1e6 / len(objs)
+
+
+def report(name, objs, touch):
+    rows = [('before', measure(objs, default_state)),
+            ('after', measure(objs, lambda obj: obj)),
+            ('after + parse', measure(objs, lambda obj: obj, touch)),
+           ]
+    for label, (size, usec) in rows:
+        print('%-18s %-14s %14.1f %14.1f' % (name, label, size, usec))
+
+
+def main(n=200):
+    lvgs = [build_lvg(idx) for idx in range(n)]
+    components = [VariantComponents(seqvar) for lex in lvgs for seqvar in lex.seqvars]
+
+    print('%-18s %-14s %14s %14s' % ('class', 'pickling', 'bytes/object', 'usec/object'))
+    report('VariantLVG', lvgs, lambda lex: lex.seqvars)
+    report('VariantComponents', components, lambda comp: comp.seqvar)
+
+
+if __name__ == '__main__':
+    main(*[int(arg) for arg in sys.argv[1:]])
@@ -0,0 +1,149 @@
+""" Provides AlignmentCache, a bounded cache of transcript alignment mappers shared by all AssemblyMappers. """
+
+import logging
+import threading
+from collections import OrderedDict
+
+import hgvs.alignmentmapper
+from bioutils.assemblies import make_ac_name_map
+from hgvs.exceptions import HGVSDataNotAvailableError
+
+from .config import ALIGNMENT_CACHE_SIZE, PKGNAME
+
+log = logging.getLogger(PKGNAME)
+
+
+class _PrefetchedTxInfo(object):
+    """ Wraps a data provider so get_tx_info answers from rows already fetched (by get_tx_for_gene). """
+
+    def __init__(self, hdp, tx_info):
+        self._hdp = hdp
+        self._tx_info = tx_info
+
+    def get_tx_info(self, tx_ac, alt_ac, alt_aln_method):
+        return self._tx_info
+
+    def __getattr__(self, name):
+        return getattr(self._hdp, name)
+
+
+class AlignmentCache(object):
+    """
+    AlignmentCache
+
+    Holds up to `maxsize` hgvs AlignmentMappers keyed by (tx_ac, alt_ac, alt_aln_method), least recently
+    used first out. Building an AlignmentMapper costs UTA queries for the transcript's info and exons;
+    with the cache installed, every AssemblyMapper (in every thread) shares the ones already built, so
+    variants on the same transcript only fetch its alignment once.
+
+    AssemblyMappers created through a MapperRegistry use the module-level `alignment_cache`.
+
+    Usage:
+
+        alignment_cache.install(mapper)
+        alignment_cache.prefetch_genes(hdp, ['BRCA1', 'BRCA2'])
+        alignment_cache.stats()
+    """
+
+    def __init__(self, maxsize=ALIGNMENT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._mappers = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._mappers)
+
+    def __contains__(self, key):
+        return key in self._mappers
+
+    def get(self, hdp, tx_ac, alt_ac, alt_aln_method):
+        """ Returns the AlignmentMapper for (tx_ac, alt_ac, alt_aln_method), building it with hdp if needed.
+
+        :raises: HGVSDataNotAvailableError (from hgvs) if UTA has no such alignment
+        """
+        key = (tx_ac, alt_ac, alt_aln_method)
+        with self._lock:
+            mapper = self._mappers.get(key)
+            if mapper is not None:
+                self._mappers.move_to_end(key)
+                self.hits += 1
+                return mapper
+            self.misses += 1
+
+        # built outside the lock; two threads may race to build the same one, which is harmless.
+        mapper = hgvs.alignmentmapper.AlignmentMapper(hdp, tx_ac=tx_ac, alt_ac=alt_ac, alt_aln_method=alt_aln_method)
+        self.put(mapper)
+        return mapper
+
+    def put(self, mapper):
+        """ Adds an AlignmentMapper to the cache, evicting the least recently used if full. """
+        with self._lock:
+            self._mappers[(mapper.tx_ac, mapper.alt_ac, mapper.alt_aln_method)] = mapper
+            while len(self._mappers) > self.maxsize:
+                self._mappers.popitem(last=False)
+
+    def install(self, mapper):
+        """ Makes an hgvs VariantMapper (or AssemblyMapper) take its AlignmentMappers from this cache
+        instead of its own small per-instance cache.
+
+        :param mapper: hgvs.variantmapper.VariantMapper
+        :return: mapper
+        """
+        hdp = mapper.hdp
+
+        def _fetch_AlignmentMapper(tx_ac, alt_ac, alt_aln_method):
+            return self.get(hdp, tx_ac, alt_ac, alt_aln_method)
+
+        mapper._fetch_AlignmentMapper = _fetch_AlignmentMapper
+        return mapper
+
+    def prefetch_genes(self, hdp, gene_names, assembly_name='GRCh38', alt_aln_method='splign'):
+        """ Loads the alignments of every transcript of each gene onto assembly_name, plus each transcript's
+        identity alignment (used for c <-> n and c -> p), so later mapping in those genes needs no UTA
+        queries for alignments.
+
+        Transcript info for all of a gene's transcripts comes from a single query per gene.
+
+        :param hdp: hgvs data provider
+        :param gene_names: iterable of HGNC gene symbols
+        :param assembly_name: (str) [default: 'GRCh38']
+        :param alt_aln_method: (str) [default: 'splign']
+        :return: (int) number of alignments loaded
+        """
+        gene_names = list(gene_names)
+        assembly_acs = make_ac_name_map(assembly_name)
+        loaded = 0
+        for gene_name in gene_names:
+            for tx_info in hdp.get_tx_for_gene(gene_name) or []:
+                if tx_info['alt_ac'] not in assembly_acs or tx_info['alt_aln_method'] != alt_aln_method:
+                    continue
+                for key in ((tx_info['tx_ac'], tx_info['alt_ac'], alt_aln_method),
+                            (tx_info['tx_ac'], tx_info['tx_ac'], 'transcript')):
+                    if key in self._mappers:
+                        continue
+                    try:
+                        self.put(hgvs.alignmentmapper.AlignmentMapper(_PrefetchedTxInfo(hdp, tx_info), *key))
+                        loaded += 1
+                    except HGVSDataNotAvailableError as error:
+                        log.debug('Cannot prefetch alignment %s: %r', key, error)
+        log.info('Prefetched %i transcript alignments for %i genes', loaded, len(gene_names))
+        return loaded
+
+    def clear(self):
+        with self._lock:
+            self._mappers.clear()
+            self.hits = 0
+            self.misses = 0
+
+    def stats(self):
+        return {'size': len(self._mappers),
+                'maxsize': self.maxsize,
+                'hits': self.hits,
+                'misses': self.misses,
+               }
+
+
+# shared by all mappers created by metavariant.
+alignment_cache = AlignmentCache()
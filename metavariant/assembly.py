@@ -0,0 +1,118 @@
+""" Provides MapperRegistry, which keeps one long-lived AssemblyMapper per genome assembly. """
+
+import logging
+import threading
+
+import hgvs.assemblymapper
+from bioutils.assemblies import make_ac_name_map
+
+from .alignments import alignment_cache
+from .config import PKGNAME
+
+log = logging.getLogger(PKGNAME)
+
+DEFAULT_ASSEMBLY = 'GRCh38'
+
+# assemblies that accessions are matched against, in order of preference.
+ASSEMBLIES = ('GRCh38', 'GRCh37')
+
+_ac_assemblies = None
+
+
+def _load_ac_assemblies():
+    """ Builds {accession: assembly_name} for ASSEMBLIES from the bioutils assembly tables.
+    Accessions shared between assemblies (e.g. unchanged contigs) go to the earliest in ASSEMBLIES.
+    """
+    ac_assemblies = {}
+    for assembly_name in ASSEMBLIES:
+        for ac in make_ac_name_map(assembly_name):
+            ac_assemblies.setdefault(ac, assembly_name)
+    return ac_assemblies
+
+
+def assembly_for_accession(ac, default=None):
+    """ Returns the name of the genome assembly that reference sequence accession `ac` belongs to,
+    e.g. 'GRCh37' for NC_000019.9 and 'GRCh38' for NC_000019.10. (No UTA lookup is needed.)
+
+    :param ac: (str) reference sequence accession
+    :param default: value to return if ac is not part of any known assembly
+    :return: (str) assembly name or default
+    """
+    global _ac_assemblies
+    if _ac_assemblies is None:
+        _ac_assemblies = _load_ac_assemblies()
+    return _ac_assemblies.get(ac, default)
+
+
+class MapperRegistry(object):
+    """
+    MapperRegistry
+
+    Creates AssemblyMappers on first use and keeps them, one per assembly, over a single data provider.
+    A registry is as thread-safe as its mappers (i.e. use one per thread; see HgvsPool).
+
+    All of its mappers share transcript alignments through `alignment_cache` (see metavariant.alignments).
+
+    Usage:
+
+        mappers = MapperRegistry(hdp)
+        mappers.get('GRCh37').g_to_c(var_g, 'NM_000151.3')
+
+        # pick the mapper matching a genomic variant's accession (default assembly for anything else):
+        mappers.for_variant(Variant('NC_000019.9:g.1399792C>T'))
+
+    Keywords:
+        default_assembly (str): assembly used when none is given or detected [default: GRCh38]
+        mappers (list): existing AssemblyMappers to register (keyed by their assembly_name)
+        alignment_cache (AlignmentCache): cache to install in mappers [default: shared alignment_cache]
+    """
+
+    def __init__(self, hdp, default_assembly=DEFAULT_ASSEMBLY, mappers=None, alignment_cache=alignment_cache):
+        self.hdp = hdp
+        self.default_assembly = default_assembly
+        self.alignment_cache = alignment_cache
+        self._mappers = {}
+        self._lock = threading.Lock()
+        for mapper in mappers or []:
+            self._mappers[mapper.assembly_name] = self._install(mapper)
+
+    def _install(self, mapper):
+        if self.alignment_cache is not None:
+            self.alignment_cache.install(mapper)
+        return mapper
+
+    def __contains__(self, assembly_name):
+        return assembly_name in self._mappers
+
+    @property
+    def assemblies(self):
+        return list(self._mappers.keys())
+
+    def get(self, assembly_name=None):
+        """ Returns the AssemblyMapper for assembly_name, creating it if needed.
+
+        :param assembly_name: (str) e.g. 'GRCh37' [default: default_assembly]
+        :return: hgvs.assemblymapper.AssemblyMapper
+        """
+        assembly_name = assembly_name or self.default_assembly
+        mapper = self._mappers.get(assembly_name)
+        if mapper is None:
+            with self._lock:
+                mapper = self._mappers.get(assembly_name)
+                if mapper is None:
+                    log.debug('Creating AssemblyMapper for %s', assembly_name)
+                    mapper = hgvs.assemblymapper.AssemblyMapper(self.hdp, assembly_name=assembly_name)
+                    self._mappers[assembly_name] = self._install(mapper)
+        return mapper
+
+    def for_variant(self, seqvar, assembly_name=None):
+        """ Returns the AssemblyMapper to use for seqvar: that of assembly_name if supplied,
+        otherwise the assembly of seqvar's accession (for genomic variants), otherwise the default.
+
+        :param seqvar: hgvs.SequenceVariant
+        :param assembly_name: (str) explicit assembly [default: None, i.e. auto-detect]
+        :return: hgvs.assemblymapper.AssemblyMapper
+        """
+        if assembly_name is None and seqvar.type == 'g':
+            assembly_name = assembly_for_accession(seqvar.ac)
+        return self.get(assembly_name)
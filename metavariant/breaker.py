@@ -0,0 +1,154 @@
+""" Provides CircuitBreaker, and one breaker per remote backend (uta_breaker, ncbi_breaker, lovd_breaker).
+
+After `failure_threshold` consecutive backend failures a breaker opens: calls through it raise
+CircuitOpenError at once instead of waiting for another timeout. After `reset_timeout` seconds it is
+half-open and lets one trial call through; success closes it again, failure re-opens it.
+
+Thresholds come from the metavariant_BREAKER_FAILURES and metavariant_BREAKER_RESET_TIMEOUT
+environment variables (defaults: 5 failures, 30 seconds).
+"""
+
+import logging
+import threading
+import time
+
+from .config import BREAKER_FAILURE_THRESHOLD, BREAKER_RESET_TIMEOUT, PKGNAME
+from .exceptions import CircuitOpenError
+
+log = logging.getLogger(PKGNAME)
+
+try:
+    import psycopg2
+    # lost or refused database connections; other database errors are not outages.
+    UTA_FAILURES = (OSError, psycopg2.OperationalError, psycopg2.InterfaceError)
+except ImportError:
+    UTA_FAILURES = (OSError,)
+
+CLOSED = 'closed'
+OPEN = 'open'
+HALF_OPEN = 'half_open'
+
+
+class CircuitBreaker(object):
+    """
+    CircuitBreaker
+
+    Guards calls to one backend (see module docstring). Only exceptions of `failure_types` count as
+    backend failures; any other outcome, including other exceptions, counts as the backend answering.
+
+    Usage:
+
+        breaker = CircuitBreaker('ncbi', failure_threshold=3, reset_timeout=60)
+        try:
+            response = breaker.call(requests.get, url, timeout=10)
+        except CircuitOpenError:
+            ...     # backend down; try again later
+
+    Keywords:
+        failure_threshold (int): consecutive failures that open the breaker [default: BREAKER_FAILURE_THRESHOLD]
+        reset_timeout (float): seconds to stay open before a trial call [default: BREAKER_RESET_TIMEOUT]
+        failure_types (tuple): exception types counting as backend failures [default: (Exception,)]
+    """
+
+    def __init__(self, name, failure_threshold=BREAKER_FAILURE_THRESHOLD, reset_timeout=BREAKER_RESET_TIMEOUT,
+                 failure_types=(Exception,)):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failure_types = failure_types
+
+        self.failures = 0
+        self.opened_at = None
+        self.counters = {'calls': 0, 'failures': 0, 'rejected': 0, 'opened': 0}
+        self._trial_running = False
+        self._lock = threading.Lock()
+
+    def _state(self):
+        if self.opened_at is None:
+            return CLOSED
+        if time.time() - self.opened_at >= self.reset_timeout:
+            return HALF_OPEN
+        return OPEN
+
+    @property
+    def state(self):
+        with self._lock:
+            return self._state()
+
+    @property
+    def is_open(self):
+        """ True while calls are being rejected (open, or half-open with a trial call in progress). """
+        with self._lock:
+            state = self._state()
+            return state == OPEN or (state == HALF_OPEN and self._trial_running)
+
+    def is_failure(self, error):
+        return isinstance(error, self.failure_types)
+
+    def _before_call(self):
+        with self._lock:
+            state = self._state()
+            if state == OPEN or (state == HALF_OPEN and self._trial_running):
+                self.counters['rejected'] += 1
+                raise CircuitOpenError(self.name)
+            if state == HALF_OPEN:
+                self._trial_running = True
+            self.counters['calls'] += 1
+
+    def record_success(self):
+        with self._lock:
+            if self.opened_at is not None:
+                log.info('Circuit breaker %s closed (backend answering again)', self.name)
+            self.failures = 0
+            self.opened_at = None
+            self._trial_running = False
+
+    def record_failure(self, error=None):
+        with self._lock:
+            self.failures += 1
+            self.counters['failures'] += 1
+            # a failed trial call re-opens the breaker; late failures of calls started before it opened don't count.
+            if self._trial_running or (self.opened_at is None and self.failures >= self.failure_threshold):
+                log.warning('Circuit breaker %s opened after %i failure(s): %r', self.name, self.failures, error)
+                self.opened_at = time.time()
+                self.counters['opened'] += 1
+            self._trial_running = False
+
+    def call(self, func, *args, **kwargs):
+        """ Calls func(*args, **kwargs) unless the breaker is open.
+
+        :raises: CircuitOpenError if open, otherwise whatever func raises
+        """
+        self._before_call()
+        try:
+            result = func(*args, **kwargs)
+        except Exception as error:
+            if self.is_failure(error):
+                self.record_failure(error)
+            else:
+                self.record_success()
+            raise
+        self.record_success()
+        return result
+
+    def reset(self):
+        """ Closes the breaker (e.g. after fixing the backend by hand). """
+        self.record_success()
+
+    def stats(self):
+        with self._lock:
+            out = dict(self.counters)
+            out.update(name=self.name, state=self._state(), consecutive_failures=self.failures)
+        return out
+
+
+uta_breaker = CircuitBreaker('uta', failure_types=UTA_FAILURES)
+ncbi_breaker = CircuitBreaker('ncbi')
+lovd_breaker = CircuitBreaker('lovd')
+
+breakers = {'uta': uta_breaker, 'ncbi': ncbi_breaker, 'lovd': lovd_breaker}
+
+
+def is_backend_unavailable(error, breaker=uta_breaker):
+    """ True if error means the backend could not be reached (as opposed to it having no answer). """
+    return isinstance(error, CircuitOpenError) or breaker.is_failure(error)
@@ -3,7 +3,7 @@
 import logging
 import re
 
-from .config import PKGNAME
+from .config import PKGNAME, SLANG_CACHE_SIZE
 from .exceptions import RejectedSeqVar
 
 log = logging.getLogger(PKGNAME)
@@ -57,53 +57,205 @@ amino_acid_map_reverse = { 'A': 'Ala',
 dna_nucleotides = ['A','C','T','G']
 #rna_nucleotides = ['A','C','U','G']
 
+# single-letter amino acid codes, for fast membership tests.
+amino_acid_letters = frozenset(amino_acid_map.values())
+
 official_to_slang_map = {'>': ['->', '-->', '/'],
                          'Ter': ['*', 'X'],
                         }
 
-# Match literal backslashes here.
-re_aminochange_long = re.compile('(?P<aminochange>\(?[A-Za-z]{3}[0-9]+[A-Za-z]{3}\)?)')
-re_aminochange_short = re.compile('(?P<aminochange>[{short_as}][0-9]+[{short_as}]?)'.format(short_as=''.join(amino_acid_map.values())))
-
-re_aminochange_comp_long = re.compile('\(?(?P<ref>[A-Za-z]{3})(?P<pos>[0-9]+)(?P<alt>[A-Za-z]{3})\)?')
-re_aminochange_comp_short = re.compile('(?P<ref>[{short_as}])(?P<pos>[0-9]+)(?P<alt>[{short_as}])'.format(short_as=''.join(amino_acid_map.values())))
+# HGVS posedit construction from components, by edittype (used when there is no SequenceVariant).
+posedit_templates = {'SUB': '{pos}{ref}>{alt}',
+                     'DEL': '{pos}del{ref}',
+                     'DUP': '{pos}dup{ref}',
+                     'INS': '{pos}ins{alt}',
+                     'INDEL': '{pos}del{ref}ins{alt}',
+                    }
+
+# HGVS protein posedit construction (long-form names) from aminochange components, by edittype.
+protein_posedit_templates = {'SUB': '{ref}{pos}{alt}',
+                             'FS': '{ref}{pos}{alt}fs',
+                             'DEL': '{ref}{pos}del',
+                             'DUP': '{ref}{pos}dup',
+                             'INDEL': '{ref}{pos}delins{alt}',
+                             'IDENTITY': '{ref}{pos}=',
+                            }
+
+# edits kept in the short (single-letter) protein slang of edittypes other than SUB, e.g. "K23del".
+protein_short_edits = {'DEL': 'del', 'DUP': 'dup', 'INDEL': 'delins'}
+
+# single-letter amino acid code -> long name, including the stop codon ('X', as normalized by VariantComponents.parse).
+protein_long_names = dict(amino_acid_map_reverse, X='Ter')
+
+# long names (and stop codon symbols) -> single-letter amino acid code
+protein_short_names = dict(amino_acid_map, Ter='X')
+protein_short_names.update(dict((short, short) for short in amino_acid_letters))
+protein_short_names.update({'*': 'X', 'X': 'X'})
+
+# Protein change shorthand grammar. Accepts long (Leu653Arg) and short (L653R) forms, stop codons
+# (Ter, *, X), frameshifts (Arg97ProfsTer23, R97fs), deletions and duplications (optionally of
+# ranges: Glu1000_Glu1001del), insertions, delins, extensions (Met1ext-5, Ter110GlnextTer17),
+# synonymous changes (Leu653=), an optional "p." prefix and "predicted" parentheses.
+_re_amino = r'(?:{long}|Ter|[{short}]|\*|X)'.format(long='|'.join(amino_acid_map), short=''.join(amino_acid_map.values()))
+_re_stop = r'(?:Ter|\*|X)'
+
+_aminochange_grammar = r"""
+    (?:p\.)?
+    (?P<predicted>\()?
+    (?P<ref>{aa})(?P<pos>[0-9]+)
+    (?:_(?P<end_ref>{aa})(?P<end_pos>[0-9]+))?
+    (?:
+        delins(?P<delins_alt>{aa}+)
+      | ins(?P<ins_alt>{aa}+)
+      | (?P<del>del)
+      | (?P<dup>dup)
+      | (?P<fs_alt>{aa})?(?P<fs>fs)(?:{stop}(?P<fs_pos>[0-9]+|\?)?)?
+      | (?P<ext_alt>{aa})?(?P<ext>ext)(?P<ext_pos>-[0-9]+|{stop}(?:[0-9]+|\?))?
+      | (?P<alt>{aa})
+      | (?P<identity>=)
+    )
+    (?(predicted)\))
+""".format(aa=_re_amino, stop=_re_stop)
+
+# a whole line holding one aminochange, optionally padded with blanks (not newlines, so that the
+# MULTILINE version used by parse_components_from_aminochanges cannot match across lines).
+_aminochange_line = r'^[^\S\n]*' + _aminochange_grammar + r'[^\S\n]*$'
+re_aminochange_grammar = re.compile(_aminochange_line, re.VERBOSE)
+re_aminochange_grammar_multiline = re.compile(_aminochange_line, re.VERBOSE | re.MULTILINE)
+
+# an aminochange anywhere in text, but not inside a longer word (e.g. "R97" in "R97Px" or "AR97P").
+re_aminochange_in_text = re.compile(r'(?<![A-Za-z0-9])' + _aminochange_grammar + r'(?![A-Za-z0-9])', re.VERBOSE)
+re_amino_token = re.compile(_re_amino)
+
+
+def _short_amino_seq(seq):
+    return ''.join(protein_short_names[token] for token in re_amino_token.findall(seq))
+
+
+def _aminochange_match_to_components(match):
+    """ Turns a re_aminochange_grammar match into a components dictionary (see parse_components_from_aminochange). """
+    parts = match.groupdict()
+    comp = {'ref': protein_short_names[parts['ref']],
+            'pos': parts['pos'],
+            'alt': '',
+            'edittype': 'SUB',
+            'end_ref': protein_short_names[parts['end_ref']] if parts['end_ref'] else '',
+            'end_pos': parts['end_pos'] or '',
+            'fs_pos': '',
+            'ext_pos': '',
+            'predicted': bool(parts['predicted']),
+           }
+
+    if parts['delins_alt']:
+        comp['edittype'] = 'INDEL'
+        comp['alt'] = _short_amino_seq(parts['delins_alt'])
+    elif parts['ins_alt']:
+        comp['edittype'] = 'INS'
+        comp['alt'] = _short_amino_seq(parts['ins_alt'])
+    elif parts['del']:
+        comp['edittype'] = 'DEL'
+    elif parts['dup']:
+        comp['edittype'] = 'DUP'
+    elif parts['fs']:
+        comp['edittype'] = 'FS'
+        comp['alt'] = protein_short_names[parts['fs_alt']] if parts['fs_alt'] else ''
+        comp['fs_pos'] = parts['fs_pos'] or ''
+    elif parts['ext']:
+        comp['edittype'] = 'EXT'
+        comp['alt'] = protein_short_names[parts['ext_alt']] if parts['ext_alt'] else ''
+        comp['ext_pos'] = re.sub(_re_stop, '*', parts['ext_pos'] or '')
+    elif parts['identity']:
+        comp['edittype'] = 'IDENTITY'
+        comp['alt'] = comp['ref']
+    else:
+        comp['alt'] = protein_short_names[parts['alt']]
+    return comp
 
 
 def findall_aminochanges_in_text(text):
-    """ Returns a LIST of all strings that appear to be amino acid change descriptions,
-    e.g.: ['(Cys344Tyr)', 'C344Y', 'Cys344Tyr']
+    """ Returns a LIST of all strings that appear to be amino acid change descriptions, in the order
+    they appear, e.g.: ['(Cys344Tyr)', 'C344Y', 'Arg97ProfsTer23', 'R97*']
 
-    If amino change is in parenthesis, this function returns a string with parenthesis removed.
+    Uses the same grammar as parse_components_from_aminochange, so whole frameshift, stop, del, ins
+    and ext changes are found (not just their leading substitution). Predicted changes keep their
+    parentheses.
 
     :param text: (str)
     :return: (list)
     """
-    longs = re_aminochange_long.findall(text)
-    shorts = re_aminochange_short.findall(text)
-    return longs + shorts
+    return [match.group(0) for match in re_aminochange_in_text.finditer(text)]
+
+def findall_aminochanges_with_offsets(text):
+    """ Returns a LIST of (aminochange, start, end) tuples for all strings in text that appear
+    to be amino acid change descriptions, where start and end are character offsets into text.
+
+    Matches the same strings as findall_aminochanges_in_text.
+
+    :param text: (str)
+    :return: (list) of (str, int, int)
+    """
+    return [(match.group(0), match.start(), match.end()) for match in re_aminochange_in_text.finditer(text)]
 
 def parse_components_from_aminochange(aminochange):
-    """ Returns a dictionary containing (if possible) 'ref', 'pos', and 'alt'
-    characteristics of the supplied aminochange string.
+    """ Returns a dictionary containing the components of the supplied aminochange string
+    (protein change shorthand such as 'Leu653Arg', 'L653R', 'p.(Arg97ProfsTer23)', 'Glu1000_Glu1001del').
+
+    Keys:
+        ref, alt: single-letter amino acid codes ('X' for stop codons); alt holds the inserted
+                  sequence for INS and INDEL, and is '' where not applicable.
+        pos: position of the (first) changed residue
+        edittype: one of 'SUB', 'FS', 'DEL', 'DUP', 'INS', 'INDEL', 'EXT', 'IDENTITY'
+        end_ref, end_pos: last residue of a range ('' if not a range)
+        fs_pos: position of the new stop codon for frameshifts ('' if not given)
+        ext_pos: new terminus for extensions (e.g. '-5' or '*17'; '' if not given)
+        predicted: True if the change was in parentheses
 
     If aminochange does not parse, returns None.
 
     :param aminochange: (str) describing amino acid change
     :return: dict or None
     """
-    match = re_aminochange_comp_long.match(aminochange)
+    match = re_aminochange_grammar.match(aminochange.strip())
     if match:
-        # reverse long-form amino strings to short-form.
-        stuff = match.groupdict()
-        return {'ref': amino_acid_map[stuff['ref']],
-                'pos': stuff['pos'],
-                'alt': amino_acid_map[stuff['alt']],
-               }
-    else:
-        match = re_aminochange_comp_short.match(aminochange)
-        return match.groupdict()
+        return _aminochange_match_to_components(match)
     return None
 
+def parse_components_from_aminochanges(aminochanges):
+    """ Batch version of parse_components_from_aminochange: returns a list (in input order) of
+    components dictionaries, or None for each string that does not parse.
+
+    Distinct strings are parsed only once, in a single regex scan over all of them (strings containing
+    a newline, which cannot share that scan, are parsed one by one). The results are the same as from
+    parse_components_from_aminochange.
+
+    :param aminochanges: list of strings describing amino acid changes
+    :return: list of (dict or None)
+    """
+    unique = {}
+    multiline = {}
+    for aminochange in aminochanges:
+        if '\n' in aminochange:
+            if aminochange not in multiline:
+                multiline[aminochange] = parse_components_from_aminochange(aminochange)
+        elif aminochange not in unique:
+            unique[aminochange] = None
+
+    # scan all distinct strings at once, one per line, mapping match offsets back to strings.
+    blob = '\n'.join(unique)
+    line_starts = {}
+    offset = 0
+    for aminochange in unique:
+        line_starts[offset] = aminochange
+        offset += len(aminochange) + 1
+
+    for match in re_aminochange_grammar_multiline.finditer(blob):
+        aminochange = line_starts.get(match.start())
+        if aminochange is not None and match.end() == match.start() + len(aminochange):
+            unique[aminochange] = _aminochange_match_to_components(match)
+
+    unique.update(multiline)
+    return [unique.get(aminochange) for aminochange in aminochanges]
+
 def lowercase_all_the_keys(some_dict):
     """ lowercases all the keys in the supplied dictionary.
 
@@ -113,6 +265,77 @@ def lowercase_all_the_keys(some_dict):
     return dict((key.lower(), val) for key, val in some_dict.items())
 
 
+def infer_seqtype(ref, alt):
+    """ Heuristically infers the seqtype of a variant from its ref and alt strings.
+
+    :param ref: (str)
+    :param alt: (str)
+    :return: 'n', 'p', or '' (probably DNA, but we can't know for sure)
+    """
+    # If SeqType is none and REF in [u] or ALT in [u] --> then RNA
+    # If SeqType is none and REF in [AminoAcidsList] and ALT in [AminoAcidsList] --> then Protein
+    # If SeqType is none and REF in [a,c,t,g] and ALT in [a,c,t,g] --> then DNA or RNA
+    
+    refalt = ref.upper() + alt.upper()
+
+    if 'U' in refalt:
+        # Definitely RNA: there's no "U" amino acid and no "U" in the DNA nucleotides.
+        return 'n'
+
+    for char in refalt:
+        if char not in dna_nucleotides:
+            if char in amino_acid_letters:
+                return 'p'
+
+    # it's "probably" DNA, but we can't know for sure.
+    return ''
+
+
+def components_from_args(seqvar=None, aminochange='', **kwargs):
+    """ Returns a dictionary of variant components (seqvar, seqtype, edittype, ref, pos, alt, fs_pos, dupx)
+    from the same arguments accepted by VariantComponents.
+
+    :raises: RejectedSeqVar
+    """
+    kwargs = lowercase_all_the_keys(kwargs)
+
+    comp = {'seqvar': seqvar}
+    if seqvar:
+        comp['seqtype'], comp['edittype'], comp['ref'], comp['pos'], comp['alt'] = VariantComponents.parse(seqvar)
+        #TODO: get FS_Pos and DupX out of seqvar when applicable.
+        comp['fs_pos'] = ''
+        comp['dupx'] = ''
+
+    elif aminochange:
+        # parse Ref, Pos, Alt (and EditType) from string 
+        aminodict = parse_components_from_aminochange(aminochange)
+        if not aminodict:
+            raise RejectedSeqVar('Could not parse aminochange string "%s" into components' % aminochange)
+        if aminodict['end_pos'] or aminodict['edittype'] in ('EXT', 'INS'):
+            # components only describe a single residue (an insertion needs the two flanking ones);
+            # use parse_components_from_aminochange for these.
+            raise RejectedSeqVar('Aminochange "%s" (range, insertion or extension) cannot be expressed as components'
+                                 % aminochange)
+        for key in ('ref', 'pos', 'alt', 'edittype', 'fs_pos'):
+            comp[key] = aminodict[key]
+        comp['seqtype'] = 'p'
+        comp['dupx'] = ''
+
+    else:
+        # names of keywords match capitalization used in MySQL m2p_* tables in pubtatordb
+        for key in ('seqtype', 'edittype', 'ref', 'pos', 'alt', 'fs_pos', 'dupx'):
+            comp[key] = kwargs.get(key, '').strip()
+
+    if comp['edittype'].upper() == 'DELINS':
+        # normalize DELINS to INDEL (synonymous)
+        comp['edittype'] = 'INDEL'
+
+    if not comp['seqtype']:
+        comp['seqtype'] = infer_seqtype(comp['ref'], comp['alt'])
+
+    return comp
+
+
 class VariantComponents(object):
     """
     VariantComponents
@@ -150,62 +373,27 @@ class VariantComponents(object):
     """
 
     def __init__(self, seqvar=None, aminochange='', **kwargs):
-        kwargs = lowercase_all_the_keys(kwargs)
-
-        self.seqvar = seqvar
-        if self.seqvar:
-            self.seqtype, self.edittype, self.ref, self.pos, self.alt = self.parse(seqvar)
-            #TODO: get FS_Pos and DupX out of seqvar when applicable.
-            self.fs_pos = ''
-            self.dupx = ''
-
-        elif aminochange:
-            # parse Ref, Pos, Alt from string 
-            aminodict = parse_components_from_aminochange(aminochange)
-            if aminodict:
-                self.__dict__.update(aminodict)
-            else:
-                raise RejectedSeqVar('Could not parse aminochange string "%s" into components' % aminochange)
-            self.seqtype = 'p'
-            self.edittype = ''
-            self.fs_pos = ''
-            self.dupx = ''
+        self.__dict__.update(components_from_args(seqvar, aminochange, **kwargs))
 
-        else:
-            # names of keywords match capitalization used in MySQL m2p_* tables in pubtatordb
-            self.seqtype = kwargs.get('seqtype', '').strip()
-            self.edittype = kwargs.get('edittype', '').strip()
-            self.ref = kwargs.get('ref', '').strip()
-            self.pos = kwargs.get('pos', '').strip()
-            self.alt = kwargs.get('alt', '').strip()
-            self.fs_pos = kwargs.get('fs_pos', '').strip()
-            self.dupx = kwargs.get('dupx', '').strip()
-
-        if self.edittype.upper() == 'DELINS':
-            # normalize DELINS to INDEL (synonymous)
-            self.edittype = 'INDEL'
-
-        if not self.seqtype:
-            self.seqtype = self._infer_seqtype()
+    def __reduce__(self):
+        """ Pickles the components as a tuple of strings (the seqvar as its HGVS string, parsed again
+        only when first used after unpickling).
+        """
+        seqvar = self.__dict__.get('_seqvar_text', self.__dict__.get('seqvar'))
+        state = tuple(getattr(self, attr) for attr in COMPONENT_ATTRIBUTES[1:])
+        return (_restore_components, (type(self), None if seqvar is None else str(seqvar), state))
+
+    def __getattr__(self, name):
+        # only called for missing attributes: seqvar of an unpickled VariantComponents.
+        if name == 'seqvar' and '_seqvar_text' in self.__dict__:
+            from .lvg import VariantLVG
+            self.__dict__['seqvar'] = VariantLVG.parse(self.__dict__['_seqvar_text'])
+            self.__dict__.pop('_seqvar_text', None)
+            return self.__dict__['seqvar']
+        raise AttributeError("'%s' object has no attribute '%s'" % (type(self).__name__, name))
 
     def _infer_seqtype(self):
-        # If SeqType is none and REF in [u] or ALT in [u] --> then RNA
-        # If SeqType is none and REF in [AminoAcidsList] and ALT in [AminoAcidsList] --> then Protein
-        # If SeqType is none and REF in [a,c,t,g] and ALT in [a,c,t,g] --> then DNA or RNA
-        
-        refalt = self.ref.upper() + self.alt.upper()
-
-        if 'u' in refalt:
-            # Definitely RNA: there's no "U" amino acid and no "U" in the DNA nucleotides.
-            return 'n'
-
-        for char in refalt:
-            if char not in dna_nucleotides:
-                if char in list(amino_acid_map.values()):
-                    return 'p'
-
-        # it's "probably" DNA, but we can't know for sure.
-        return ''
+        return infer_seqtype(self.ref, self.alt)
 
     @staticmethod
     def parse(seqvar):
@@ -283,9 +471,19 @@ class VariantComponents(object):
             return '%s' % self.seqvar.posedit
         elif self.seqtype == 'p':
             # i.e. if we instantiated with the aminochange string
-            ref = amino_acid_map_reverse[self.ref]  
-            alt = amino_acid_map_reverse[self.alt]  
-            return '%s%s%s' % (ref, self.pos, alt)
+            ref = protein_long_names[self.ref]
+            alt = ''.join(protein_long_names[short] for short in self.alt)
+            # an unspecified edittype (e.g. from a pubtator m2p row) with ref, pos and alt is a substitution.
+            template = protein_posedit_templates.get(self.edittype or 'SUB')
+            if template is None:
+                raise NotImplementedError('Cannot currently handle protein EditType %s' % self.edittype)
+            posedit = template.format(ref=ref, pos=self.pos, alt=alt)
+            if self.edittype == 'FS' and self.fs_pos:
+                posedit += 'Ter' + self.fs_pos
+            return posedit
+        elif self.edittype in posedit_templates:
+            # i.e. if we instantiated with individual components
+            return posedit_templates[self.edittype].format(pos=self.pos, ref=self.ref, alt=self.alt)
 
     def _posedit_slang_protein(self):
         out = set()
@@ -294,11 +492,15 @@ class VariantComponents(object):
             out.add(posedit.replace('Ter', item))
 
         fs_pos = posedit.find('fs')
+        edittype = self.edittype or 'SUB'
         if fs_pos > -1:
             out.add(posedit[:fs_pos + len('fs')])
-        else:
+        elif edittype == 'SUB' and self.alt:
             # e.g. Lys2569Gly produces "K2569G"
             out.add('%s%s%s' % (self.ref, self.pos, self.alt))
+        elif edittype in protein_short_edits and '_' not in posedit:
+            # e.g. Lys23del produces "K23del" (a bare "K23" would match any mention of residue 23).
+            out.add('%s%s%s%s' % (self.ref, self.pos, protein_short_edits[edittype], self.alt))
         return list(out)
 
     def _posedit_slang_SUB(self):
@@ -359,11 +561,159 @@ class VariantComponents(object):
             raise NotImplementedError('Cannot currently handle EditType %s' % self.edittype)
 
     def to_dict(self):
-        return self.__dict__
+        self.seqvar     # parse it now if this instance was unpickled
+        return dict(self.__dict__)
+
+    def __str__(self):
+        return '%r' % self.to_dict()
+
+    def __repr__(self):
+        return '%r' % self.to_dict()
+
+
+COMPONENT_ATTRIBUTES = ('seqvar', 'seqtype', 'edittype', 'ref', 'pos', 'alt', 'fs_pos', 'dupx')
+
+_NOT_CACHED = object()
+
+
+def _restore_components(cls, seqvar_text, state):
+    """ Unpickles a VariantComponents pickled by VariantComponents.__reduce__ (without parsing its seqvar). """
+    comp = cls.__new__(cls)
+    comp.__dict__.update(zip(COMPONENT_ATTRIBUTES[1:], state))
+    if seqvar_text is None:
+        comp.seqvar = None
+    else:
+        comp._seqvar_text = seqvar_text
+    return comp
+
+
+class FrozenVariantComponents(object):
+    """
+    FrozenVariantComponents
+
+    Lightweight, immutable drop-in for VariantComponents, for when many millions of components are
+    kept in memory (e.g. lookup tables).
+
+    Instantiated exactly like VariantComponents and provides the same attributes, properties and
+    methods. Instances use __slots__ (no per-instance __dict__), cannot be modified after construction,
+    and compute posedit and posedit_slang only once (on first access).
+
+    Usage:
+
+        comp = FrozenVariantComponents(seqvar)
+        comp = FrozenVariantComponents(seqtype='c', edittype='SUB', pos='128', ref='C', alt='T')
+        comp = FrozenVariantComponents(aminochange='V777A')
+    """
+
+    __slots__ = COMPONENT_ATTRIBUTES + ('_posedit', '_posedit_slang')
+
+    def __init__(self, seqvar=None, aminochange='', **kwargs):
+        comp = components_from_args(seqvar, aminochange, **kwargs)
+        for attr in COMPONENT_ATTRIBUTES:
+            object.__setattr__(self, attr, comp[attr])
+        object.__setattr__(self, '_posedit', _NOT_CACHED)
+        object.__setattr__(self, '_posedit_slang', _NOT_CACHED)
+
+    def __setattr__(self, attr, value):
+        raise AttributeError('%s is immutable' % type(self).__name__)
+
+    def __delattr__(self, attr):
+        raise AttributeError('%s is immutable' % type(self).__name__)
+
+    def __getstate__(self):
+        return dict((attr, getattr(self, attr)) for attr in COMPONENT_ATTRIBUTES)
+
+    def __setstate__(self, state):
+        for attr in COMPONENT_ATTRIBUTES:
+            object.__setattr__(self, attr, state[attr])
+        object.__setattr__(self, '_posedit', _NOT_CACHED)
+        object.__setattr__(self, '_posedit_slang', _NOT_CACHED)
+
+    parse = staticmethod(VariantComponents.parse)
+    to_mysql_dict = VariantComponents.to_mysql_dict
+    _infer_seqtype = VariantComponents._infer_seqtype
+    _posedit_slang_protein = VariantComponents._posedit_slang_protein
+    _posedit_slang_SUB = VariantComponents._posedit_slang_SUB
+    _posedit_slang_DEL = VariantComponents._posedit_slang_DEL
+    _posedit_slang_DUP = VariantComponents._posedit_slang_DUP
+    _posedit_slang_INDEL = VariantComponents._posedit_slang_INDEL
+    _posedit_slang_INS = VariantComponents._posedit_slang_INS
+
+    @property
+    def posedit(self):
+        """ Returns (and caches) the canonical lexeme representing this variant's position and edit information. """
+        if self._posedit is _NOT_CACHED:
+            object.__setattr__(self, '_posedit', VariantComponents.posedit.fget(self))
+        return self._posedit
+
+    @property
+    def posedit_slang(self):
+        """ Returns a (new) list of alternative lexemes for this variant's posedit; computed only once. """
+        if self._posedit_slang is _NOT_CACHED:
+            object.__setattr__(self, '_posedit_slang', tuple(VariantComponents.posedit_slang.fget(self)))
+        return list(self._posedit_slang)
+
+    def to_dict(self):
+        return dict((attr, getattr(self, attr)) for attr in COMPONENT_ATTRIBUTES)
 
     def __str__(self):
-        return '%r' % self.__dict__
+        return '%r' % self.to_dict()
 
     def __repr__(self):
-        return '%r' % self.__dict__
+        return '%r' % self.to_dict()
+
+
+# nucleotide edit types (as named by hgvs) with posedit_slang methods; every protein edit has slang.
+SLANG_EDIT_TYPES = frozenset(['sub', 'del', 'dup', 'delins', 'ins'])
+
+# (is protein, posedit) -> tuple of slang, or None for unusable variants; cleared when full.
+_slang_cache = {}
+
 
+def seqvar_posedit_slang(seqvar):
+    """ Returns (posedit, slang) for a SequenceVariant, where slang is a tuple of posedit_slang terms
+    (empty for edit types posedit_slang does not handle), or None if seqvar has no usable edit.
+
+    Unsupported edit types are recognized before any VariantComponents is made, so they cost no
+    exception. Results are cached by posedit and shared by all callers: the c. variants of one change
+    on several transcripts, or in several LVGs, compute their slang once.
+
+    :param seqvar: hgvs SequenceVariant
+    :return: (posedit, tuple) or None
+    """
+    if seqvar.posedit is None:
+        return None
+    posedit = '%s' % seqvar.posedit
+    key = (seqvar.type == 'p', posedit)
+    slang = _slang_cache.get(key, _NOT_CACHED)
+    if slang is _NOT_CACHED:
+        edit_type = getattr(seqvar.posedit.edit, 'type', None)
+        if seqvar.type != 'p' and edit_type not in SLANG_EDIT_TYPES:
+            slang = ()
+        else:
+            try:
+                slang = tuple(sorted(VariantComponents(seqvar).posedit_slang))
+            except (RejectedSeqVar, NotImplementedError):
+                slang = None
+        if len(_slang_cache) >= SLANG_CACHE_SIZE:
+            _slang_cache.clear()
+        _slang_cache[key] = slang
+    if slang is None:
+        return None
+    return posedit, slang
+
+
+def seqvars_posedit_slang(seqvars):
+    """ Returns {posedit: tuple of slang} for the usable variants among seqvars (see seqvar_posedit_slang).
+
+    :param seqvars: iterable of SequenceVariants
+    :return: dict
+    """
+    out = {}
+    for seqvar in seqvars:
+        if seqvar is None:
+            continue
+        found = seqvar_posedit_slang(seqvar)
+        if found is not None:
+            out[found[0]] = found[1]
+    return out
@@ -3,6 +3,7 @@
 import os, socket
 from configparser import ConfigParser
 
+import hgvs
 import hgvs.dataproviders.uta
 
 PKGNAME = 'metavariant'
@@ -16,6 +17,35 @@ UTA_SCHEMA = os.getenv('UTA_SCHEMA', 'uta_20171026')
 UTA_TIMEOUT = os.getenv('UTA_TIMEOUT', 3)
 UTA_USER = os.getenv('UTA_USER', 'uta_admin')
 UTA_PASS = os.getenv('UTA_PASS', 'uta_admin')
+UTA_POOLING = bool(os.getenv('UTA_POOLING', False))
+UTA_POOL_MIN = os.getenv('UTA_POOL_MIN', 1)
+UTA_POOL_MAX = os.getenv('UTA_POOL_MAX', 10)
+
+# local SeqStore (see metavariant.seqstore) to fetch sequences from before going remote.
+SEQSTORE_PATH = os.getenv('%s_SEQSTORE' % PKGNAME, None)
+
+# accession -> gene name file (see metavariant.genenames), loaded instead of querying UTA if it exists.
+GENE_NAME_CACHE_PATH = os.getenv('%s_GENE_NAME_CACHE' % PKGNAME, None)
+
+# seconds to wait before trying again to load gene names from UTA after a failed attempt.
+GENE_NAME_RETRY_SECONDS = float(os.getenv('%s_GENE_NAME_RETRY' % PKGNAME, 300))
+
+# max number of transcript alignments kept in memory (shared by all mappers).
+ALIGNMENT_CACHE_SIZE = int(os.getenv('%s_ALIGNMENT_CACHE_SIZE' % PKGNAME, 5000))
+
+# max number of canonical variant keys kept in memory (see metavariant.normalize).
+NORMALIZE_CACHE_SIZE = int(os.getenv('%s_NORMALIZE_CACHE_SIZE' % PKGNAME, 100000))
+
+# max number of posedits whose slang is kept in memory (see metavariant.components.seqvar_posedit_slang).
+SLANG_CACHE_SIZE = int(os.getenv('%s_SLANG_CACHE_SIZE' % PKGNAME, 100000))
+
+# circuit breakers (see metavariant.breaker): consecutive backend failures before failing fast,
+# and seconds to fail fast before letting a trial call through.
+BREAKER_FAILURE_THRESHOLD = int(os.getenv('%s_BREAKER_FAILURES' % PKGNAME, 5))
+BREAKER_RESET_TIMEOUT = float(os.getenv('%s_BREAKER_RESET_TIMEOUT' % PKGNAME, 30))
+
+# seconds to wait for NCBI and LOVD web services.
+REMOTE_TIMEOUT = float(os.getenv('%s_REMOTE_TIMEOUT' % PKGNAME, 10))
 
 ####
 import logging
@@ -30,11 +60,19 @@ else:
 #log.debug('%s env: %s' % (PKGNAME, ENV))
 
 def get_uta_connection(host=UTA_HOST, port=UTA_PORT, timeout=UTA_TIMEOUT, schema=UTA_SCHEMA, 
-                        username=UTA_USER, password=UTA_PASS):
+                        username=UTA_USER, password=UTA_PASS, pooling=UTA_POOLING,
+                        pool_min=UTA_POOL_MIN, pool_max=UTA_POOL_MAX, seqstore=SEQSTORE_PATH):
     """ Returns an open connection to a UTA host at given coordinates, if possible.
     
     If host=='default', returns connection to default UTA server (uta.biocommons.org).
 
+    If pooling is True, the connection is backed by a thread-safe pool of between pool_min
+    and pool_max database connections (for either host path). Otherwise pooling is used only
+    for non-default hosts.
+
+    If seqstore is set (path to a metavariant SeqStore), the connection fetches sequences from it
+    first, falling back to its usual (remote) source.
+
     :return: open UTA connection
     :raises: socket, uta, hgvs Exceptions
     """
@@ -42,15 +80,24 @@ def get_uta_connection(host=UTA_HOST, port=UTA_PORT, timeout=UTA_TIMEOUT, schema
     timeout = int(timeout)
     port = int(port)
 
+    if pooling:
+        # hgvs reads pool sizes from its global config when the connection is made.
+        hgvs.global_config.uta.pool_min = int(pool_min)
+        hgvs.global_config.uta.pool_max = int(pool_max)
+
     uta_cnxn_tmpl = 'postgresql://{user}:{pwd}@{host}:{port}/uta/{schema}/'
     cnxn_desc = uta_cnxn_tmpl.format(host=host, port=port, schema=schema, user=username, pwd=password)
 
     if host == 'default':
-        return hgvs.dataproviders.uta.connect()
-
-    socket.create_connection((host, port), timeout=timeout)
-    try:
-        return hgvs.dataproviders.uta.connect(cnxn_desc, pooling=True)
-    except:
-        raise Exception('Cannot connect to UTA at {}'.format(cnxn_desc))
+        hdp = hgvs.dataproviders.uta.connect(pooling=bool(pooling))
+    else:
+        socket.create_connection((host, port), timeout=timeout)
+        try:
+            hdp = hgvs.dataproviders.uta.connect(cnxn_desc, pooling=True)
+        except:
+            raise Exception('Cannot connect to UTA at {}'.format(cnxn_desc))
 
+    if seqstore:
+        from .seqstore import install_seqstore
+        install_seqstore(hdp, seqstore)
+    return hdp
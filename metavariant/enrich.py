@@ -0,0 +1,335 @@
+""" Provides EnrichmentOrchestrator, which annotates a variant from UTA, NCBI and LOVD concurrently.
+
+NCBIEnrichedLVG fetches the NCBI report before it starts UTA mapping, and looking up LOVD variants
+for the gene has to wait for both. The orchestrator instead starts each source as soon as its input
+is known:
+
+    ncbi    NCBI Variant Reporter report for the input HGVS string      (starts at once)
+    uta     VariantLVG mapping of the input HGVS string                 (starts at once)
+    lovd    LOVD variants for the gene                                  (starts once the gene name is known:
+                                                                         at once for c., n. and p. input,
+                                                                         after UTA mapping for g. input)
+
+and merges their results into one EnrichedVariant, so the time taken is that of the slowest source
+rather than the sum of all three. Each source has its own timeout, counted from the start of
+enrich(); a source that fails or runs out of time is reported in EnrichedVariant.sources and
+leaves the rest of the record intact.
+
+Run from the command line:
+
+    python -m metavariant.enrich NM_000155.3:c.253C>T --timeout-lovd 5
+"""
+
+import argparse
+import json
+import logging
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+
+from .config import PKGNAME, REMOTE_TIMEOUT
+from .exceptions import CriticalHgvsError
+from .lovd import get_variants_for_gene_name
+from .lvg import SEQTYPES, VariantLVG, lease_worker, variant_to_gene_name
+from .ncbi import get_ncbi_variant_report
+
+log = logging.getLogger(PKGNAME)
+
+SOURCES = ('uta', 'ncbi', 'lovd')
+
+# seconds each source may take, counted from the start of EnrichmentOrchestrator.enrich.
+DEFAULT_TIMEOUTS = {'uta': 30.0, 'ncbi': REMOTE_TIMEOUT, 'lovd': REMOTE_TIMEOUT}
+
+# extra seconds to wait for a VariantLVG to hand back its partial result once its deadline passes.
+DEADLINE_GRACE = 1.0
+
+# outcome of one source: status is 'ok', 'error', 'timeout' or 'skipped'; seconds is time spent in the source.
+SourceResult = namedtuple('SourceResult', ['status', 'seconds', 'error'])
+
+
+def _timed(func, *args):
+    """ Returns (result, seconds spent in func). """
+    started = time.time()
+    result = func(*args)
+    return result, time.time() - started
+
+
+def ncbi_report_to_hgvs(report):
+    """ Returns {seqtype: [hgvs_text, ...]} from the Hgvs_c/g/n/p columns of an NCBI report. """
+    out = dict((seqtype, []) for seqtype in SEQTYPES)
+    for rep_part in report:
+        for seqtype in SEQTYPES:
+            hgvs_text = rep_part.get('Hgvs_%s' % seqtype, '').strip()
+            if hgvs_text:
+                out[seqtype].append(hgvs_text)
+    return out
+
+
+class EnrichedVariant(object):
+    """
+    EnrichedVariant
+
+    Merged result of EnrichmentOrchestrator.enrich: the synonyms found by UTA mapping and by NCBI,
+    the PMIDs cited by NCBI, and the variants LOVD knows for the gene.
+
+    Usage:
+
+        record = orchestrator.enrich('NM_000155.3:c.253C>T')
+        record.hgvs_p                       # union of VariantLVG and NCBI p. synonyms
+        record.sources['lovd']              # SourceResult(status='ok', seconds=0.8, error=None)
+        record.to_json()
+
+    Attributes:
+        lvg (VariantLVG): UTA mapping result (None unless the uta source finished)
+        ncbi_report (list): NCBI report rows (None unless the ncbi source finished)
+        lovd_variants (list): sorted HGVS strings from LOVD for gene_name
+        sources (dict): source name -> SourceResult
+        degraded (bool): some source failed or timed out, or the LVG was degraded (see VariantLVG)
+    """
+
+    def __init__(self, hgvs_text, seqtype):
+        self.hgvs_text = hgvs_text
+        self.seqtype = seqtype
+        self.gene_name = None
+        self.lvg = None
+        self.ncbi_report = None
+        self.lovd_variants = []
+        self.pmids = []
+        self.sources = {}
+        self._hgvs = dict((seqtype, set()) for seqtype in SEQTYPES)
+
+    def _add_hgvs(self, seqtype, hgvs_texts):
+        self._hgvs[seqtype].update(hgvs_texts)
+
+    @property
+    def hgvs_c(self):
+        return sorted(self._hgvs['c'])
+
+    @property
+    def hgvs_g(self):
+        return sorted(self._hgvs['g'])
+
+    @property
+    def hgvs_n(self):
+        return sorted(self._hgvs['n'])
+
+    @property
+    def hgvs_p(self):
+        return sorted(self._hgvs['p'])
+
+    @property
+    def transcripts(self):
+        return sorted(self.lvg.transcripts) if self.lvg is not None else []
+
+    @property
+    def partial(self):
+        return self.lvg.partial if self.lvg is not None else True
+
+    @property
+    def degraded(self):
+        if any(result.status in ('error', 'timeout') for result in self.sources.values()):
+            return True
+        return bool(self.lvg is not None and self.lvg.degraded)
+
+    def to_dict(self):
+        return {'hgvs_text': self.hgvs_text,
+                'gene_name': self.gene_name,
+                'transcripts': self.transcripts,
+                'hgvs_c': self.hgvs_c,
+                'hgvs_g': self.hgvs_g,
+                'hgvs_n': self.hgvs_n,
+                'hgvs_p': self.hgvs_p,
+                'pmids': self.pmids,
+                'lovd_variants': self.lovd_variants,
+                'partial': self.partial,
+                'degraded': self.degraded,
+                'sources': dict((name, result._asdict()) for name, result in self.sources.items()),
+                }
+
+    def to_json(self):
+        return json.dumps(self.to_dict())
+
+    def __str__(self):
+        return '%s' % self.to_dict()
+
+
+class EnrichmentOrchestrator(object):
+    """
+    EnrichmentOrchestrator
+
+    Runs the UTA, NCBI and LOVD lookups for a variant in parallel threads (see module docstring)
+    and merges them into an EnrichedVariant. One orchestrator can serve many threads at once; its
+    executor bounds the number of source lookups in flight.
+
+    A source that runs out of time keeps running in the background (threads cannot be cancelled),
+    but its result is not waited for. UTA mapping is additionally given its timeout as a VariantLVG
+    deadline, so a slow mapping comes back partial instead of being dropped.
+
+    Usage:
+
+        orchestrator = EnrichmentOrchestrator(pool=HgvsPool(size=8), timeouts={'lovd': 5})
+        record = orchestrator.enrich('NM_000155.3:c.253C>T')
+        orchestrator.close()
+
+    Keywords:
+        pool (HgvsPool): workers for parsing and UTA mapping [default: None, i.e. the module worker]
+        timeouts (dict): seconds per source ('uta', 'ncbi', 'lovd'), merged over DEFAULT_TIMEOUTS;
+                         None for no limit
+        max_workers (int): threads for source lookups [default: 3 per pool worker, or 3]
+        lvg_kwargs (dict): extra keyword arguments for VariantLVG (e.g. transcript_policy)
+    """
+
+    def __init__(self, pool=None, timeouts=None, max_workers=None, lvg_kwargs=None):
+        self.pool = pool
+        self.timeouts = dict(DEFAULT_TIMEOUTS)
+        self.timeouts.update(timeouts or {})
+        self.lvg_kwargs = dict(lvg_kwargs or {})
+        if max_workers is None:
+            max_workers = len(SOURCES) * (pool.size if pool is not None else 1)
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='%s-enrich' % PKGNAME)
+
+    def close(self):
+        """ Stops the executor, without waiting for sources still running past their timeouts. """
+        self._executor.shutdown(wait=False)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _map_uta(self, seqvar):
+        kwargs = dict(self.lvg_kwargs)
+        if self.timeouts.get('uta') is not None:
+            kwargs.setdefault('deadline', self.timeouts['uta'])
+        return VariantLVG(seqvar, pool=self.pool, **kwargs)
+
+    def _lookup_lovd(self, seqvar, uta_future, started):
+        """ Finds the gene name (from the input accession, else from the finished LVG), then asks LOVD.
+        Returns (gene_name, lovd variants or None), or raises FutureTimeout if the LVG is not ready in time.
+        """
+        gene_name = variant_to_gene_name(seqvar, hdp=self.pool.hdp if self.pool else None)
+        if gene_name is None:
+            lvg, _ = uta_future.result(timeout=self._remaining('uta', started))
+            gene_name = lvg.gene_name
+        if gene_name is None:
+            return None, None
+        return gene_name, sorted(get_variants_for_gene_name(gene_name))
+
+    def _remaining(self, source, started):
+        timeout = self.timeouts.get(source)
+        if timeout is None:
+            return None
+        if source == 'uta':
+            timeout += DEADLINE_GRACE
+        return max(0, started + timeout - time.time())
+
+    def _collect(self, record, source, future, started):
+        """ Waits (at most until source's timeout) for future; records and returns its result, or None. """
+        try:
+            result, seconds = future.result(timeout=self._remaining(source, started))
+        except FutureTimeout:
+            record.sources[source] = SourceResult('timeout', time.time() - started, 'no result within %ss' % self.timeouts[source])
+            log.debug('%s: %s timed out', record.hgvs_text, source)
+            return None
+        except Exception as error:
+            record.sources[source] = SourceResult('error', time.time() - started, '%r' % error)
+            log.debug('%s: %s failed; %r', record.hgvs_text, source, error)
+            return None
+        record.sources[source] = SourceResult('ok', seconds, None)
+        return result
+
+    def _merge_ncbi(self, record, report):
+        hgvs = ncbi_report_to_hgvs(report)
+        with lease_worker(self.pool) as worker:
+            for seqtype in SEQTYPES:
+                # normalize NCBI's strings the way VariantLVG does; NCBI sometimes reports unparseable ones.
+                seqvars = [VariantLVG.parse(hgvs_text, parser=worker.parser) for hgvs_text in hgvs[seqtype]]
+                record._add_hgvs(seqtype, ['%s' % seqvar for seqvar in seqvars if seqvar is not None])
+        pmids = set()
+        for rep_part in report:
+            pmids.update(int(pmid) for pmid in rep_part.get('PMIDs') or [] if pmid.strip())
+        record.pmids = sorted(pmids)
+
+    def enrich(self, hgvs_text_or_seqvar):
+        """ Looks the variant up in every source at once and returns the merged EnrichedVariant.
+
+        :param hgvs_text_or_seqvar: HGVS string or SequenceVariant
+        :return: EnrichedVariant
+        :raises: CriticalHgvsError if the input cannot be parsed
+        """
+        started = time.time()
+        with lease_worker(self.pool) as worker:
+            seqvar = VariantLVG.parse(hgvs_text_or_seqvar, parser=worker.parser)
+        if seqvar is None:
+            raise CriticalHgvsError('Cannot create SequenceVariant from input %s' % hgvs_text_or_seqvar)
+        hgvs_text = '%s' % seqvar
+
+        submit = self._executor.submit
+        futures = {'uta': submit(_timed, self._map_uta, seqvar),
+                   'ncbi': submit(_timed, get_ncbi_variant_report, hgvs_text)}
+        futures['lovd'] = submit(_timed, self._lookup_lovd, seqvar, futures['uta'], started)
+
+        record = EnrichedVariant(hgvs_text, seqvar.type)
+        record._add_hgvs(seqvar.type, [hgvs_text])
+
+        lvg = self._collect(record, 'uta', futures['uta'], started)
+        if lvg is not None:
+            record.lvg = lvg
+            record.gene_name = lvg._gene_name
+            for seqtype in SEQTYPES:
+                record._add_hgvs(seqtype, lvg._hgvs(seqtype))
+
+        report = self._collect(record, 'ncbi', futures['ncbi'], started)
+        if report is not None:
+            self._merge_ncbi(record, report)
+
+        lovd = self._collect(record, 'lovd', futures['lovd'], started)
+        if lovd is not None:
+            gene_name, lovd_variants = lovd
+            record.gene_name = record.gene_name or gene_name
+            if lovd_variants is None:
+                record.sources['lovd'] = SourceResult('skipped', record.sources['lovd'].seconds, 'no gene name')
+            else:
+                record.lovd_variants = lovd_variants
+
+        log.debug('%s enriched in %.3fs: %s', hgvs_text, time.time() - started,
+                  ', '.join('%s %s %.3fs' % (name, result.status, result.seconds) for name, result in sorted(record.sources.items())))
+        return record
+
+    def enrich_many(self, hgvs_texts):
+        """ Yields (hgvs_text, EnrichedVariant or exception) in input order, enriching one variant at a time. """
+        for hgvs_text in hgvs_texts:
+            try:
+                yield hgvs_text, self.enrich(hgvs_text)
+            except Exception as error:
+                yield hgvs_text, error
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Annotate variants from UTA, NCBI and LOVD concurrently (JSON lines).')
+    parser.add_argument('hgvs_texts', nargs='+')
+    for source in SOURCES:
+        parser.add_argument('--timeout-%s' % source, type=float, default=DEFAULT_TIMEOUTS[source],
+                            help='seconds for %s [default: %s]' % (source, DEFAULT_TIMEOUTS[source]))
+    parser.add_argument('--pool-size', type=int, default=None, help='HgvsPool workers [default: module UTA connection]')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig()
+    pool = None
+    if args.pool_size:
+        from .pool import HgvsPool
+        pool = HgvsPool(size=args.pool_size)
+    timeouts = dict((source, getattr(args, 'timeout_%s' % source)) for source in SOURCES)
+    with EnrichmentOrchestrator(pool=pool, timeouts=timeouts) as orchestrator:
+        for hgvs_text, record in orchestrator.enrich_many(args.hgvs_texts):
+            if isinstance(record, Exception):
+                print(json.dumps({'hgvs_text': hgvs_text, 'error': '%r' % record}))
+            else:
+                print(record.to_json())
+    if pool is not None:
+        pool.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -36,5 +36,18 @@ class LOVDRemoteError(MetaVariantException):
     pass
 
 
+class BadServiceRequest(MetaVariantException):
+    """ Raised by the LVG service (metavariant.service) for requests it cannot answer, such as unparseable
+    HGVS strings or unknown modes; the HTTP server answers these with status 400.
+    """
+    pass
 
 
+class CircuitOpenError(MetaVariantException):
+    """ Raised instead of calling a backend (UTA, NCBI, LOVD) whose circuit breaker is open, i.e. which
+    has been failing; see metavariant.breaker. The backend's name is in the `backend` attribute.
+    """
+
+    def __init__(self, backend, message=None):
+        self.backend = backend
+        super(CircuitOpenError, self).__init__(message or 'Circuit breaker for %s is open (backend failing)' % backend)
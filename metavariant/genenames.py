@@ -0,0 +1,272 @@
+""" Provides GeneNameCache, an accession -> HGNC gene symbol lookup loaded from UTA in bulk.
+
+The shared `gene_name_cache` keeps one mapping per UTA data provider, each loaded on first use: from
+the file named by the metavariant_GENE_NAME_CACHE environment variable if it exists, otherwise from
+UTA with one query for all transcripts (and one for their proteins). To make that file for offline use:
+
+    python -m metavariant.genenames -o gene_names.tsv
+"""
+
+import argparse
+import gzip
+import logging
+import os
+import threading
+import time
+
+from hgvs.exceptions import HGVSDataNotAvailableError
+
+from .config import GENE_NAME_CACHE_PATH, GENE_NAME_RETRY_SECONDS, PKGNAME
+from .pipeline import open_dump
+
+log = logging.getLogger(PKGNAME)
+
+# every transcript accession, and every protein accession associated with a transcript.
+SQL_TRANSCRIPT_GENES = 'select ac, hgnc from transcript'
+SQL_PROTEIN_GENES = 'select AA.pro_ac, T.hgnc from associated_accessions AA join transcript T on T.ac = AA.tx_ac'
+
+
+class GeneNameCache(object):
+    """
+    GeneNameCache
+
+    Maps transcript (NM_, NR_, ...) and protein (NP_, ...) accessions to HGNC gene symbols.
+
+    The whole mapping is loaded at once, either from UTA (load_from_uta) or from a file written by
+    save (load). If it could not be loaded, lookups fall back to one get_tx_identity_info query per
+    accession, and the answers are cached; loading is tried again after `retry_after` seconds.
+
+    A GeneNameCache holds the names of one data provider; see GeneNameCaches for the shared one.
+
+    Usage:
+
+        cache = GeneNameCache()
+        cache.load_from_uta(hdp)
+        cache.get('NM_000151.3')                           # 'G6PC1'
+        cache.get_many(['NM_000151.3', 'NP_000142.2'])      # {'NM_000151.3': 'G6PC1', ...}
+        cache.save('gene_names.tsv')
+
+    Keywords:
+        path (str): file to load from on first use, if it exists [default: None]
+        retry_after (float): seconds before loading again after a failure [default: GENE_NAME_RETRY_SECONDS]
+    """
+
+    def __init__(self, path=None, retry_after=GENE_NAME_RETRY_SECONDS):
+        self.path = path
+        self.retry_after = retry_after
+        self.loaded_at = None
+        self.source = None
+        self._names = {}
+        self._lock = threading.Lock()
+        self._failed_at = None
+
+    def __len__(self):
+        return len(self._names)
+
+    def __contains__(self, ac):
+        return ac in self._names
+
+    @property
+    def is_loaded(self):
+        return self.loaded_at is not None
+
+    def _replace(self, names, source):
+        # swap in the new mapping in one step, so readers never see a partial one.
+        self._names = names
+        self.source = source
+        self.loaded_at = time.time()
+        self._failed_at = None
+        log.info('Gene name cache: %i accessions loaded from %s', len(names), source)
+
+    def load_from_uta(self, hdp):
+        """ (Re)loads the whole mapping from UTA in bulk.
+
+        :param hdp: UTA data provider (hgvs.dataproviders.uta)
+        :return: (int) number of accessions loaded
+        """
+        names = {}
+        for sql in (SQL_TRANSCRIPT_GENES, SQL_PROTEIN_GENES):
+            for row in hdp._fetchall(sql):
+                if row[1]:
+                    names[row[0]] = row[1]
+        self._replace(names, 'UTA')
+        return len(names)
+
+    refresh = load_from_uta
+
+    def load(self, path):
+        """ (Re)loads the mapping from a file written by save (plain or .gz).
+
+        :param path: (str)
+        :return: (int) number of accessions loaded
+        """
+        names = {}
+        with open_dump(path) as fh:
+            for line in fh:
+                ac, _, name = line.rstrip('\n').partition('\t')
+                if name:
+                    names[ac] = name
+        self._replace(names, path)
+        return len(names)
+
+    def save(self, path):
+        """ Writes the mapping to path as "accession<tab>gene" lines (gzipped if path ends in .gz). """
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'wt') as fh:
+            for ac, name in sorted(self._names.items()):
+                fh.write('%s\t%s\n' % (ac, name))
+
+    def _backing_off(self):
+        return self._failed_at is not None and time.time() - self._failed_at < self.retry_after
+
+    def ensure_loaded(self, hdp=None):
+        """ Loads the mapping if that hasn't happened yet (or last failed more than retry_after seconds
+        ago): from self.path if that file exists, otherwise from UTA via hdp.
+
+        :return: (bool) whether the mapping is loaded
+        """
+        if self.is_loaded or self._backing_off():
+            return self.is_loaded
+
+        with self._lock:
+            if self.is_loaded or self._backing_off():
+                return self.is_loaded
+            try:
+                if self.path and os.path.exists(self.path):
+                    self.load(self.path)
+                elif hdp is not None:
+                    self.load_from_uta(hdp)
+                else:
+                    return False
+            except Exception as error:
+                log.warning('Cannot load gene name cache (falling back to per-accession lookups for %is): %r',
+                            self.retry_after, error)
+                self._failed_at = time.time()
+        return self.is_loaded
+
+    def _lookup_one(self, ac, hdp):
+        try:
+            tx_identity = hdp.get_tx_identity_info(ac)
+        except HGVSDataNotAvailableError:
+            tx_identity = None
+        name = tx_identity[-1] if tx_identity is not None else None
+        self._names[ac] = name
+        return name
+
+    def get(self, ac, hdp=None):
+        """ Returns the HGNC symbol for accession ac, or None if it is not known.
+
+        :param ac: (str) transcript or protein accession
+        :param hdp: data provider to load from (or to query, if the mapping could not be loaded)
+        :return: (str) or None
+        """
+        if self.ensure_loaded(hdp) or ac in self._names or hdp is None:
+            return self._names.get(ac)
+        return self._lookup_one(ac, hdp)
+
+    def get_many(self, acs, hdp=None):
+        """ Resolves gene names for many accessions at once.
+
+        :param acs: iterable of accessions
+        :param hdp: see get
+        :return: (dict) accession -> symbol (or None)
+        """
+        return dict((ac, self.get(ac, hdp)) for ac in acs)
+
+
+def _hdp_key(hdp):
+    # UTA data providers are told apart by URL, which includes the schema; others by identity.
+    url = getattr(hdp, 'url', None)
+    return str(url) if url else hdp
+
+
+class GeneNameCaches(object):
+    """
+    GeneNameCaches
+
+    Keeps one GeneNameCache per data provider (per UTA URL and schema), so names loaded from (or
+    looked up in) one UTA database are never answered for another. If `path` names an existing
+    file, the mapping loaded from it is used for every data provider instead.
+
+    Module-level `gene_name_cache` is shared by VariantLVG and variant_to_gene_name.
+
+    Usage:
+
+        gene_name_cache.get('NM_000151.3', hdp)             # 'G6PC1'
+        gene_name_cache.get_many(['NP_000142.2'], hdp)
+        gene_name_cache.refresh(hdp)
+        gene_name_cache.clear()                             # e.g. between tests
+
+    Keywords:
+        path (str): file to load from on first use, if it exists [default: None]
+        retry_after (float): see GeneNameCache
+    """
+
+    def __init__(self, path=None, retry_after=GENE_NAME_RETRY_SECONDS):
+        self.path = path
+        self.retry_after = retry_after
+        self._caches = {}
+        self._lock = threading.Lock()
+
+    def for_hdp(self, hdp):
+        """ Returns the GeneNameCache used for data provider hdp (made on first use). """
+        key = None if hdp is None else _hdp_key(hdp)
+        if self.path and os.path.exists(self.path):
+            key = self.path
+        cache = self._caches.get(key)
+        if cache is None:
+            with self._lock:
+                cache = self._caches.get(key)
+                if cache is None:
+                    cache = self._caches[key] = GeneNameCache(self.path, self.retry_after)
+        return cache
+
+    def get(self, ac, hdp=None):
+        """ See GeneNameCache.get """
+        return self.for_hdp(hdp).get(ac, hdp)
+
+    def get_many(self, acs, hdp=None):
+        """ See GeneNameCache.get_many """
+        return self.for_hdp(hdp).get_many(acs, hdp)
+
+    def refresh(self, hdp):
+        """ (Re)loads the mapping of hdp from UTA in bulk; returns the number of accessions loaded. """
+        return self.for_hdp(hdp).load_from_uta(hdp)
+
+    def clear(self):
+        """ Forgets every loaded mapping and cached lookup. """
+        with self._lock:
+            self._caches = {}
+
+
+gene_name_cache = GeneNameCaches(GENE_NAME_CACHE_PATH)
+
+
+def gene_names_for_accessions(acs, hdp=None):
+    """ Returns {accession: HGNC symbol or None} for many accessions, using the shared gene_name_cache.
+
+    :param acs: iterable of transcript or protein accessions
+    :param hdp: data provider [default: module UTA connection]
+    :return: (dict)
+    """
+    if hdp is None:
+        from .lvg import default_worker
+        hdp = default_worker.hdp
+    return gene_name_cache.get_many(acs, hdp)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Save the accession -> gene name mapping from UTA for offline use.')
+    parser.add_argument('-o', '--output', required=True, help='file to write (.gz to compress)')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig()
+    from .lvg import default_worker
+    cache = GeneNameCache()
+    cache.load_from_uta(default_worker.hdp)
+    cache.save(args.output)
+    print('%i accessions written to %s' % (len(cache), args.output))
+
+
+if __name__ == '__main__':
+    main()
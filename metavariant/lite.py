@@ -0,0 +1,138 @@
+""" Provides LiteLVG, a compact, string-only form of a VariantLVG result. """
+
+import json
+import logging
+import sys
+
+from .components import seqvars_posedit_slang
+from .config import PKGNAME
+from .lvg import SEQTYPES, VariantLVG
+
+log = logging.getLogger(PKGNAME)
+
+
+def _interned(strings):
+    return tuple(sys.intern(str(string)) for string in strings)
+
+
+class LiteLVG(object):
+    """
+    LiteLVG
+
+    Holds the results of a VariantLVG as interned HGVS strings (one tuple per seqtype), plus its
+    (sorted) transcripts and gene name, without any SequenceVariant objects. SequenceVariants are
+    parsed again only when `seqvar`, `seqvars` or `variants` is accessed.
+
+    Intended for keeping very many LVG results in memory (e.g. in a lookup service); see
+    benchmarks/bench_lite.py for a memory comparison with VariantLVG.
+
+    Usage:
+
+        lite = LiteLVG.from_lvg(VariantLVG('NM_198056.2:c.4786T>A'))
+        lite = VariantLVG('NM_198056.2:c.4786T>A').to_lite()
+
+        lite.hgvs_p
+        lite.gene_name
+        lite.seqvars        # parsed on demand
+    """
+
+    __slots__ = ('hgvs_text', 'gene_name', 'transcripts', '_hgvs')
+
+    def __init__(self, hgvs_text, hgvs_c=(), hgvs_g=(), hgvs_n=(), hgvs_p=(), transcripts=(), gene_name=None):
+        self.hgvs_text = sys.intern(hgvs_text)
+        self.gene_name = sys.intern(gene_name) if gene_name else None
+        self.transcripts = _interned(sorted(transcripts))
+        self._hgvs = (_interned(hgvs_c), _interned(hgvs_g), _interned(hgvs_n), _interned(hgvs_p))
+
+    @classmethod
+    def from_lvg(cls, lex, with_gene_name=True):
+        """ Makes a LiteLVG from a VariantLVG (or anything with the same properties).
+
+        :param lex: VariantLVG
+        :param with_gene_name: (bool) look up gene_name if not already known [default: True]
+        :return: LiteLVG
+        """
+        gene_name = lex.gene_name if with_gene_name else getattr(lex, '_gene_name', None)
+        return cls(lex.hgvs_text, lex.hgvs_c, lex.hgvs_g, lex.hgvs_n, lex.hgvs_p,
+                   transcripts=lex.transcripts, gene_name=gene_name)
+
+    def __getstate__(self):
+        return self._simple_dict()
+
+    def __setstate__(self, state):
+        self.__init__(**state)
+
+    def __eq__(self, other):
+        if not isinstance(other, LiteLVG):
+            return NotImplemented
+        return self._simple_dict() == other._simple_dict()
+
+    def __repr__(self):
+        return '<LiteLVG %s>' % self.hgvs_text
+
+    @property
+    def hgvs_c(self):
+        return list(self._hgvs[0])
+
+    @property
+    def hgvs_g(self):
+        return list(self._hgvs[1])
+
+    @property
+    def hgvs_n(self):
+        return list(self._hgvs[2])
+
+    @property
+    def hgvs_p(self):
+        return list(self._hgvs[3])
+
+    @property
+    def seqvar(self):
+        return VariantLVG.parse(self.hgvs_text)
+
+    @property
+    def variants(self):
+        """ Rebuilds the VariantLVG-style {seqtype: {hgvs_text: seqvar}} dictionary (parses every string). """
+        return dict((seqtype, dict((hgvs_text, VariantLVG.parse(hgvs_text)) for hgvs_text in hgvs_texts))
+                    for seqtype, hgvs_texts in zip(SEQTYPES, self._hgvs))
+
+    @property
+    def seqvars(self):
+        out = []
+        for seqvar_dict in self.variants.values():
+            out.extend(seqvar_dict.values())
+        return out
+
+    def posedit_slang(self):
+        """ As VariantLVG.posedit_slang, but not kept between calls (posedit slang is still cached per posedit). """
+        return seqvars_posedit_slang(self.seqvars)
+
+    def to_dict(self, with_gene_name=True):
+        """ Returns the same structure as VariantLVG.to_dict (parsing every string). """
+        outd = {'variants': dict((seqtype, list(seqvar_dict.values())) for seqtype, seqvar_dict in self.variants.items()),
+                'transcripts': list(self.transcripts),
+                'seqvar': self.seqvar,
+                'hgvs_text': self.hgvs_text,
+               }
+        if with_gene_name:
+            outd['gene_name'] = self.gene_name
+        return outd
+
+    def _simple_dict(self):
+        return {'gene_name': self.gene_name,
+                'hgvs_c': self.hgvs_c,
+                'hgvs_g': self.hgvs_g,
+                'hgvs_n': self.hgvs_n,
+                'hgvs_p': self.hgvs_p,
+                'hgvs_text': self.hgvs_text,
+                'transcripts': list(self.transcripts),
+               }
+
+    def to_json(self):
+        """ Returns the same JSON as VariantLVG.to_json. """
+        return json.dumps(self._simple_dict())
+
+    @classmethod
+    def from_json(cls, json_str):
+        """ Builds a LiteLVG from JSON made by to_json (of either LiteLVG or VariantLVG), without any UTA lookups. """
+        return cls(**json.loads(json_str))
@@ -8,6 +8,8 @@ import xmltodict
 from lxml import etree
 from lxml.html import HTMLParser
 
+from .breaker import lovd_breaker
+from .config import REMOTE_TIMEOUT
 from .exceptions import LOVDRemoteError
 
 re_transcript = re.compile('\/variants\/\w+\/(?P<transcript>NM_\d+.\d+)\?')
@@ -195,6 +197,14 @@ def _parse_lovd_variants_by_gene_name_response(xml_blob):
     return out
 
 
+def _request_lovd(url):
+    """ GETs url from LOVD; raises on outages (connection errors, timeouts, HTTP 5xx), which lovd_breaker counts. """
+    response = requests.get(url, timeout=REMOTE_TIMEOUT)
+    if response.status_code >= 500:
+        raise LOVDRemoteError('lovd.nl returned HTTP %r' % response.status_code)
+    return response
+
+
 def _query_lovd_api_for_variants_by_gene_name(symbol, domain):
     """ Submits query to lovd.nl for specified gene name (Symbol), retrieving the API
     content for the given gene.
@@ -202,10 +212,11 @@ def _query_lovd_api_for_variants_by_gene_name(symbol, domain):
     :param symbol: (str)
     :param domain: (str) domain name of target LOVD database (default: databases.lovd.nl)
     :return: unparsed response content (str)
-    :raises: LOVDRemoteError if not response.ok (message contains response.status_code)
+    :raises: LOVDRemoteError if not response.ok (message contains response.status_code);
+             CircuitOpenError while LOVD is failing (see metavariant.breaker)
     """
 
-    response = requests.get(LOVD_API_GENE_VARIANTS_URL.format(symbol=symbol, domain=domain))
+    response = lovd_breaker.call(_request_lovd, LOVD_API_GENE_VARIANTS_URL.format(symbol=symbol, domain=domain))
     if response.ok:
         return response.content
     else:
@@ -219,9 +230,10 @@ def _load_lovd_variant_page_by_gene_name(symbol, domain):
     :param symbol: (str)
     :param domain: (str) domain name of target LOVD database (default: databases.lovd.nl)
     :return: unparsed response content (str)
-    :raises: LOVDRemoteError if not response.ok (message contains response.status_code)
+    :raises: LOVDRemoteError if not response.ok (message contains response.status_code);
+             CircuitOpenError while LOVD is failing (see metavariant.breaker)
     """
-    response = requests.get(LOVD_PAGE_GENE_VARIANTS_URL.format(symbol=symbol, domain=domain))
+    response = lovd_breaker.call(_request_lovd, LOVD_PAGE_GENE_VARIANTS_URL.format(symbol=symbol, domain=domain))
     if response.ok:
         return response.content
     else:
@@ -2,15 +2,27 @@ from __future__ import absolute_import, print_function, unicode_literals
 
 import re
 import json
+import asyncio
 import logging
+import threading
+import time
+from collections import namedtuple
+from contextlib import contextmanager
 
 import hgvs.parser
 import hgvs.assemblymapper 
 from hgvs.exceptions import HGVSDataNotAvailableError, HGVSParseError
 
-from .components import VariantComponents
+from .components import VariantComponents, seqvars_posedit_slang
+from .alignments import alignment_cache
+from .assembly import DEFAULT_ASSEMBLY
+from .breaker import is_backend_unavailable, uta_breaker
 from .config import get_uta_connection, PKGNAME
-from .exceptions import CriticalHgvsError, RejectedSeqVar
+from .exceptions import CircuitOpenError, CriticalHgvsError, RejectedSeqVar
+from .genenames import gene_name_cache
+from .normalize import canonical_key
+from .pool import HgvsWorker
+from .transcripts import get_transcript_policy, transcript_rank
 from .utils import strip_gene_name_from_hgvs_text
 
 log = logging.getLogger(PKGNAME)
@@ -20,10 +32,78 @@ uta = get_uta_connection()
 mapper = hgvs.assemblymapper.AssemblyMapper(uta)
 hgvs_parser = hgvs.parser.Parser()
 
+# used whenever no HgvsPool is supplied (one thread at a time).
+default_worker = HgvsWorker(uta, parser=hgvs_parser, mapper=mapper)
+_default_worker_lock = threading.RLock()
 
-def _seqvar_map_func(in_type, out_type):
+
+def reconnect_uta(hdp=None):
+    """ Replaces the module UTA connection, mapper and default_worker with new ones.
+
+    Call this first thing in a process forked after this module was imported (e.g. as a
+    multiprocessing.Pool initializer), so that parent and child do not share one database socket.
+
+    :param hdp: data provider to use [default: a new connection from get_uta_connection()]
+    """
+    global uta, mapper, default_worker
+    uta = hdp if hdp is not None else get_uta_connection()
+    mapper = hgvs.assemblymapper.AssemblyMapper(uta)
+    default_worker = HgvsWorker(uta, parser=hgvs_parser, mapper=mapper)
+
+# new_type of a MappingTask that looks up the transcripts of a 'g' variant instead of mapping it.
+TRANSCRIPTS = 'transcripts'
+
+# one unit of work in a VariantLVG mapping stage (see VariantLVG._stages).
+MappingTask = namedtuple('MappingTask', ['seqvar', 'base_type', 'new_type', 'transcript'])
+
+# variant seqtypes, in the order VariantLVG pickles them (see VariantLVG.__reduce__).
+SEQTYPES = ('c', 'g', 'n', 'p')
+
+# events from VariantLVG.stream and VariantLVG.astream: one per variant found, then a summary.
+LVGEvent = namedtuple('LVGEvent', ['seqtype', 'hgvs_text', 'seqvar'])
+LVGSummary = namedtuple('LVGSummary', ['transcripts', 'gene_name', 'lvg'])
+
+
+@contextmanager
+def lease_worker(pool=None):
+    """ Context manager yielding an HgvsWorker from pool, or the module's default_worker if pool is None
+    (in which case other threads wait until it is returned).
+    """
+    if pool is None:
+        with _default_worker_lock:
+            yield default_worker
+    else:
+        with pool.worker() as worker:
+            yield worker
+
+
+def prefetch_genes(gene_names, pool=None, assembly=DEFAULT_ASSEMBLY):
+    """ Loads the transcript alignments of every transcript in gene_names into the shared
+    alignment cache (e.g. at startup), so that mapping variants in those genes needs no UTA
+    queries for alignments.
+
+    :param gene_names: iterable of HGNC gene symbols
+    :param pool: HgvsPool whose connection to use [default: module UTA connection]
+    :param assembly: (str) assembly name [default: GRCh38]
+    :return: (int) number of alignments loaded
+    """
+    with lease_worker(pool) as worker:
+        return alignment_cache.prefetch_genes(worker.hdp, gene_names, assembly_name=assembly)
+
+
+def posedit_slang_many(lvgs):
+    """ Returns lex.posedit_slang() for each of many VariantLVGs (or LiteLVGs), in order. Variants shared
+    between them have their slang computed only once (see metavariant.components.seqvar_posedit_slang).
+
+    :param lvgs: iterable of VariantLVG or LiteLVG
+    :return: list of dicts {posedit: tuple of slang}
+    """
+    return [lex.posedit_slang() for lex in lvgs]
+
+
+def _seqvar_map_func(in_type, out_type, mapper=None):
     func_name = '%s_to_%s' % (in_type, out_type)
-    return getattr(mapper, func_name)
+    return getattr(mapper or default_worker.mapper, func_name)
 
 
 def seqvar_length(seqvar):
@@ -31,30 +111,26 @@ def seqvar_length(seqvar):
     return len(comp.posedit)
 
 
-def variant_to_gene_name(seqvar):
+def variant_to_gene_name(seqvar, hdp=None):
     """
     Get HUGO Gene Name (Symbol) for given sequence variant object.
 
     Input seqvar must be of type 'n', 'c', or 'p'.
 
+    Names come from the shared gene_name_cache (see metavariant.genenames), which is loaded
+    from UTA in bulk on first use.
+
     :param variant: hgvs.SequenceVariant
+    :param hdp: hgvs data provider to query [default: module UTA connection]
     :return: string gene name (or None if not available).
     """
     if seqvar.type in ['n', 'c', 'p']:
-        try:
-            tx_identity = uta.get_tx_identity_info(seqvar.ac)
-        except HGVSDataNotAvailableError:
-            return None
-
-        if tx_identity is not None:
-            return tx_identity[-1]
-        else:
-            return None
+        return gene_name_cache.get(seqvar.ac, hdp or default_worker.hdp)
     else:
         return None
 
 
-def _seqvar_to_seqvar(seqvar, base_type, new_type, transcript=None, maxlen=None):
+def _seqvar_to_seqvar(seqvar, base_type, new_type, transcript=None, maxlen=None, mapper=None):
     """ Using UTA, translate the input seqvar (SequenceVariant object) into 
     the desired new_type of sequence variant.  If the base_type is 'g', a transcript
     label will be required.
@@ -67,7 +143,9 @@ def _seqvar_to_seqvar(seqvar, base_type, new_type, transcript=None, maxlen=None)
     :param new_type: (str) single-letter abbrev for variant type to map TO
     :param transcript: (str) [default: None]
     :param maxlen: (int) max length of resultant str(SequenceVariant) to allow
+    :param mapper: AssemblyMapper to use [default: module mapper]
     :return: SequenceVariant or None
+    :raises: CircuitOpenError, or the connection error, if UTA is unavailable (see metavariant.breaker)
     """
 
     if base_type == new_type:
@@ -79,17 +157,20 @@ def _seqvar_to_seqvar(seqvar, base_type, new_type, transcript=None, maxlen=None)
     if new_type == 'p' and base_type == 'g':
         return None
 
-    map_seqvar = _seqvar_map_func(base_type, new_type)
+    map_seqvar = _seqvar_map_func(base_type, new_type, mapper)
 
     result_seqvar = None
 
     try:
         if base_type == 'g':
             if transcript:
-                result_seqvar = map_seqvar(seqvar, transcript)
+                result_seqvar = uta_breaker.call(map_seqvar, seqvar, transcript)
             else:
                 return None
-        result_seqvar = map_seqvar(seqvar)
+        else:
+            result_seqvar = uta_breaker.call(map_seqvar, seqvar)
+    except CircuitOpenError:
+        raise
     except NotImplementedError:
         log.debug('Cannot map %s to %s: hgvs raised NotImplementedError', seqvar, new_type)
         return None
@@ -97,6 +178,9 @@ def _seqvar_to_seqvar(seqvar, base_type, new_type, transcript=None, maxlen=None)
         log.debug('Cannot map %s to %s: hgvs raised HGVSDataNotAvailableError (%r)', seqvar, new_type, error)
         return None
     except Exception as error:
+        # a dead backend is not the same as "no mapping": let the caller know.
+        if uta_breaker.is_failure(error):
+            raise
         # catch the general case to be robust around the hgvs library's occasional volatility.
         log.debug('Cannot map %s to %s: unexpected Exception (%r)', seqvar, new_type, error)
         return None
@@ -140,15 +224,95 @@ class VariantLVG(object):
             gene_name: accepts any string as gene name (should be HGNC standardized)
             transcripts (list): list of strings describing valid alternative transcripts for seqvar
             seqvar_max_len (int): restrict posedit lengths to this number of characters (or fewer).    
+            pool (HgvsPool): take parser, mapper and UTA connection from this pool (for multi-threaded use).
+            transcript_policy: name or callable choosing which found transcripts a 'g' is mapped onto
+                               (see metavariant.transcripts) [default: 'all']
+            deadline (float): time budget in seconds; mapping stops when it runs out, leaving a partial LVG
+            assembly (str): genome assembly to map with, e.g. 'GRCh37' [default: None, i.e. detected
+                            from genomic accessions, otherwise GRCh38]
+            normalize (bool): keep only one of each group of equivalent variants, e.g. "del" and "delCTGG",
+                              or 5' and 3' shifted forms (see metavariant.normalize) [default: False]
+            targets (iterable): seqtypes to map to, e.g. ['p']; only the mapping steps they need are run,
+                                and the others are run when another seqtype is asked for (see expand)
+                                [default: None, i.e. all of c, g, n and p]
         """
 
-        self.hgvs_text = strip_gene_name_from_hgvs_text('%s' % hgvs_text_or_seqvar)
-        self.seqvar = self.parse(hgvs_text_or_seqvar)
+        # an HgvsPool makes LVG construction safe to run from many threads at once.
+        self._pool = kwargs.get('pool', None)
+        self._start_deadline(kwargs.get('deadline', None))
 
-        self._gene_name = kwargs.get('gene_name', None)
+        with lease_worker(self._pool) as worker:
+            self._setup(hgvs_text_or_seqvar, worker, **kwargs)
+            self._expand(worker)
 
-        seqvar_max_len = kwargs.get('seqvar_max_len', None)
+    def __reduce__(self):
+        """ Pickles this object as a compact tuple of strings rather than its SequenceVariant objects,
+        which are parsed again only when first used after unpickling. Pickling never maps anything:
+        seqtypes left out by targets= stay unmapped (see unmapped_seqtypes).
 
+        The pool, deadline and transcript policy are not pickled. An unpickled VariantLVG does not map
+        on its own when an unmapped seqtype is asked for; expand(pool=...) maps the rest, and runs again
+        what a deadline or an unavailable UTA left undone.
+        """
+        state = (self.hgvs_text, self._gene_name, tuple(sorted(self.transcripts)),
+                 tuple(tuple(self._hgvs(seqtype)) for seqtype in SEQTYPES),
+                 self.assembly, self.partial, self.skipped, self.stats, self.degraded,
+                 tuple(sorted(self._targets)))
+        return (_restore_lvg, (type(self), state))
+
+    def __getattr__(self, name):
+        # only called for missing attributes: seqvar and variants of an unpickled VariantLVG.
+        if name in ('seqvar', 'variants') and '_hgvs_texts' in self.__dict__:
+            self._parse_variants()
+            return self.__dict__[name]
+        raise AttributeError("'%s' object has no attribute '%s'" % (type(self).__name__, name))
+
+    def _parse_variants(self):
+        """ Rebuilds seqvar and variants of an unpickled VariantLVG from its HGVS strings. """
+        hgvs_texts = self.__dict__['_hgvs_texts']
+        seqvar = self.parse(self.hgvs_text)
+        variants = dict((seqtype, dict((hgvs_text, self.parse(hgvs_text)) for hgvs_text in hgvs_texts[seqtype]))
+                        for seqtype in SEQTYPES)
+        if seqvar is not None and str(seqvar) in variants.get(seqvar.type, {}):
+            variants[seqvar.type][str(seqvar)] = seqvar
+        self.__dict__.update(seqvar=seqvar, variants=variants)
+        self.__dict__.pop('_hgvs_texts', None)
+
+    def _hgvs(self, seqtype):
+        hgvs_texts = self.__dict__.get('_hgvs_texts')
+        if hgvs_texts is not None:
+            return list(hgvs_texts[seqtype])
+        return list(self.variants[seqtype].keys())
+
+    def _setup(self, hgvs_text_or_seqvar, worker, **kwargs):
+        """ Parses input and enrichment variants into self.variants (no UTA mapping). """
+        self.hgvs_text = strip_gene_name_from_hgvs_text('%s' % hgvs_text_or_seqvar)
+        self.seqvar = self.parse(hgvs_text_or_seqvar, parser=worker.parser)
+
+        self._gene_name = kwargs.get('gene_name', None)
+        self._seqvar_max_len = kwargs.get('seqvar_max_len', None)
+        self.assembly = kwargs.get('assembly', None)
+        self._transcript_policy = get_transcript_policy(kwargs.get('transcript_policy', None))
+        self.stats = {'mapping_calls_skipped': 0}
+
+        # set when a deadline cut mapping short (see _skip).
+        self.partial = False
+        self.skipped = {'stages': [], 'transcripts': []}
+
+        # set when mapping calls failed because UTA was unavailable (see _degrade); worth retrying later.
+        self.degraded = False
+
+        # seqtypes mapped to so far, and the (seqvar, base_type, new_type, transcript) of tasks that have
+        # run to completion (not those skipped by a deadline or failed for want of UTA; see _attempted).
+        self._targets = self._check_targets(kwargs.get('targets', None))
+        self._tasks_done = set()
+        self._expand_on_demand = True
+
+        # with normalize, canonical key -> kept hgvs_text per seqtype, and dropped -> kept hgvs_text
+        # (see _add_canonical).
+        self._canonical = None
+        self._duplicates = {}
+        self._keys = {}
 
         if self.seqvar is None:
             raise CriticalHgvsError('Cannot create SequenceVariant from input %s (see hgvs_lexicon log)' % hgvs_text_or_seqvar)
@@ -160,68 +324,447 @@ class VariantLVG(object):
         self.variants = {'g': dict(), 'c': dict(), 'n': dict(), 'p': dict()}
 
         # collect any variants that were supplied at instantiation ("enrichment")
-        for input_hgvs_c in kwargs.get('hgvs_c', []):
-            self.variants['c'][str(input_hgvs_c)] = Variant(input_hgvs_c)
-
-        for input_hgvs_g in kwargs.get('hgvs_g', []):
-            self.variants['g'][str(input_hgvs_g)] = Variant(input_hgvs_g)
-
-        for input_hgvs_n in kwargs.get('hgvs_n', []):
-            self.variants['n'][str(input_hgvs_n)] = Variant(input_hgvs_n)
-
-        for input_hgvs_p in kwargs.get('hgvs_p', []):
-            self.variants['p'][str(input_hgvs_p)] = Variant(input_hgvs_p)
+        for seqtype in ('c', 'g', 'n', 'p'):
+            for input_hgvs in kwargs.get('hgvs_%s' % seqtype, []):
+                self.variants[seqtype][str(input_hgvs)] = self.parse(input_hgvs, parser=worker.parser)
 
         try:
             self.variants[self.seqvar.type][str(self.seqvar)] = self.seqvar
         except KeyError:
             log.warn('Ignoring supplied SequenceVariant of type "%s" (not supported) -- (input was %s).' % (self.seqvar.type, self.seqvar))
 
-        if self.variants['c']:
-            # attempt to derive all 4 types of SequenceVariants from all available 'c'.
-            for var_c in list(self.variants['c'].values()):
-                for this_type, value in list(self.variants.items()):
-                    new_seqvar = _seqvar_to_seqvar(var_c, 'c', this_type, maxlen=seqvar_max_len)
-                    if new_seqvar:
-                        self.variants[this_type][str(new_seqvar)] = new_seqvar
+        if kwargs.get('normalize', False):
+            self._collapse_duplicates(worker)
+
+        # the 'c' that the first stage maps from, however many more later stages find (see _stages).
+        self._supplied_c = list(self.variants['c'].values())
 
-        # Now that we have a 'g', collect all available transcripts.
-        if self.variants['g']:
+    def _collapse_duplicates(self, worker):
+        """ Keeps one of each group of equivalent input and enrichment variants (the input seqvar, if
+        it is one of them), and has results added from now on checked the same way (see _add_canonical).
+        """
+        self.stats['normalized_duplicates'] = 0
+        self._canonical = dict((seqtype, {}) for seqtype in self.variants)
+        supplied = self.variants
+        self.variants = dict((seqtype, {}) for seqtype in supplied)
+
+        ordered = [(self.seqvar.type, str(self.seqvar), self.seqvar)] if self.seqvar.type in supplied else []
+        for seqtype, seqvar_dict in supplied.items():
+            ordered.extend((seqtype, hgvs_text, seqvar) for hgvs_text, seqvar in seqvar_dict.items())
+        for seqtype, hgvs_text, seqvar in ordered:
+            if seqvar is None:
+                # unparseable enrichment string: nothing to compare it by, so keep it as supplied.
+                self.variants[seqtype][hgvs_text] = None
+                continue
+            self._keys[str(seqvar)] = canonical_key(seqvar, worker.normalizer)
+            self._add_result(seqvar)
+
+    def _stages(self):
+        """ Generator of the mapping stages that fill in all related variants and transcripts.
+
+        Each stage yields (stage_name, tasks), where tasks is a list of MappingTasks that do not depend
+        on one another, and expects to be sent back the list of their results (in the same order).
+        Drivers (_expand, and create for asyncio) decide how the tasks of a stage are run.
+        """
+        # Stages and the tasks within them are ordered most valuable first, so that a deadline
+        # cuts off the least useful work. Only the tasks needed for self._targets are run, and none
+        # that an earlier expansion completed or an earlier stage of this one tried (see _undone).
+        targets = self._targets
+        tried = set()
+
+        # the transcript fan-out is needed for c and n, and for p when there is no 'c' to start from.
+        fan_out = bool(targets & set(['c', 'n'])) or ('p' in targets and not self._supplied_c)
+
+        # attempt to derive all other types of SequenceVariants from all supplied 'c'.
+        from_c_types = [new_type for new_type in ('g', 'p', 'n') if new_type in targets or (new_type == 'g' and fan_out)]
+        tasks = self._undone([MappingTask(var_c, 'c', new_type, None)
+                              for var_c in self._supplied_c for new_type in from_c_types], tried)
+        results = yield 'from_c', tasks
+        self._add_results(results)
+
+        if not fan_out:
+            return
+
+        # Now that we have a 'g', collect all available transcripts (subject to transcript_policy).
+        tasks = self._undone([MappingTask(var_g, 'g', TRANSCRIPTS, None) for var_g in list(self.variants['g'].values())], tried)
+        if tasks:
+            results = yield TRANSCRIPTS, tasks
+
+            found = []
+            for transcripts in results:
+                for trans in transcripts:
+                    if trans not in found and trans not in self.transcripts:
+                        found.append(trans)
+
+            selected = self._transcript_policy(found)
+            self.transcripts.update(selected)
+
+            skipped = [trans for trans in found if trans not in self.transcripts]
+            if skipped:
+                calls_per_var_g = sum(1 if trans.startswith('NR') else 2 for trans in skipped)
+                self.stats['mapping_calls_skipped'] += calls_per_var_g * len(self.variants['g'])
+                log.debug('Transcript policy skipped %i of %i transcripts for %s', len(skipped), len(found), self.hgvs_text)
+
+        # With a list of transcripts, we can do g_to_c and g_to_n (this includes an input 'g').
+        tasks = []
+        for trans in sorted(self.transcripts, key=transcript_rank):
             for var_g in list(self.variants['g'].values()):
-                for trans in self.get_transcripts(var_g):
-                    self.transcripts.add(trans)
-
-        # In the case of starting with a 'g' type...
-        if self.seqvar.type == 'g' and self.transcripts:
-            # we still need to collect 'c' and 'n' variants
-            for trans in self.transcripts:
-                var_c = _seqvar_to_seqvar(self.seqvar, 'g', 'c', trans, maxlen=seqvar_max_len)
-                if var_c:
-                    self.variants['c'][str(var_c)] = var_c
-                var_n = _seqvar_to_seqvar(self.seqvar, 'g', 'n', trans, maxlen=seqvar_max_len)
-                if var_n:
-                    self.variants['n'][str(var_n)] = var_n
-
-        # With a list of transcripts, we can do g_to_c and g_to_n
-        if self.transcripts:
-            for trans in self.transcripts:
-                for var_g in list(self.variants['g'].values()):
-                    # Find all available 'c'
-                    if not trans.startswith('NR'):
-                        var_c = _seqvar_to_seqvar(var_g, 'g', 'c', trans, maxlen=seqvar_max_len)
-                        if var_c:
-                            self.variants['c'][str(var_c)] = var_c
-
-                    # Find all available 'n'
-                    var_n = _seqvar_to_seqvar(var_g, 'g', 'n', trans, maxlen=seqvar_max_len)
-                    if var_n:
-                        self.variants['n'][str(var_n)] = var_n
+                # Find all available 'c' (not for non-coding transcripts), also needed for 'p'
+                if not trans.startswith('NR') and targets & set(['c', 'p']):
+                    tasks.append(MappingTask(var_g, 'g', 'c', trans))
+                # Find all available 'n'
+                if 'n' in targets:
+                    tasks.append(MappingTask(var_g, 'g', 'n', trans))
+        results = yield 'fan_out', self._undone(tasks, tried)
+        self._add_results(results)
 
         # map all newly found 'c' to 'p'
-        for var_c in list(self.variants['c'].values()):
-            new_seqvar = _seqvar_to_seqvar(var_c, 'c', 'p', maxlen=seqvar_max_len)
-            if new_seqvar:
-                self.variants['p'][str(new_seqvar)] = new_seqvar
+        if 'p' in targets:
+            tasks = self._undone([MappingTask(var_c, 'c', 'p', None) for var_c in list(self.variants['c'].values())], tried)
+            results = yield 'to_p', tasks
+            self._add_results(results)
+
+    @staticmethod
+    def _check_targets(targets):
+        if targets is None:
+            return set(SEQTYPES)
+        targets = set(targets)
+        if not targets or not targets.issubset(SEQTYPES):
+            raise ValueError('targets must be seqtypes from %s (got %r)' % (', '.join(SEQTYPES), sorted(targets)))
+        return targets
+
+    @staticmethod
+    def _task_key(task):
+        return (str(task.seqvar), task.base_type, task.new_type, task.transcript)
+
+    def _undone(self, tasks, tried):
+        """ Returns the tasks that neither an earlier expansion of this LVG has completed nor this one
+        has tried yet, adding them to tried.
+        """
+        out = []
+        for task in tasks:
+            key = self._task_key(task)
+            if key not in self._tasks_done and key not in tried:
+                tried.add(key)
+                out.append(task)
+        return out
+
+    def expand(self, targets=None, pool=None):
+        """ Runs the mapping steps still needed to fill in targets, for an LVG made with targets=.
+        Called by hgvs_c/g/n/p, seqvars and to_dict when they are asked for a seqtype not yet mapped to
+        (except on an unpickled LVG, which maps only when expand is called).
+
+        Mapping calls that a deadline skipped, or that failed because UTA was unavailable, are tried
+        again, so expand() also completes a `partial` or `degraded` LVG (if time and UTA allow).
+        A deadline given at instantiation applies afresh to each expansion.
+
+        :param targets: iterable of seqtypes [default: None, i.e. all]
+        :param pool: HgvsPool to map with from now on, e.g. for an unpickled LVG, which has none
+                     [default: the LVG's own, or the module UTA connection]
+        :return: self
+        """
+        if pool is not None:
+            self._pool = pool
+        targets = self._targets | self._check_targets(targets)
+        if targets == self._targets and not (self.partial or self.degraded):
+            return self
+        if self._supplied_c is None:
+            # unpickled: start again from every 'c' kept (see _restore_lvg).
+            self._supplied_c = list(self.variants['c'].values())
+        self._targets = targets
+        self.partial = self.degraded = False
+        self.skipped = {'stages': [], 'transcripts': []}
+        self._start_deadline(self._deadline_seconds)
+        with lease_worker(self._pool) as worker:
+            self._expand(worker)
+        return self
+
+    def _ensure(self, *seqtypes):
+        # nothing is mapped on demand before _setup (e.g. NCBIEnrichedLVG reading its own report)
+        # nor by an unpickled LVG, which maps only when expand is called (see __reduce__).
+        if self.__dict__.get('_expand_on_demand') and not self._targets.issuperset(seqtypes):
+            self.expand(seqtypes)
+
+    @property
+    def unmapped_seqtypes(self):
+        """ Returns the seqtypes (of c, g, n, p) not mapped to yet: those left out by targets= and not
+        asked for since. Only an unpickled LVG keeps them unmapped when they are asked for.
+        """
+        return [seqtype for seqtype in SEQTYPES if seqtype not in self._targets]
+
+    def _add_results(self, results):
+        for new_seqvar in results:
+            self._add_result(new_seqvar)
+
+    def _add_result(self, new_seqvar):
+        """ Adds a mapped SequenceVariant to self.variants; returns True if it was not already there. """
+        if not new_seqvar or str(new_seqvar) in self.variants[new_seqvar.type]:
+            return False
+        if self._canonical is not None and not self._add_canonical(new_seqvar):
+            return False
+        self.variants[new_seqvar.type][str(new_seqvar)] = new_seqvar
+        self.__dict__.pop('_posedit_slang', None)
+        return True
+
+    def _add_canonical(self, seqvar):
+        """ Records the canonical key of seqvar (computed by _run_task, with a worker's normalizer);
+        returns False, counting a duplicate, if an equivalent variant is already kept.
+        """
+        hgvs_text = str(seqvar)
+        if hgvs_text in self._duplicates:
+            return False
+        key = self._keys.pop(hgvs_text, None) or canonical_key(seqvar)
+        kept = self._canonical[seqvar.type]
+        if key in kept:
+            self._duplicates[hgvs_text] = kept[key]
+            self.stats['normalized_duplicates'] += 1
+            log.debug('%s: %s is the same variant as %s', self.hgvs_text, seqvar, kept[key])
+            return False
+        kept[key] = hgvs_text
+        return True
+
+    def _initial_events(self):
+        for seqtype, seqvar_dict in list(self.variants.items()):
+            for hgvs_text, seqvar in list(seqvar_dict.items()):
+                yield LVGEvent(seqtype, hgvs_text, seqvar)
+
+    def _run_task(self, task, worker):
+        """ Runs one MappingTask with worker's mappers (raising if UTA is unavailable; see _attempted).
+
+        c variants are mapped on the requested assembly; g variants on the assembly of their accession.
+        """
+        if task.base_type == 'g':
+            mapper = worker.mappers.for_variant(task.seqvar, self.assembly)
+        else:
+            mapper = worker.mappers.get(self.assembly)
+
+        if task.new_type == TRANSCRIPTS:
+            return self.get_transcripts(task.seqvar, mapper=mapper)
+        result = _seqvar_to_seqvar(task.seqvar, task.base_type, task.new_type, task.transcript,
+                                   maxlen=self._seqvar_max_len, mapper=mapper)
+        if self._canonical is not None and result is not None:
+            # normalize here, in the worker's thread; _add_result compares keys wherever it runs.
+            self._keys[str(result)] = canonical_key(result, worker.normalizer)
+        return result
+
+    def _run_leased_task(self, task):
+        with lease_worker(self._pool) as worker:
+            return self._run_task(task, worker)
+
+    def _attempted(self, task, run):
+        """ Returns the result of run() for task, marking the task done; or, if run() failed because UTA
+        was unavailable, the empty result of _degrade (leaving the task to be tried again by expand).
+        """
+        try:
+            result = run()
+        except Exception as error:
+            if not is_backend_unavailable(error):
+                raise
+            return self._degrade(task, error)
+        self._tasks_done.add(self._task_key(task))
+        return result
+
+    def _start_deadline(self, deadline=None):
+        self._deadline_seconds = deadline
+        self._deadline = time.time() + deadline if deadline is not None else None
+
+    def _expired(self):
+        return self._deadline is not None and time.time() >= self._deadline
+
+    def _remaining(self):
+        """ Returns the seconds left before the deadline (None if there is none). """
+        if self._deadline is None:
+            return None
+        return max(self._deadline - time.time(), 0)
+
+    def _skip(self, stage, task):
+        """ Records a task left undone because the deadline passed, and returns its empty result. """
+        self.partial = True
+        if stage not in self.skipped['stages']:
+            self.skipped['stages'].append(stage)
+        if task.transcript and task.transcript not in self.skipped['transcripts']:
+            self.skipped['transcripts'].append(task.transcript)
+        return [] if task.new_type == TRANSCRIPTS else None
+
+    def _degrade(self, task, error):
+        """ Records a task that failed because UTA was unavailable, and returns its empty result. """
+        self.degraded = True
+        self.stats['backend_unavailable'] = self.stats.get('backend_unavailable', 0) + 1
+        log.debug('%s: UTA unavailable for %s -> %s (%r)', self.hgvs_text, task.seqvar, task.new_type, error)
+        return [] if task.new_type == TRANSCRIPTS else None
+
+    def _leased_setup(self, hgvs_text_or_seqvar, kwargs):
+        with lease_worker(self._pool) as worker:
+            self._setup(hgvs_text_or_seqvar, worker, **kwargs)
+
+    def _iter_expand(self, run_task):
+        """ Runs all mapping stages, one task at a time, until done or out of time, yielding an LVGEvent
+        for each new variant as soon as it is found. A call already running when the deadline passes
+        is waited for.
+
+        :param run_task: function running a MappingTask and returning its result
+        """
+        stages = self._stages()
+        results = None
+        while True:
+            try:
+                stage, tasks = stages.send(results)
+            except StopIteration:
+                return
+            results = []
+            for task in tasks:
+                if self._expired():
+                    result = self._skip(stage, task)
+                else:
+                    result = self._attempted(task, lambda: run_task(task))
+                results.append(result)
+                if task.new_type != TRANSCRIPTS and self._add_result(result):
+                    yield LVGEvent(result.type, str(result), result)
+
+    def _expand(self, worker):
+        """ Runs all mapping stages in this thread with worker. """
+        for _ in self._iter_expand(lambda task: self._run_task(task, worker)):
+            pass
+
+    async def _aiter_expand(self, executor=None, concurrency=None):
+        """ Async equivalent of _iter_expand: runs the tasks of each stage concurrently in executor
+        threads (up to `concurrency` at once), yielding LVGEvents in the order variants are found.
+
+        When the deadline passes, calls still running are no longer waited for: their results are
+        dropped, and they are recorded as skipped (their threads finish in the background).
+        """
+        loop = asyncio.get_running_loop()
+        if self._pool is None:
+            concurrency = 1
+        semaphore = asyncio.Semaphore(concurrency or self._pool.size)
+
+        async def run_task(stage, task):
+            async with semaphore:
+                if self._expired():
+                    return self._skip(stage, task)
+                try:
+                    result = await loop.run_in_executor(executor, self._run_leased_task, task)
+                except Exception as error:
+                    if not is_backend_unavailable(error):
+                        raise
+                    return self._degrade(task, error)
+                self._tasks_done.add(self._task_key(task))
+                return result
+
+        stages = self._stages()
+        results = None
+        while True:
+            try:
+                stage, tasks = stages.send(results)
+            except StopIteration:
+                return
+            futures = [asyncio.ensure_future(run_task(stage, task)) for task in tasks]
+            finished = {}
+            try:
+                pending = set(futures)
+                while pending:
+                    done, pending = await asyncio.wait(pending, timeout=self._remaining(),
+                                                       return_when=asyncio.FIRST_COMPLETED)
+                    if not done:
+                        # out of time, with calls still running or queued.
+                        break
+                    for future, task in zip(futures, tasks):
+                        if future in done:
+                            result = finished[future] = future.result()
+                            if task.new_type != TRANSCRIPTS and self._add_result(result):
+                                yield LVGEvent(result.type, str(result), result)
+            finally:
+                # on error, cancellation or deadline, don't leave calls queued behind the semaphore.
+                for future in futures:
+                    future.cancel()
+            results = [finished[future] if future in finished else self._skip(stage, task)
+                       for future, task in zip(futures, tasks)]
+
+    @classmethod
+    def _prepare(cls, kwargs):
+        self = cls.__new__(cls)
+        self._pool = kwargs.get('pool', None)
+        self._start_deadline(kwargs.get('deadline', None))
+        return self
+
+    @classmethod
+    async def create(cls, hgvs_text_or_seqvar, executor=None, concurrency=None, **kwargs):
+        """ Awaitable equivalent of VariantLVG(hgvs_text_or_seqvar, **kwargs) for asyncio code.
+
+        Blocking work (parsing and UTA mapping) runs in executor threads, so the event loop is never
+        blocked. Within each mapping stage, up to `concurrency` mapping calls run at once; each leases
+        its own worker from the pool. Without a pool, the module's single (non-thread-safe) worker is
+        used, so calls run one at a time (but still off the event loop).
+
+        Cancelling the awaiting task cancels all mapping calls not yet started. A `deadline` keyword
+        works as for VariantLVG(): calls not started when it passes are skipped.
+
+        Example:
+
+            pool = HgvsPool(size=16)
+            lex = await VariantLVG.create('NM_198056.2:c.4786T>A', pool=pool, concurrency=8)
+
+        :param hgvs_text_or_seqvar: string or SequenceVariant object
+        :param executor: concurrent.futures.Executor to run blocking calls in [default: the loop's default]
+        :param concurrency: (int) max mapping calls in flight for this LVG [default: pool size, or 1 without a pool]
+        :param kwargs: as for VariantLVG()
+        :return: VariantLVG
+        """
+        self = cls._prepare(kwargs)
+        await asyncio.get_running_loop().run_in_executor(executor, self._leased_setup, hgvs_text_or_seqvar, kwargs)
+        async for _ in self._aiter_expand(executor, concurrency):
+            pass
+        return self
+
+    @classmethod
+    def stream(cls, hgvs_text_or_seqvar, **kwargs):
+        """ Generator version of VariantLVG(hgvs_text_or_seqvar, **kwargs): yields an LVGEvent
+        (seqtype, hgvs_text, seqvar) for the input and enrichment variants, then for each new variant
+        as soon as it is found, and finally an LVGSummary (transcripts, gene_name, lvg).
+
+        Example:
+
+            for event in VariantLVG.stream('NM_198056.2:c.4786T>A'):
+                if isinstance(event, LVGSummary):
+                    print(event.gene_name)
+                else:
+                    search(event.hgvs_text)
+
+        :param hgvs_text_or_seqvar: string or SequenceVariant object
+        :param kwargs: as for VariantLVG()
+        """
+        self = cls._prepare(kwargs)
+        self._leased_setup(hgvs_text_or_seqvar, kwargs)
+        for event in self._initial_events():
+            yield event
+        # a worker is leased per mapping call, so none is held while the consumer works.
+        for event in self._iter_expand(self._run_leased_task):
+            yield event
+        yield LVGSummary(sorted(self.transcripts), self.gene_name, self)
+
+    @classmethod
+    async def astream(cls, hgvs_text_or_seqvar, executor=None, concurrency=None, **kwargs):
+        """ Async generator version of stream(), running mapping calls as create() does.
+
+        Example:
+
+            async for event in VariantLVG.astream(hgvs_text, pool=pool, concurrency=8):
+                ...
+
+        :param hgvs_text_or_seqvar: string or SequenceVariant object
+        :param executor: see create
+        :param concurrency: see create
+        :param kwargs: as for VariantLVG()
+        """
+        loop = asyncio.get_running_loop()
+        self = cls._prepare(kwargs)
+        await loop.run_in_executor(executor, self._leased_setup, hgvs_text_or_seqvar, kwargs)
+        for event in self._initial_events():
+            yield event
+        async for event in self._aiter_expand(executor, concurrency):
+            yield event
+        gene_name = await loop.run_in_executor(executor, lambda: self.gene_name)
+        yield LVGSummary(sorted(self.transcripts), gene_name, self)
 
     @property
     def gene_name(self):
@@ -234,32 +777,36 @@ class VariantLVG(object):
             
             # try each seqvar; take the first gene name that appears, and stop there.
             for seqvar in seqvars:
-                name = variant_to_gene_name(seqvar)
+                name = variant_to_gene_name(seqvar, hdp=self._pool.hdp if self._pool else None)
                 if name:
                     self._gene_name = name
                     break
         return self._gene_name
 
     @staticmethod
-    def get_transcripts(var_g):
+    def get_transcripts(var_g, mapper=None, assembly=None):
         """Supply a Genomic variant (var_g) to find its related transcripts.
         
-        Be Aware: this uses Assembly GRCh38.
+        Unless a mapper or assembly is given, the assembly is chosen from var_g's accession
+        (e.g. NC_000019.9 is GRCh37), falling back to GRCh38.
 
-        :param var_g: (str)
+        :param var_g: (SequenceVariant)
+        :param mapper: AssemblyMapper to use [default: chosen by assembly]
+        :param assembly: (str) assembly name, e.g. 'GRCh37' [default: None]
         :returns: list of transcripts associated with this variant.
         """
-        #TODO: Allow passing 'assembly' as keyword to change assembly.
-        return mapper.relevant_transcripts(var_g)
+        mapper = mapper or default_worker.mappers.for_variant(var_g, assembly)
+        return uta_breaker.call(mapper.relevant_transcripts, var_g)
 
     @staticmethod
-    def parse(hgvs_text_or_seqvar):
+    def parse(hgvs_text_or_seqvar, parser=None):
         """ Parse input through hgvs_parser if text, do nothing if SequenceVariant.
         Return SequenceVariant object.
 
         Allow all potential hgvs parsing errors and type errors to flow upwards.
 
         :param hgvs_text_or_seqvar: string or SequenceVariant object
+        :param parser: hgvs Parser to use [default: module hgvs_parser]
         :return: SequenceVariant object
         """
         if type(hgvs_text_or_seqvar) == hgvs.sequencevariant.SequenceVariant:
@@ -268,7 +815,7 @@ class VariantLVG(object):
         hgvs_text = strip_gene_name_from_hgvs_text(hgvs_text_or_seqvar)
 
         try:
-            return hgvs_parser.parse_hgvs_variant(str(hgvs_text))
+            return (parser or hgvs_parser).parse_hgvs_variant(str(hgvs_text))
         except HGVSParseError as error:
             log.info('Cannot create SequenceVariant from hgvs_text "%s": %r', hgvs_text, error)
             # Examples:
@@ -279,36 +826,55 @@ class VariantLVG(object):
 
     @property
     def hgvs_c(self):
-        return list(self.variants['c'].keys())
+        self._ensure('c')
+        return self._hgvs('c')
 
     @property
     def hgvs_g(self):
-        return list(self.variants['g'].keys())
+        self._ensure('g')
+        return self._hgvs('g')
 
     @property
     def hgvs_p(self):
-        return list(self.variants['p'].keys())
+        self._ensure('p')
+        return self._hgvs('p')
 
     @property
     def hgvs_n(self):
-        return list(self.variants['n'].keys())
+        self._ensure('n')
+        return self._hgvs('n')
 
     @property
     def seqvars(self):
         """ returns a flat list of all SequenceVariant objects contained in
         the self.variants dictionary """
+        self._ensure(*SEQTYPES)
         out = []
         for seqvar_dict in (self.variants.values()):
             out = out + list(seqvar_dict.values())
         return out
 
+    def posedit_slang(self):
+        """ Returns {posedit: tuple of slang terms} for all variants of this LVG: each distinct posedit
+        once, with an empty tuple where its edit type has no slang (see VariantComponents.posedit_slang).
+        Computed on first call and kept until another variant is added.
+
+        :return: dict
+        """
+        slang = self.__dict__.get('_posedit_slang')
+        if slang is None:
+            slang = self._posedit_slang = seqvars_posedit_slang(self.seqvars)
+        return dict(slang)
+
     def to_dict(self, with_gene_name=True):
         """Returns contents of object as a 2-level dictionary.
 
         Supply with_gene_name = True [default: True] to return gene_name as well.
 
-        (gene_name is a lazy-loaded magic attribute, and may take a second or two).
+        (gene_name is a lazy-loaded magic attribute; the first lookup in a process loads the
+        gene name cache, which may take a few seconds).
         """
+        self._ensure(*SEQTYPES)
         outd = {'variants': {},
                 'transcripts': list(self.transcripts),
                 'seqvar': self.seqvar,
@@ -324,6 +890,11 @@ class VariantLVG(object):
 
         return outd
 
+    def to_lite(self, with_gene_name=True):
+        """ Returns a LiteLVG: this object's results as interned strings only (see metavariant.lite). """
+        from .lite import LiteLVG
+        return LiteLVG.from_lvg(self, with_gene_name=with_gene_name)
+
     def _simple_dict(self):
         return {'gene_name': self.gene_name,
                 'hgvs_c': self.hgvs_c,
@@ -371,6 +942,30 @@ class VariantLVG(object):
         return out
 
 
+def _restore_lvg(cls, state):
+    """ Unpickles a VariantLVG pickled by VariantLVG.__reduce__ (without parsing any variants). """
+    lex = cls.__new__(cls)
+    (lex.hgvs_text, lex._gene_name, transcripts, hgvs_texts,
+     lex.assembly, lex.partial, lex.skipped, lex.stats, lex.degraded) = state[:9]
+    lex.transcripts = set(transcripts)
+    lex._hgvs_texts = dict(zip(SEQTYPES, hgvs_texts))
+    lex._pool = None
+    lex._seqvar_max_len = None
+    lex._transcript_policy = get_transcript_policy(None)
+    lex._deadline = lex._deadline_seconds = None
+
+    # just enough to let expand() map the rest (tasks already run are not known, so any it needs
+    # are run again; results already kept are not added twice). Older pickles have no targets.
+    lex._targets = set(state[9] if len(state) > 9 else SEQTYPES)
+    lex._tasks_done = set()
+    lex._expand_on_demand = False
+    lex._supplied_c = None
+    lex._canonical = None
+    lex._duplicates = {}
+    lex._keys = {}
+    return lex
+
+
 ### API Convenience Functions
 
 Variant = VariantLVG.parse
@@ -0,0 +1,308 @@
+""" Provides LVGStore, a compact read-only binary file of LVG results, memory-mapped and indexed by input HGVS string.
+
+Build a store from VariantLVG.to_json() lines (plain, .gz or .bz2):
+
+    python -m metavariant.lvgstore build -o lvgs.store lvgs.jsonl.gz
+
+Look up synonyms:
+
+    store = LVGStore('lvgs.store')
+    store.synonyms('NM_000155.3:c.253C>T', 'p')      # ['NP_000146.2:p.(Arg85Cys)']
+    store.get('NM_000155.3:c.253C>T')                # LiteLVG
+
+File layout (all integers little-endian):
+
+    header      magic, version, record count, offsets of the string table and the index, index size
+    records     one per LVG: key, gene name id, transcript ids, then for each of c, g, n, p a list of
+                (accession id, rest of HGVS string after the colon); all counts and lengths are 32-bit
+    strings     dictionary of accessions and gene names: count, offsets, UTF-8 blob
+    index       open-addressing hash table of (64-bit key hash, record offset + 1) slots
+
+The file is only ever read through mmap, so any number of processes can share one copy in the page cache.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import mmap
+import struct
+
+from .config import PKGNAME
+from .lite import LiteLVG, SEQTYPES
+from .pipeline import open_dump
+
+log = logging.getLogger(PKGNAME)
+
+MAGIC = b'MVLVGST\x00'
+VERSION = 2
+
+_header = struct.Struct('<8sIQQQQ')     # magic, version, n_records, strings_offset, index_offset, index_slots
+_slot = struct.Struct('<QQ')            # key hash, record offset + 1 (0 = empty)
+_u32 = struct.Struct('<I')
+_u64 = struct.Struct('<Q')
+
+NO_STRING = 0xFFFFFFFF
+
+
+def key_hash(key):
+    """ Stable 64-bit hash of an HGVS string (the same in every process, unlike hash()). """
+    return _u64.unpack(hashlib.blake2b(key.encode('utf-8'), digest_size=8).digest())[0]
+
+
+def _split_hgvs(hgvs_text):
+    ac, sep, rest = hgvs_text.partition(':')
+    if not sep:
+        return '', hgvs_text
+    return ac, rest
+
+
+class _StringTable(object):
+
+    def __init__(self):
+        self.ids = {}
+        self.strings = []
+
+    def id(self, string):
+        if string is None:
+            return NO_STRING
+        idx = self.ids.get(string)
+        if idx is None:
+            idx = self.ids[string] = len(self.strings)
+            self.strings.append(string)
+        return idx
+
+    def write(self, fh):
+        blobs = [string.encode('utf-8') for string in self.strings]
+        fh.write(_u32.pack(len(blobs)))
+        offset = 0
+        for blob in blobs:
+            fh.write(_u64.pack(offset))
+            offset += len(blob)
+        fh.write(_u64.pack(offset))
+        for blob in blobs:
+            fh.write(blob)
+
+
+def _encode_record(lvgd, strings):
+    key = lvgd['hgvs_text'].encode('utf-8')
+    transcripts = sorted(lvgd.get('transcripts') or [])
+    parts = [_u32.pack(len(key)), key,
+             _u32.pack(strings.id(lvgd.get('gene_name'))),
+             _u32.pack(len(transcripts))]
+    parts.extend(_u32.pack(strings.id(trans)) for trans in transcripts)
+    for seqtype in SEQTYPES:
+        hgvs_texts = lvgd.get('hgvs_%s' % seqtype) or []
+        parts.append(_u32.pack(len(hgvs_texts)))
+        for hgvs_text in hgvs_texts:
+            ac, rest = _split_hgvs(hgvs_text)
+            rest = rest.encode('utf-8')
+            parts.extend((_u32.pack(strings.id(ac)), _u32.pack(len(rest)), rest))
+    return b''.join(parts)
+
+
+def iter_lvg_json(paths):
+    """ Yields dicts from files of VariantLVG.to_json() lines (plain, .gz or .bz2). """
+    for path in paths:
+        with open_dump(path) as fh:
+            for line in fh:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def build_lvg_store(lvg_dicts, store_path):
+    """ Writes an LVGStore from LVG result dicts (as made by VariantLVG.to_json), streaming records
+    to disk. If an hgvs_text appears more than once, the last one wins.
+
+    :param lvg_dicts: iterable of dicts (see iter_lvg_json)
+    :param store_path: (str)
+    :return: (dict) stats: records, strings, bytes
+    """
+    strings = _StringTable()
+    slots = {}          # key hash -> [(key, record offset)]
+
+    with open(store_path, 'w+b') as fh:
+        fh.write(b'\x00' * _header.size)
+        for lvgd in lvg_dicts:
+            offset = fh.tell()
+            fh.write(_encode_record(lvgd, strings))
+            key = lvgd['hgvs_text']
+            entries = [entry for entry in slots.get(key_hash(key), []) if entry[0] != key]
+            entries.append((key, offset))
+            slots[key_hash(key)] = entries
+
+        strings_offset = fh.tell()
+        strings.write(fh)
+
+        # hash table at most half full, so probes stay short.
+        n_records = sum(len(entries) for entries in slots.values())
+        index_slots = 1
+        while index_slots < n_records * 2:
+            index_slots *= 2
+        table = [(0, 0)] * index_slots
+        for hashed, entries in slots.items():
+            for _, offset in entries:
+                pos = hashed & (index_slots - 1)
+                while table[pos][1]:
+                    pos = (pos + 1) & (index_slots - 1)
+                table[pos] = (hashed, offset + 1)
+
+        index_offset = fh.tell()
+        for hashed, offset in table:
+            fh.write(_slot.pack(hashed, offset))
+        size = fh.tell()
+
+        fh.seek(0)
+        fh.write(_header.pack(MAGIC, VERSION, n_records, strings_offset, index_offset, index_slots))
+
+    log.info('LVGStore %s: %i records, %i strings, %i bytes', store_path, n_records, len(strings.strings), size)
+    return {'records': n_records, 'strings': len(strings.strings), 'bytes': size}
+
+
+class LVGStore(object):
+    """
+    LVGStore
+
+    Read-only, memory-mapped access to a file written by build_lvg_store. Lookups hash the input HGVS
+    string, probe the index, and decode only the matching record (or only the requested seqtype of it).
+
+    Usage:
+
+        store = LVGStore('lvgs.store')
+        'NM_000155.3:c.253C>T' in store
+        store.synonyms('NM_000155.3:c.253C>T')          # {'c': [...], 'g': [...], 'n': [...], 'p': [...]}
+        store.synonyms('NM_000155.3:c.253C>T', 'p')     # [...]
+        store.get('NM_000155.3:c.253C>T')               # LiteLVG, or None
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as fh:
+            self._mmap = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+
+        magic, version, self.n_records, strings_offset, self._index_offset, self._index_slots = \
+            _header.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError('%s is not an LVGStore (version %i) file' % (path, VERSION))
+
+        self._n_strings = _u32.unpack_from(self._mmap, strings_offset)[0]
+        self._string_offsets = strings_offset + _u32.size
+        self._string_blob = self._string_offsets + _u64.size * (self._n_strings + 1)
+
+    def __len__(self):
+        return self.n_records
+
+    def __contains__(self, hgvs_text):
+        return self._find(hgvs_text) is not None
+
+    def _string(self, idx):
+        if idx == NO_STRING:
+            return None
+        start, end = struct.unpack_from('<QQ', self._mmap, self._string_offsets + _u64.size * idx)
+        return self._mmap[self._string_blob + start:self._string_blob + end].decode('utf-8')
+
+    def _record_key(self, offset):
+        key_len = _u32.unpack_from(self._mmap, offset)[0]
+        return self._mmap[offset + 4:offset + 4 + key_len].decode('utf-8'), offset + 4 + key_len
+
+    def _find(self, hgvs_text):
+        """ Returns the offset just past the key of hgvs_text's record, or None. """
+        if not self._index_slots:
+            return None
+        hashed = key_hash(hgvs_text)
+        mask = self._index_slots - 1
+        pos = hashed & mask
+        while True:
+            slot_hash, offset = _slot.unpack_from(self._mmap, self._index_offset + _slot.size * pos)
+            if not offset:
+                return None
+            if slot_hash == hashed:
+                key, body = self._record_key(offset - 1)
+                if key == hgvs_text:
+                    return body
+            pos = (pos + 1) & mask
+
+    def _read_body(self, offset, seqtypes=SEQTYPES):
+        gene_id = _u32.unpack_from(self._mmap, offset)[0]
+        n_transcripts = _u32.unpack_from(self._mmap, offset + 4)[0]
+        offset += 8
+        transcript_ids = struct.unpack_from('<%iI' % n_transcripts, self._mmap, offset)
+        offset += 4 * n_transcripts
+
+        hgvs = {}
+        for seqtype in SEQTYPES:
+            count = _u32.unpack_from(self._mmap, offset)[0]
+            offset += 4
+            wanted = seqtype in seqtypes
+            hgvs_texts = []
+            for _ in range(count):
+                ac_id = _u32.unpack_from(self._mmap, offset)[0]
+                rest_len = _u32.unpack_from(self._mmap, offset + 4)[0]
+                offset += 8
+                if wanted:
+                    ac = self._string(ac_id)
+                    rest = self._mmap[offset:offset + rest_len].decode('utf-8')
+                    hgvs_texts.append('%s:%s' % (ac, rest) if ac else rest)
+                offset += rest_len
+            if wanted:
+                hgvs[seqtype] = hgvs_texts
+        return gene_id, transcript_ids, hgvs
+
+    def synonyms(self, hgvs_text, seqtype=None):
+        """ Returns the synonyms of hgvs_text, without decoding anything else in the store.
+
+        :param hgvs_text: (str) input HGVS string of an LVG
+        :param seqtype: (str) 'c', 'g', 'n' or 'p' to return only that list [default: all, as a dict]
+        :return: list or dict of lists, or None if hgvs_text is not in the store
+        """
+        offset = self._find(hgvs_text)
+        if offset is None:
+            return None
+        _, _, hgvs = self._read_body(offset, seqtypes=(seqtype,) if seqtype else SEQTYPES)
+        return hgvs[seqtype] if seqtype else hgvs
+
+    def get(self, hgvs_text):
+        """ Returns the stored result for hgvs_text as a LiteLVG, or None. """
+        offset = self._find(hgvs_text)
+        if offset is None:
+            return None
+        gene_id, transcript_ids, hgvs = self._read_body(offset)
+        return LiteLVG(hgvs_text, transcripts=[self._string(idx) for idx in transcript_ids],
+                       gene_name=self._string(gene_id), **dict(('hgvs_%s' % seqtype, hgvs[seqtype]) for seqtype in SEQTYPES))
+
+    def keys(self):
+        """ Yields the input HGVS string of every record (in index order). """
+        for pos in range(self._index_slots):
+            _, offset = _slot.unpack_from(self._mmap, self._index_offset + _slot.size * pos)
+            if offset:
+                yield self._record_key(offset - 1)[0]
+
+    def close(self):
+        self._mmap.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build or query a memory-mapped LVG result store.')
+    subparsers = parser.add_subparsers(dest='command')
+    build = subparsers.add_parser('build', help='build a store from VariantLVG.to_json() lines')
+    build.add_argument('jsonl', nargs='+', help='JSONL files (.gz, .bz2 or plain text)')
+    build.add_argument('-o', '--output', required=True)
+    get = subparsers.add_parser('get', help='print the synonyms of HGVS strings')
+    get.add_argument('store')
+    get.add_argument('hgvs_texts', nargs='+')
+    get.add_argument('--seqtype', choices=SEQTYPES, default=None)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig()
+    if args.command == 'build':
+        print(json.dumps(build_lvg_store(iter_lvg_json(args.jsonl), args.output)))
+    elif args.command == 'get':
+        store = LVGStore(args.store)
+        for hgvs_text in args.hgvs_texts:
+            print(json.dumps({hgvs_text: store.synonyms(hgvs_text, args.seqtype)}))
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
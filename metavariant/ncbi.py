@@ -1,12 +1,17 @@
 """ Provides NCBIEnrichedLVG object and NCBI Variant report functions. """
 
+import logging
 import requests
 import urllib
 
+from .breaker import ncbi_breaker
+from .config import PKGNAME, REMOTE_TIMEOUT
 from .lvg import VariantLVG, Variant
-from .exceptions import CriticalHgvsError, NCBIRemoteError  #, MetaVariantException
+from .exceptions import CircuitOpenError, CriticalHgvsError, NCBIRemoteError  #, MetaVariantException
 from .utils import strip_gene_name_from_hgvs_text
 
+log = logging.getLogger(PKGNAME)
+
 
 
 
@@ -43,6 +48,15 @@ def ncbi_report_to_pubmeds(report):
 
 
 
+def _request_ncbi_variant_report(hgvs_text):
+    """ Fetches the raw NCBI Variant Reporter response; raises on outages (counted by ncbi_breaker). """
+    response = requests.get("https://www.ncbi.nlm.nih.gov/projects/SNP/VariantAnalyzer/var_rep.cgi?annot1={}".format(urllib.parse.quote(hgvs_text)),
+                            timeout=REMOTE_TIMEOUT)
+    if response.status_code >= 500:
+        response.raise_for_status()
+    return response
+
+
 def get_ncbi_variant_report(hgvs_text):
     """
     Return results from API query to the NCBI Variant Reporter Service
@@ -51,8 +65,12 @@ def get_ncbi_variant_report(hgvs_text):
 
     :param hgvs_text: ( c.DNA | r.RNA | p.Protein | g.Genomic )
     :return: list containing each dict of parsed results
+    :raises: NCBIRemoteError; CircuitOpenError while NCBI is failing (see metavariant.breaker)
     """
-    response = requests.get("https://www.ncbi.nlm.nih.gov/projects/SNP/VariantAnalyzer/var_rep.cgi?annot1={}".format(urllib.parse.quote(hgvs_text)))
+    try:
+        response = ncbi_breaker.call(_request_ncbi_variant_report, hgvs_text)
+    except requests.RequestException as error:
+        raise NCBIRemoteError('Cannot reach the NCBI Variant Report Service: {!r}'.format(error)) from error
 
     if 'Error' in response.text:
         error_str = 'The NCBI Variant Report Service returned an error: "{}"\n'.format(response.text)
@@ -105,14 +123,17 @@ class NCBIEnrichedLVG(VariantLVG):
         self.hgvs_text = strip_gene_name_from_hgvs_text('%s' % hgvs_text_or_seqvar)
         self.seqvar = Variant(hgvs_text_or_seqvar)
         self.ncbierror = None
+        ncbi_unavailable = False
         if self.seqvar is None:
             raise CriticalHgvsError('Cannot create SequenceVariant from input %s' % self.hgvs_text)
         try:
             report = get_ncbi_variant_report(self.hgvs_text)
             self.variants = ncbi_report_to_variants(report)
-        except NCBIRemoteError as error:
+        except (NCBIRemoteError, CircuitOpenError) as error:
             log.debug('Skipping NCBI enrichment; %r' % error)
             self.ncbierror = '%r' % error
+            # NCBI down (rather than having nothing to say): mark the result for a later retry.
+            ncbi_unavailable = isinstance(error, CircuitOpenError) or isinstance(error.__cause__, requests.RequestException)
             self.error = ''
             self.variants = {'c': {}, 'g': {}, 'p': {}, 'n': {}}
             self.variants[self.seqvar.type][self.hgvs_text] = self.seqvar
@@ -123,5 +144,7 @@ class NCBIEnrichedLVG(VariantLVG):
                                               hgvs_p=self.hgvs_p,
                                               hgvs_n=self.hgvs_n,
                                               **kwargs)
+        if ncbi_unavailable:
+            self.degraded = True
 
 
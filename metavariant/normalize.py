@@ -0,0 +1,107 @@
+""" Provides canonical_key, which groups equivalent spellings of a variant, and the shared cache of its results.
+
+hgvs can write one variant several ways: with or without the deleted bases (`del` vs `delCTGG`),
+shifted 5' or 3' within a repeat, and so on. VariantLVG(..., normalize=True) keeps just one of each
+group of equivalent variants, so fewer synonyms have to be searched for.
+
+The canonical key of a variant is its 3'-normalized form written without reference bases:
+
+    NC_000007.14:g.55174777_55174794delTAAGAGAAGCAACATCTC   ->  NC_000007.14:g.55174777_55174794del
+
+Normalizing needs reference sequence (from UTA, or a SeqStore), so keys are kept in the module-level
+`canonical_key_cache`, shared by all LVGs and threads.
+"""
+
+import logging
+import threading
+from collections import OrderedDict
+
+from .config import NORMALIZE_CACHE_SIZE, PKGNAME
+
+log = logging.getLogger(PKGNAME)
+
+# how canonical keys are written: no reference bases (e.g. "del", never "delCTGG").
+CANONICAL_FORMAT = {'max_ref_length': 0}
+
+# seqtypes the hgvs Normalizer can shift (protein variants are only reformatted).
+NORMALIZABLE = ('c', 'g', 'n')
+
+
+class CanonicalKeyCache(object):
+    """
+    CanonicalKeyCache
+
+    Holds up to `maxsize` canonical keys by HGVS string, least recently used first out. Only keys of
+    variants that were actually normalized are kept, so a variant that failed to normalize (e.g. while
+    UTA was unavailable) is tried again next time.
+
+    Module-level `canonical_key_cache` is used by canonical_key.
+
+    Usage:
+
+        key = canonical_key_cache.get(seqvar, worker.normalizer)
+        canonical_key_cache.stats()
+    """
+
+    def __init__(self, maxsize=NORMALIZE_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._keys = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._keys)
+
+    def get(self, seqvar, normalizer=None):
+        """ Returns the canonical key of seqvar, normalizing it with normalizer if not already cached.
+
+        :param seqvar: hgvs SequenceVariant
+        :param normalizer: hgvs Normalizer (see HgvsWorker.normalizer) [default: None, i.e. reformat only]
+        :return: (str)
+        """
+        hgvs_text = str(seqvar)
+        with self._lock:
+            key = self._keys.get(hgvs_text)
+            if key is not None:
+                self._keys.move_to_end(hgvs_text)
+                self.hits += 1
+                return key
+            self.misses += 1
+
+        if normalizer is None or seqvar.type not in NORMALIZABLE:
+            return seqvar.format(CANONICAL_FORMAT)
+
+        try:
+            key = normalizer.normalize(seqvar).format(CANONICAL_FORMAT)
+        except Exception as error:
+            # no sequence, unsupported edit, backend down: fall back to the variant as written.
+            log.debug('Cannot normalize %s; %r', hgvs_text, error)
+            return seqvar.format(CANONICAL_FORMAT)
+
+        if self.maxsize:
+            with self._lock:
+                self._keys[hgvs_text] = key
+                while len(self._keys) > self.maxsize:
+                    self._keys.popitem(last=False)
+        return key
+
+    def clear(self):
+        with self._lock:
+            self._keys.clear()
+
+    def stats(self):
+        return {'size': len(self._keys), 'maxsize': self.maxsize, 'hits': self.hits, 'misses': self.misses}
+
+
+canonical_key_cache = CanonicalKeyCache()
+
+
+def canonical_key(seqvar, normalizer=None):
+    """ Returns the string shared by all equivalent spellings of seqvar (see module docstring).
+
+    :param seqvar: hgvs SequenceVariant
+    :param normalizer: hgvs Normalizer [default: None, i.e. only drop reference bases]
+    :return: (str)
+    """
+    return canonical_key_cache.get(seqvar, normalizer)
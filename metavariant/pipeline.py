@@ -0,0 +1,259 @@
+""" Provides a streaming, multiprocess pipeline that turns PubTator and abstract dumps into VariantComponents records.
+
+Usage:
+
+    stats = run_pipeline(['bioconcepts2pubtator_offsets.gz'], 'aminochanges.jsonl', processes=8)
+
+Or from the command line:
+
+    python -m metavariant.pipeline -o aminochanges.jsonl --processes 8 bioconcepts2pubtator_offsets.gz
+"""
+
+import argparse
+import bz2
+import gzip
+import json
+import logging
+import multiprocessing
+import time
+from collections import deque
+from itertools import islice
+
+from .components import VariantComponents, findall_aminochanges_with_offsets
+from .config import PKGNAME
+from .exceptions import RejectedSeqVar
+
+log = logging.getLogger(PKGNAME)
+
+DEFAULT_CHUNK_SIZE = 5000
+
+# order of columns in output records (and of the header line in TSV output).
+RECORD_FIELDS = ('doc_id', 'section', 'start', 'end', 'aminochange',
+                 'seqtype', 'edittype', 'ref', 'pos', 'alt', 'posedit')
+
+
+def open_dump(path):
+    """ Opens a line-oriented dump file for reading as text, transparently decompressing
+    gzip (.gz) and bzip2 (.bz2) files.
+
+    :param path: (str)
+    :return: file object open in text mode
+    """
+    if path.endswith('.gz'):
+        return gzip.open(path, 'rt', encoding='utf-8', errors='replace')
+    if path.endswith('.bz2'):
+        return bz2.open(path, 'rt', encoding='utf-8', errors='replace')
+    return open(path, 'r', encoding='utf-8', errors='replace')
+
+
+def parse_pubtator_line(line):
+    """ Parses a line from a PubTator dump into (doc_id, section, text).
+
+    Title and abstract lines look like "PMID|t|Title text" and "PMID|a|Abstract text".
+    Annotation lines (tab-delimited) and blank lines return None.
+
+    :param line: (str)
+    :return: tuple or None
+    """
+    parts = line.rstrip('\n').split('|', 2)
+    if len(parts) == 3 and parts[1] in ('t', 'a'):
+        return parts[0], parts[1], parts[2]
+    return None
+
+
+def parse_abstract_line(line):
+    """ Parses a line from an abstracts dump ("PMID<tab>abstract text") into (doc_id, section, text).
+
+    :param line: (str)
+    :return: tuple or None
+    """
+    parts = line.rstrip('\n').split('\t', 1)
+    if len(parts) == 2 and parts[1]:
+        return parts[0], 'a', parts[1]
+    return None
+
+
+LINE_PARSERS = {'pubtator': parse_pubtator_line,
+                'abstracts': parse_abstract_line,
+               }
+
+
+def extract_components(doc_id, section, text):
+    """ Finds all aminochanges in text and returns a list of record dictionaries (keyed by
+    RECORD_FIELDS) for those that can be parsed into VariantComponents.
+
+    :param doc_id: (str) document identifier (e.g. PMID)
+    :param section: (str) section of document ('t' for title, 'a' for abstract)
+    :param text: (str)
+    :return: (list) of dicts
+    """
+    records = []
+    for aminochange, start, end in findall_aminochanges_with_offsets(text):
+        try:
+            comp = VariantComponents(aminochange=aminochange)
+            posedit = comp.posedit
+        except RejectedSeqVar as error:
+            log.debug('Skipping aminochange %s in %s: %r', aminochange, doc_id, error)
+            continue
+
+        records.append({'doc_id': doc_id,
+                        'section': section,
+                        'start': start,
+                        'end': end,
+                        'aminochange': aminochange,
+                        'seqtype': comp.seqtype,
+                        'edittype': comp.edittype,
+                        'ref': comp.ref,
+                        'pos': comp.pos,
+                        'alt': comp.alt,
+                        'posedit': posedit,
+                       })
+    return records
+
+
+def process_lines(lines, dump_format='pubtator'):
+    """ Runs extract_components over every parseable line of a chunk.
+
+    :param lines: (list) of lines from a dump file
+    :param dump_format: (str) one of the keys of LINE_PARSERS
+    :return: (list) of record dicts
+    """
+    parse_line = LINE_PARSERS[dump_format]
+    records = []
+    for line in lines:
+        parsed = parse_line(line)
+        if parsed:
+            records.extend(extract_components(*parsed))
+    return records
+
+
+def _process_chunk(args):
+    lines, dump_format = args
+    return len(lines), process_lines(lines, dump_format)
+
+
+def iter_chunks(paths, chunk_size=DEFAULT_CHUNK_SIZE):
+    """ Yields lists of at most chunk_size lines, reading each of paths in turn.
+
+    :param paths: (list) of dump file paths
+    :param chunk_size: (int)
+    """
+    for path in paths:
+        with open_dump(path) as fh:
+            while True:
+                lines = list(islice(fh, chunk_size))
+                if not lines:
+                    break
+                yield lines
+
+
+def _write_jsonl(fh, records):
+    for rec in records:
+        fh.write(json.dumps([rec[field] for field in RECORD_FIELDS]))
+        fh.write('\n')
+
+
+def _write_tsv(fh, records):
+    for rec in records:
+        fh.write('\t'.join('%s' % rec[field] for field in RECORD_FIELDS))
+        fh.write('\n')
+
+
+OUTPUT_WRITERS = {'jsonl': _write_jsonl,
+                  'tsv': _write_tsv,
+                 }
+
+
+def run_pipeline(paths, output_path, dump_format='pubtator', output_format='jsonl', processes=None,
+                 chunk_size=DEFAULT_CHUNK_SIZE, max_pending=None, report_every=100):
+    """ Streams line-oriented (optionally compressed) dumps through a process pool, extracting
+    aminochanges with their offsets and writing one record per VariantComponents to output_path.
+
+    At most max_pending chunks are in flight at any time (default: 2 per process), so memory use
+    stays bounded regardless of corpus size. Results are written in input order.
+
+    Output formats:
+        jsonl: one compact JSON array per line, values ordered as RECORD_FIELDS.
+        tsv: tab-separated columns with a header line of RECORD_FIELDS.
+
+    :param paths: (list) of dump file paths (.gz, .bz2 or plain text)
+    :param output_path: (str)
+    :param dump_format: (str) 'pubtator' or 'abstracts' [default: 'pubtator']
+    :param output_format: (str) 'jsonl' or 'tsv' [default: 'jsonl']
+    :param processes: (int) number of worker processes [default: cpu count]. Use 1 to run in-process.
+    :param chunk_size: (int) lines per chunk sent to a worker
+    :param max_pending: (int) max number of chunks in flight
+    :param report_every: (int) log throughput every N chunks
+    :return: (dict) stats: lines, records, seconds, lines_per_sec, records_per_sec
+    """
+    if dump_format not in LINE_PARSERS:
+        raise ValueError('Unknown dump_format %r (expected one of %s)' % (dump_format, ', '.join(LINE_PARSERS)))
+    write_records = OUTPUT_WRITERS[output_format]
+
+    processes = processes or multiprocessing.cpu_count()
+    max_pending = max_pending or processes * 2
+
+    stats = {'lines': 0, 'records': 0, 'chunks': 0}
+    started = time.time()
+
+    def _collect(n_lines, records, out):
+        write_records(out, records)
+        stats['lines'] += n_lines
+        stats['records'] += len(records)
+        stats['chunks'] += 1
+        if report_every and stats['chunks'] % report_every == 0:
+            _report(stats, started)
+
+    with open(output_path, 'w', encoding='utf-8') as out:
+        if output_format == 'tsv':
+            out.write('\t'.join(RECORD_FIELDS) + '\n')
+
+        chunks = ((lines, dump_format) for lines in iter_chunks(paths, chunk_size))
+        if processes == 1:
+            for chunk in chunks:
+                _collect(*_process_chunk(chunk), out=out)
+        else:
+            pool = multiprocessing.Pool(processes)
+            try:
+                pending = deque()
+                for chunk in chunks:
+                    if len(pending) >= max_pending:
+                        _collect(*pending.popleft().get(), out=out)
+                    pending.append(pool.apply_async(_process_chunk, (chunk,)))
+                while pending:
+                    _collect(*pending.popleft().get(), out=out)
+            finally:
+                pool.terminate()
+                pool.join()
+
+    return _report(stats, started)
+
+
+def _report(stats, started):
+    elapsed = time.time() - started
+    stats['seconds'] = elapsed
+    stats['lines_per_sec'] = stats['lines'] / elapsed if elapsed else 0.0
+    stats['records_per_sec'] = stats['records'] / elapsed if elapsed else 0.0
+    log.info('pipeline: %(lines)i lines, %(records)i records in %(seconds).1fs '
+             '(%(lines_per_sec).0f lines/s, %(records_per_sec).0f records/s)', stats)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Extract aminochange VariantComponents from PubTator/abstract dumps.')
+    parser.add_argument('paths', nargs='+', help='dump files (.gz, .bz2 or plain text)')
+    parser.add_argument('-o', '--output', required=True, help='output file')
+    parser.add_argument('--dump-format', default='pubtator', choices=sorted(LINE_PARSERS))
+    parser.add_argument('--output-format', default='jsonl', choices=sorted(OUTPUT_WRITERS))
+    parser.add_argument('--processes', type=int, default=None)
+    parser.add_argument('--chunk-size', type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig()
+    stats = run_pipeline(args.paths, args.output, dump_format=args.dump_format, output_format=args.output_format,
+                         processes=args.processes, chunk_size=args.chunk_size)
+    print(json.dumps(stats))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,196 @@
+""" Provides HgvsPool, a thread-safe pool of hgvs parsers and mappers over a pooled UTA connection. """
+
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+
+import hgvs.normalizer
+import hgvs.parser
+
+from .assembly import MapperRegistry
+from .config import get_uta_connection, PKGNAME, UTA_POOL_MAX
+
+log = logging.getLogger(PKGNAME)
+
+
+class HgvsWorker(object):
+    """ Bundles the hgvs objects needed to parse and map variants: a data provider (hdp),
+    a Parser, and a MapperRegistry of AssemblyMappers (one per assembly) over that data provider.
+    `mapper` is the registry's mapper for its default assembly, and `normalizer` an hgvs Normalizer
+    made on first use and kept for the life of the worker.
+
+    A worker should only be used by one thread at a time (see HgvsPool).
+    """
+
+    def __init__(self, hdp, parser=None, mapper=None):
+        self.hdp = hdp
+        self.parser = parser or hgvs.parser.Parser()
+        self.mappers = MapperRegistry(hdp, mappers=[mapper] if mapper else None)
+        self.last_checked = time.time()
+        self.generation = 0
+        self._normalizer = None
+
+    @property
+    def mapper(self):
+        return self.mappers.get()
+
+    @property
+    def normalizer(self):
+        if self._normalizer is None:
+            # 3' shifted, as HGVS recommends; validating against the reference would cost more sequence fetches.
+            self._normalizer = hgvs.normalizer.Normalizer(self.hdp, shuffle_direction=3, validate=False)
+        return self._normalizer
+
+
+class HgvsPool(object):
+    """
+    HgvsPool
+
+    Hands out HgvsWorkers (parser + AssemblyMapper) so that each thread using the pool has its own,
+    while all of them share a single pooled (thread-safe) UTA connection.
+
+    At most `size` workers are created; threads asking for a worker while all are in use wait for
+    one to be returned (up to `timeout` seconds, if set). Workers idle for longer than
+    `health_check_interval` seconds are checked against UTA before being handed out; if UTA does not
+    respond, the pool reconnects and replaces its workers.
+
+    Usage:
+
+        pool = HgvsPool(size=8)
+
+        # from any thread:
+        lex = VariantLVG('NM_198056.2:c.4786T>A', pool=pool)
+
+        # or directly:
+        with pool.worker() as worker:
+            var_g = worker.mapper.c_to_g(worker.parser.parse_hgvs_variant(hgvs_text))
+
+        # from asyncio, via an executor:
+        await loop.run_in_executor(None, functools.partial(VariantLVG, hgvs_text, pool=pool))
+
+    Keywords:
+        size (int): maximum number of workers [default: UTA_POOL_MAX]
+        hdp: data provider to share between workers [default: a new pooled UTA connection]
+        health_check_interval (int): seconds a worker may sit idle before being re-checked [default: 60]
+        timeout (float): seconds to wait for a free worker (None waits forever) [default: None]
+        (any other keywords are passed to get_uta_connection)
+    """
+
+    def __init__(self, size=UTA_POOL_MAX, hdp=None, health_check_interval=60, timeout=None, **uta_kwargs):
+        self.size = int(size)
+        self.health_check_interval = health_check_interval
+        self.timeout = timeout
+
+        self._uta_kwargs = uta_kwargs
+        self._uta_kwargs.setdefault('pooling', True)
+        self._uta_kwargs.setdefault('pool_max', self.size)
+        self._owns_hdp = hdp is None
+        self.hdp = hdp if hdp is not None else get_uta_connection(**self._uta_kwargs)
+
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._generation = 0
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    def _new_worker(self):
+        worker = HgvsWorker(self.hdp)
+        worker.generation = self._generation
+        return worker
+
+    def _acquire(self):
+        with self._lock:
+            if self._idle.empty() and self._created < self.size:
+                self._created += 1
+                create = True
+            else:
+                create = False
+
+        if create:
+            try:
+                return self._new_worker()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+
+        try:
+            worker = self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise RuntimeError('Timed out waiting for a free hgvs worker (pool size %i)' % self.size)
+
+        if worker.generation != self._generation:
+            # the pool reconnected since this worker was made.
+            return self._new_worker()
+
+        if time.time() - worker.last_checked > self.health_check_interval:
+            self.check_health()
+            if worker.generation != self._generation:
+                return self._new_worker()
+            worker.last_checked = time.time()
+        return worker
+
+    def _release(self, worker):
+        self._idle.put(worker)
+
+    @contextmanager
+    def worker(self):
+        """ Context manager that leases a worker to the calling thread, returning it to the pool on exit.
+        Nested calls from the same thread get the same worker.
+        """
+        leased = getattr(self._local, 'worker', None)
+        if leased is not None:
+            yield leased
+            return
+
+        worker = self._acquire()
+        self._local.worker = worker
+        try:
+            yield worker
+        finally:
+            self._local.worker = None
+            self._release(worker)
+
+    def is_healthy(self):
+        """ Returns True if the UTA connection answers a trivial query. """
+        try:
+            # hdp query methods are cached; go straight to the database.
+            self.hdp._fetchone('select 1')
+            return True
+        except Exception as error:
+            log.warning('UTA health check failed: %r', error)
+            return False
+
+    def check_health(self):
+        """ Checks the UTA connection and, if it is unhealthy, reconnects and retires existing workers.
+
+        :return: True if the pool was healthy (or recovered), False otherwise
+        """
+        if self.is_healthy():
+            return True
+
+        if not self._owns_hdp:
+            return False
+
+        with self._lock:
+            log.warning('Reconnecting HgvsPool to UTA')
+            try:
+                self.hdp = get_uta_connection(**self._uta_kwargs)
+            except Exception as error:
+                log.error('UTA reconnect failed: %r', error)
+                return False
+            self._generation += 1
+        return True
+
+    def stats(self):
+        return {'size': self.size,
+                'created': self._created,
+                'idle': self._idle.qsize(),
+                'generation': self._generation,
+               }
+
+    def close(self):
+        if self._owns_hdp and hasattr(self.hdp, 'close'):
+            self.hdp.close()
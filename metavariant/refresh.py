@@ -0,0 +1,316 @@
+""" Provides LVGResultDB, a SQLite store of LVG results that records which version, mode and UTA schema
+produced each one, and refresh_lvgs, which recomputes only the stale or failed results.
+
+A result is stale when its VERSION or LVG_MODE differ from the LVG class doing the refresh, or when it
+was computed against another UTA_SCHEMA. Results are recomputed in batches over a process pool; every
+finished batch is committed, so an interrupted refresh resumes where it stopped when run again.
+
+Usage:
+
+    python -m metavariant.refresh add lvgs.sqlite hgvs_texts.txt
+    python -m metavariant.refresh status lvgs.sqlite
+    python -m metavariant.refresh run lvgs.sqlite --processes 8
+    python -m metavariant.refresh export lvgs.sqlite -o lvgs.jsonl     # e.g. for metavariant.lvgstore
+"""
+
+import argparse
+import json
+import logging
+import multiprocessing
+import sqlite3
+import time
+from collections import deque
+
+from .config import PKGNAME, UTA_SCHEMA
+from .lvg import VariantLVG, reconnect_uta
+from .pipeline import open_dump
+
+log = logging.getLogger(PKGNAME)
+
+DEFAULT_BATCH_SIZE = 100
+
+STATUS_PENDING = 'pending'
+STATUS_OK = 'ok'
+STATUS_FAILED = 'failed'
+
+SQL_CREATE = '''create table if not exists lvg_results (
+    hgvs_text text primary key,
+    status text not null,
+    lvg_mode text,
+    version text,
+    uta_schema text,
+    result text,
+    error text,
+    updated real
+)'''
+
+# entries needing (re)computation by an LVG class of the given mode and version, against the given schema.
+SQL_STALE = '''(status != 'ok' or lvg_mode is not :lvg_mode or version is not :version or uta_schema is not :uta_schema)'''
+
+
+def _lvg_class_for_mode(lvg_mode):
+    if lvg_mode == VariantLVG.LVG_MODE:
+        return VariantLVG
+    if lvg_mode == 'ncbi_enriched':
+        from .ncbi import NCBIEnrichedLVG
+        return NCBIEnrichedLVG
+    raise ValueError('Unknown LVG mode %r (expected lvg or ncbi_enriched)' % lvg_mode)
+
+
+class LVGResultDB(object):
+    """
+    LVGResultDB
+
+    SQLite table of LVG results (VariantLVG.to_json) keyed by input HGVS string, each with the status
+    ('pending', 'ok' or 'failed'), LVG_MODE, VERSION and UTA schema that produced it.
+
+    Usage:
+
+        db = LVGResultDB('lvgs.sqlite')
+        db.add(['NM_000155.3:c.253C>T'])
+        db.counts(VariantLVG)                # {'total': 1, 'current': 0, 'stale': 1, 'failed': 0}
+        refresh_lvgs('lvgs.sqlite')
+        VariantLVG.from_json(db.get('NM_000155.3:c.253C>T'))
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path)
+        self.conn.execute(SQL_CREATE)
+        self.conn.commit()
+
+    def __len__(self):
+        return self.conn.execute('select count(*) from lvg_results').fetchone()[0]
+
+    def add(self, hgvs_texts):
+        """ Adds input HGVS strings as pending entries (existing entries are left alone).
+
+        :param hgvs_texts: iterable of str
+        :return: (int) number of new entries
+        """
+        before = len(self)
+        with self.conn:
+            self.conn.executemany('insert or ignore into lvg_results (hgvs_text, status) values (?, ?)',
+                                  ((hgvs_text, STATUS_PENDING) for hgvs_text in hgvs_texts))
+        return len(self) - before
+
+    def get(self, hgvs_text):
+        """ Returns the stored result JSON for hgvs_text, or None. """
+        row = self.conn.execute('select result from lvg_results where hgvs_text = ?', (hgvs_text,)).fetchone()
+        return row[0] if row else None
+
+    def put_results(self, results, lvg_class=VariantLVG, uta_schema=UTA_SCHEMA):
+        """ Stores a batch of (hgvs_text, result JSON or None, error or None) in one transaction.
+
+        :param results: list of tuples
+        :param lvg_class: class that computed the results (for its LVG_MODE and VERSION)
+        :param uta_schema: (str) UTA schema the results were computed against
+        """
+        now = time.time()
+        with self.conn:
+            # a failed recomputation keeps the previous result (if any), but is no longer 'ok'.
+            self.conn.executemany(
+                'insert into lvg_results values (?, ?, ?, ?, ?, ?, ?, ?) on conflict (hgvs_text) do update set '
+                'status = excluded.status, lvg_mode = excluded.lvg_mode, version = excluded.version, '
+                'uta_schema = excluded.uta_schema, result = coalesce(excluded.result, result), '
+                'error = excluded.error, updated = excluded.updated',
+                ((hgvs_text, STATUS_OK if error is None else STATUS_FAILED, lvg_class.LVG_MODE,
+                  str(lvg_class.VERSION), uta_schema, result, error, now)
+                 for hgvs_text, result, error in results))
+
+    def _stale_params(self, lvg_class, uta_schema):
+        return {'lvg_mode': lvg_class.LVG_MODE, 'version': str(lvg_class.VERSION), 'uta_schema': uta_schema}
+
+    def stale(self, lvg_class=VariantLVG, uta_schema=UTA_SCHEMA, batch_size=DEFAULT_BATCH_SIZE, after=''):
+        """ Yields lists of at most batch_size stale or failed hgvs_texts, in key order, starting after `after`.
+
+        Each batch is queried only when needed, so entries written in the meantime are not seen twice.
+        """
+        params = self._stale_params(lvg_class, uta_schema)
+        params['limit'] = batch_size
+        while True:
+            params['after'] = after
+            rows = self.conn.execute('select hgvs_text from lvg_results where hgvs_text > :after and %s '
+                                     'order by hgvs_text limit :limit' % SQL_STALE, params).fetchall()
+            if not rows:
+                return
+            after = rows[-1][0]
+            yield [row[0] for row in rows]
+
+    def counts(self, lvg_class=VariantLVG, uta_schema=UTA_SCHEMA):
+        """ Returns {'total', 'current', 'stale', 'failed'} entry counts for lvg_class and uta_schema. """
+        params = self._stale_params(lvg_class, uta_schema)
+        total = len(self)
+        stale = self.conn.execute('select count(*) from lvg_results where %s' % SQL_STALE, params).fetchone()[0]
+        failed = self.conn.execute('select count(*) from lvg_results where status = ?', (STATUS_FAILED,)).fetchone()[0]
+        return {'total': total, 'current': total - stale, 'stale': stale, 'failed': failed}
+
+    def iter_results(self):
+        """ Yields the result JSON of every successfully computed entry. """
+        for row in self.conn.execute('select result from lvg_results where status = ? order by hgvs_text', (STATUS_OK,)):
+            yield row[0]
+
+    def close(self):
+        self.conn.close()
+
+
+def compute_batch(hgvs_texts, lvg_class=VariantLVG, lvg_kwargs=None):
+    """ Computes LVGs for a batch of inputs, recording failures instead of raising.
+
+    :param hgvs_texts: list of str
+    :param lvg_class: VariantLVG or a subclass
+    :param lvg_kwargs: (dict) keyword arguments for lvg_class
+    :return: list of (hgvs_text, result JSON or None, error or None)
+    """
+    results = []
+    for hgvs_text in hgvs_texts:
+        try:
+            lex = lvg_class(hgvs_text, **(lvg_kwargs or {}))
+            # a partial (deadline reached) or degraded (backend down) LVG is kept, but counts as failed
+            # so the next refresh retries it.
+            error = None
+            if lex.partial:
+                error = 'partial: %r' % lex.skipped
+            elif lex.degraded:
+                error = 'degraded: backend unavailable'
+            results.append((hgvs_text, lex.to_json(), error))
+        except Exception as error:
+            log.debug('refresh: %s failed: %r', hgvs_text, error)
+            results.append((hgvs_text, None, '%r' % error))
+    return results
+
+
+def _compute_batch(args):
+    return compute_batch(*args)
+
+
+def _init_process():
+    # forked workers inherit the parent's UTA connection; each needs its own.
+    reconnect_uta()
+
+
+def refresh_lvgs(db_path, lvg_class=VariantLVG, uta_schema=UTA_SCHEMA, processes=None, batch_size=DEFAULT_BATCH_SIZE,
+                 max_pending=None, limit=None, lvg_kwargs=None, report_every=10):
+    """ Recomputes every stale or failed entry of an LVGResultDB (see module docstring).
+
+    Batches are committed as they finish, so stopping (or reaching `limit`) and running again resumes
+    with the entries still stale.
+
+    :param db_path: (str) SQLite file (see LVGResultDB)
+    :param lvg_class: VariantLVG or a subclass (e.g. NCBIEnrichedLVG) [default: VariantLVG]
+    :param uta_schema: (str) schema to record with results [default: config UTA_SCHEMA]
+    :param processes: (int) worker processes [default: cpu count], each with its own UTA connection.
+        Use 1 to run in-process.
+    :param batch_size: (int) entries per batch sent to a worker
+    :param max_pending: (int) max number of batches in flight [default: 2 per process]
+    :param limit: (int) stop after about this many entries [default: None, i.e. all]
+    :param lvg_kwargs: (dict) keyword arguments for lvg_class (must be picklable if processes > 1)
+    :param report_every: (int) log progress every N batches
+    :return: (dict) stats: done, ok, failed, remaining, seconds, per_sec
+    """
+    db = LVGResultDB(db_path)
+    processes = processes or multiprocessing.cpu_count()
+    max_pending = max_pending or processes * 2
+
+    stats = {'done': 0, 'ok': 0, 'failed': 0, 'batches': 0,
+             'remaining': db.counts(lvg_class, uta_schema)['stale']}
+    started = time.time()
+
+    def _collect(results):
+        db.put_results(results, lvg_class, uta_schema)
+        failed = sum(1 for _, _, error in results if error is not None)
+        stats['done'] += len(results)
+        stats['failed'] += failed
+        stats['ok'] += len(results) - failed
+        stats['remaining'] -= len(results)
+        stats['batches'] += 1
+        if report_every and stats['batches'] % report_every == 0:
+            _report(stats, started)
+
+    def _batches():
+        # batches are read ahead of the pending results, so start each query after the last key handed out.
+        after = ''
+        queued = 0
+        while limit is None or queued < limit:
+            batch = next(db.stale(lvg_class, uta_schema, batch_size, after), None)
+            if not batch:
+                return
+            after = batch[-1]
+            queued += len(batch)
+            yield (batch, lvg_class, lvg_kwargs)
+
+    try:
+        if processes == 1:
+            for batch in _batches():
+                _collect(_compute_batch(batch))
+        else:
+            pool = multiprocessing.Pool(processes, initializer=_init_process)
+            try:
+                pending = deque()
+                for batch in _batches():
+                    if len(pending) >= max_pending:
+                        _collect(pending.popleft().get())
+                    pending.append(pool.apply_async(_compute_batch, (batch,)))
+                while pending:
+                    _collect(pending.popleft().get())
+            finally:
+                pool.terminate()
+                pool.join()
+    finally:
+        db.close()
+
+    return _report(stats, started)
+
+
+def _report(stats, started):
+    elapsed = time.time() - started
+    stats['seconds'] = elapsed
+    stats['per_sec'] = stats['done'] / elapsed if elapsed else 0.0
+    log.info('refresh: %(done)i done (%(ok)i ok, %(failed)i failed), %(remaining)i remaining, '
+             '%(seconds).1fs (%(per_sec).1f LVGs/s)', stats)
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Keep a SQLite store of LVG results up to date.')
+    parser.add_argument('--mode', default=VariantLVG.LVG_MODE, choices=[VariantLVG.LVG_MODE, 'ncbi_enriched'])
+    subparsers = parser.add_subparsers(dest='command')
+    add = subparsers.add_parser('add', help='add input HGVS strings (one per line) as pending entries')
+    add.add_argument('db')
+    add.add_argument('paths', nargs='+', help='text files (.gz, .bz2 or plain)')
+    status = subparsers.add_parser('status', help='count current, stale and failed entries')
+    status.add_argument('db')
+    run = subparsers.add_parser('run', help='recompute stale and failed entries')
+    run.add_argument('db')
+    run.add_argument('--processes', type=int, default=None)
+    run.add_argument('--batch-size', type=int, default=DEFAULT_BATCH_SIZE)
+    run.add_argument('--limit', type=int, default=None)
+    export = subparsers.add_parser('export', help='write results as JSON lines')
+    export.add_argument('db')
+    export.add_argument('-o', '--output', required=True)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    lvg_class = _lvg_class_for_mode(args.mode)
+    if args.command == 'add':
+        db = LVGResultDB(args.db)
+        added = 0
+        for path in args.paths:
+            with open_dump(path) as fh:
+                added += db.add(line.strip() for line in fh if line.strip())
+        print(json.dumps({'added': added, 'total': len(db)}))
+    elif args.command == 'status':
+        print(json.dumps(LVGResultDB(args.db).counts(lvg_class)))
+    elif args.command == 'run':
+        print(json.dumps(refresh_lvgs(args.db, lvg_class, processes=args.processes,
+                                      batch_size=args.batch_size, limit=args.limit)))
+    elif args.command == 'export':
+        with open(args.output, 'w') as out:
+            for result in LVGResultDB(args.db).iter_results():
+                out.write(result + '\n')
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
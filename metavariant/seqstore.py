@@ -0,0 +1,234 @@
+""" Provides SeqStore, a local memory-mapped store of transcript sequences built from FASTA dumps.
+
+A store is two files: the sequences concatenated without separators (e.g. "transcripts.seq"), and an
+index (e.g. "transcripts.seq.idx") with one "accession<tab>offset<tab>length" line per sequence.
+
+Build a store from (optionally gzipped) FASTA files:
+
+    python -m metavariant.seqstore build -o transcripts.seq GCF_000001405.39_GRCh38.p13_rna.fna.gz
+
+Then point metavariant at it (before import) so that UTA connections fetch sequences from it first:
+
+    export metavariant_SEQSTORE=/path/to/transcripts.seq
+"""
+
+import argparse
+import json
+import logging
+import mmap
+import os
+from collections import Counter
+
+from .config import PKGNAME
+from .pipeline import open_dump
+
+log = logging.getLogger(PKGNAME)
+
+INDEX_SUFFIX = '.idx'
+
+
+def iter_fasta(path):
+    """ Yields (accession, sequence) for each record of a FASTA file (plain, .gz or .bz2).
+    The accession is the first word of the header line.
+
+    :param path: (str)
+    """
+    ac = None
+    chunks = []
+    with open_dump(path) as fh:
+        for line in fh:
+            if line.startswith('>'):
+                if ac is not None:
+                    yield ac, ''.join(chunks)
+                words = line[1:].split()
+                ac = words[0] if words else ''
+                chunks = []
+            elif ac is not None:
+                chunks.append(line.strip())
+    if ac is not None:
+        yield ac, ''.join(chunks)
+
+
+def build_seqstore(fasta_paths, store_path):
+    """ Writes a SeqStore at store_path (plus its index) from the records of one or more FASTA files.
+    If an accession appears more than once, the first record wins; later ones are skipped (and counted),
+    so that no unreachable bases are written.
+
+    :param fasta_paths: (list) of FASTA file paths
+    :param store_path: (str) path of the sequence file to write
+    :return: (dict) stats: sequences, bases, duplicates
+    """
+    index = {}
+    offset = 0
+    duplicates = 0
+    with open(store_path, 'wb') as out:
+        for path in fasta_paths:
+            for ac, seq in iter_fasta(path):
+                if ac in index:
+                    log.debug('SeqStore %s: skipping another record of %s in %s', store_path, ac, path)
+                    duplicates += 1
+                    continue
+                data = seq.encode('ascii')
+                out.write(data)
+                index[ac] = (offset, len(data))
+                offset += len(data)
+
+    with open(store_path + INDEX_SUFFIX, 'w') as fh:
+        for ac, (ac_offset, length) in index.items():
+            fh.write('%s\t%i\t%i\n' % (ac, ac_offset, length))
+
+    log.info('SeqStore %s: %i sequences, %i bases (%i duplicate records skipped)', store_path, len(index), offset,
+             duplicates)
+    return {'sequences': len(index), 'bases': offset, 'duplicates': duplicates}
+
+
+class SeqStore(object):
+    """
+    SeqStore
+
+    Read-only access to a store written by build_seqstore. The sequence file is memory-mapped, so opening
+    a store only reads its index, and fetching a subsequence only touches the pages it spans.
+
+    Usage:
+
+        store = SeqStore('transcripts.seq')
+        store.fetch_seq('NM_000151.3', 10, 20)
+        store.view('NM_000151.3')         # zero-copy memoryview of the whole sequence (bytes)
+    """
+
+    def __init__(self, path):
+        self.path = path
+        self.index = {}
+        with open(path + INDEX_SUFFIX) as fh:
+            for line in fh:
+                ac, offset, length = line.rstrip('\n').split('\t')
+                self.index[ac] = (int(offset), int(length))
+
+        self._fh = open(path, 'rb')
+        if os.fstat(self._fh.fileno()).st_size:
+            self._mmap = mmap.mmap(self._fh.fileno(), 0, access=mmap.ACCESS_READ)
+        else:
+            self._mmap = None
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, ac):
+        return ac in self.index
+
+    def view(self, ac):
+        """ Returns a memoryview over the stored sequence for ac (no copy is made).
+
+        :raises: KeyError if ac is not in the store
+        """
+        offset, length = self.index[ac]
+        if not length:
+            return memoryview(b'')
+        return memoryview(self._mmap)[offset:offset + length]
+
+    def fetch_seq(self, ac, start_i=None, end_i=None):
+        """ Returns the sequence of ac (or its interbase slice start_i:end_i) as a string,
+        with the same signature as hgvs's seqfetcher.
+
+        :raises: KeyError if ac is not in the store
+        """
+        offset, length = self.index[ac]
+        start, end, _ = slice(start_i, end_i).indices(length)
+        if end <= start:
+            return ''
+        return self._mmap[offset + start:offset + end].decode('ascii')
+
+    def close(self):
+        if self._mmap is not None:
+            self._mmap.close()
+        self._fh.close()
+
+
+class SeqStoreFetcher(object):
+    """
+    SeqStoreFetcher
+
+    Drop-in replacement for an hgvs data provider's `seqfetcher`: answers from a SeqStore and falls
+    back to the original fetcher (remote) for accessions the store doesn't have, counting hits and misses.
+
+    Usage:
+
+        install_seqstore(hdp, SeqStore('transcripts.seq'))
+        hdp.seqfetcher.report()
+    """
+
+    def __init__(self, store, fallback=None):
+        self.store = store
+        self.fallback = fallback
+        self.hits = 0
+        self.misses = Counter()
+        self.source = 'SeqStore (%s)' % store.path
+
+    def fetch_seq(self, ac, start_i=None, end_i=None):
+        if ac in self.store:
+            self.hits += 1
+            return self.store.fetch_seq(ac, start_i, end_i)
+
+        self.misses[ac] += 1
+        if self.fallback is None:
+            raise KeyError('%s not in %s' % (ac, self.source))
+        return self.fallback.fetch_seq(ac, start_i, end_i)
+
+    def report(self, top=10):
+        """ Returns (and logs) hit/miss counts, including the most often missed accessions.
+
+        :param top: (int) number of missed accessions to list
+        :return: (dict)
+        """
+        total = self.hits + sum(self.misses.values())
+        report = {'hits': self.hits,
+                  'misses': sum(self.misses.values()),
+                  'hit_rate': self.hits / total if total else 0.0,
+                  'top_misses': self.misses.most_common(top),
+                 }
+        log.info('%s: %i hits, %i misses (hit rate %.2f)', self.source, report['hits'], report['misses'], report['hit_rate'])
+        return report
+
+
+def install_seqstore(hdp, store):
+    """ Makes hdp fetch sequences from store first (see SeqStoreFetcher).
+
+    :param hdp: hgvs data provider (with a `seqfetcher` attribute, e.g. a UTA connection)
+    :param store: SeqStore or path to one
+    :return: the installed SeqStoreFetcher
+    """
+    if not isinstance(store, SeqStore):
+        store = SeqStore(store)
+    hdp.seqfetcher = SeqStoreFetcher(store, fallback=getattr(hdp, 'seqfetcher', None))
+    return hdp.seqfetcher
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Build or inspect a memory-mapped transcript sequence store.')
+    subparsers = parser.add_subparsers(dest='command')
+    build = subparsers.add_parser('build', help='build a store from FASTA files (.gz, .bz2 or plain)')
+    build.add_argument('fasta', nargs='+')
+    build.add_argument('-o', '--output', required=True, help='sequence file to write (index is written alongside)')
+    info = subparsers.add_parser('info', help='summarize a store, or check it for accessions')
+    info.add_argument('store')
+    info.add_argument('accessions', nargs='*', help='accessions to look up')
+    args = parser.parse_args(argv)
+
+    logging.basicConfig()
+    if args.command == 'build':
+        print(json.dumps(build_seqstore(args.fasta, args.output)))
+    elif args.command == 'info':
+        store = SeqStore(args.store)
+        out = {'sequences': len(store),
+               'bases': sum(length for _, length in store.index.values()),
+              }
+        if args.accessions:
+            out['found'] = [ac for ac in args.accessions if ac in store]
+            out['missing'] = [ac for ac in args.accessions if ac not in store]
+        print(json.dumps(out))
+    else:
+        parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
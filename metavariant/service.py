@@ -0,0 +1,324 @@
+""" Provides LVGService, and a small JSON-over-HTTP server around it, so that several applications can
+share one set of UTA connections and warm caches instead of each embedding metavariant.
+
+Run the server:
+
+    python -m metavariant.service --port 8080 --pool-size 8 --cache-size 100000
+
+Endpoints (all GET, all answering JSON):
+
+    /lvg?hgvs=NM_000155.3:c.253C>T              VariantLVG result (as VariantLVG.to_json)
+    /lvg?hgvs=NM_000155.3:c.253C>T&mode=ncbi    NCBIEnrichedLVG result
+    /slang?hgvs=NM_014874.3:c.891C>T            VariantComponents posedit and posedit_slang
+    /health                                     UTA connection and worker pool status
+    /metrics                                    request, cache and coalescing counters
+
+Identical requests arriving while one is being computed wait for that computation instead of starting
+their own ("single-flight"); finished results are kept in a shared LRU cache.
+"""
+
+import argparse
+import json
+import logging
+import threading
+import time
+from collections import OrderedDict
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+from .components import VariantComponents
+from .config import PKGNAME
+from .exceptions import BadServiceRequest, CriticalHgvsError, RejectedSeqVar
+from .lvg import VariantLVG
+from .pool import HgvsPool
+
+log = logging.getLogger(PKGNAME)
+
+DEFAULT_CACHE_SIZE = 10000
+
+LVG_MODES = ('lvg', 'ncbi')
+
+
+class _Call(object):
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.result = None
+        self.error = None
+
+
+class SingleFlight(object):
+    """
+    SingleFlight
+
+    Runs at most one call per key at a time: callers asking for a key that is already being computed
+    wait for, and share, that call's result (or exception).
+
+    Usage:
+
+        flight = SingleFlight()
+        result = flight.do(key, compute)
+    """
+
+    def __init__(self):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.coalesced = 0
+
+    def do(self, key, func):
+        """ Returns func(), or the result of the call for key already in progress.
+
+        :param key: any hashable
+        :param func: callable taking no arguments
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            leader = call is None
+            if leader:
+                call = self._calls[key] = _Call()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            call.done.wait()
+        else:
+            try:
+                call.result = func()
+            except Exception as error:
+                call.error = error
+            finally:
+                with self._lock:
+                    del self._calls[key]
+                call.done.set()
+
+        if call.error is not None:
+            raise call.error
+        return call.result
+
+
+class ResultCache(object):
+    """ Thread-safe LRU cache of service results. """
+
+    def __init__(self, maxsize=DEFAULT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+        self._items = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def get(self, key):
+        with self._lock:
+            try:
+                value = self._items.pop(key)
+            except KeyError:
+                self.misses += 1
+                return None
+            self._items[key] = value
+            self.hits += 1
+            return value
+
+    def put(self, key, value):
+        if not self.maxsize:
+            return
+        with self._lock:
+            self._items.pop(key, None)
+            self._items[key] = value
+            while len(self._items) > self.maxsize:
+                self._items.popitem(last=False)
+
+    def stats(self):
+        return {'size': len(self._items), 'maxsize': self.maxsize, 'hits': self.hits, 'misses': self.misses}
+
+
+class LVGService(object):
+    """
+    LVGService
+
+    Answers LVG and slang requests with a shared HgvsPool, result cache and single-flight coalescing.
+    Used by the HTTP server (see make_server), but can also be called directly.
+
+    Any HgvsPool can be supplied, including one whose workers use a stub or replaying data provider
+    (see tests/fake_hgvs.py), so the service can be run and tested without a UTA server.
+
+    Usage:
+
+        service = LVGService(pool=HgvsPool(size=8))
+        service.lvg('NM_000155.3:c.253C>T')          # dict, as VariantLVG.to_json
+        service.slang('NM_014874.3:c.891C>T')
+        service.metrics()
+
+    Keywords:
+        pool (HgvsPool): workers (and so the bound on concurrent computations) [default: new HgvsPool]
+        cache_size (int): number of results to keep (0 disables caching) [default: 10000]
+    """
+
+    def __init__(self, pool=None, cache_size=DEFAULT_CACHE_SIZE):
+        self.pool = pool if pool is not None else HgvsPool()
+        self.cache = ResultCache(cache_size)
+        self.flight = SingleFlight()
+        self.started = time.time()
+        self.counters = {'requests': 0, 'computed': 0, 'errors': 0, 'compute_seconds': 0.0}
+        self._lock = threading.Lock()
+
+    def _count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] += amount
+
+    def _get(self, key, compute):
+        self._count('requests')
+        result = self.cache.get(key)
+        if result is not None:
+            return result
+        return self.flight.do(key, lambda: self._compute(key, compute))
+
+    def _compute(self, key, compute):
+        started = time.time()
+        try:
+            result = compute()
+        except Exception:
+            self._count('errors')
+            raise
+        finally:
+            self._count('compute_seconds', time.time() - started)
+        self._count('computed')
+        # a degraded (backend down) or partial (deadline reached) result is answered, but not kept.
+        if not (result.get('degraded') or result.get('partial')):
+            self.cache.put(key, result)
+        return result
+
+    def lvg(self, hgvs_text, mode='lvg'):
+        """ Returns the LVG result for hgvs_text as a dict (see VariantLVG.to_json), plus whether it is
+        `degraded` or `partial` (such results are not cached, so the next request computes them again).
+
+        :param hgvs_text: (str)
+        :param mode: (str) 'lvg' (VariantLVG) or 'ncbi' (NCBIEnrichedLVG) [default: 'lvg']
+        :raises: BadServiceRequest for unknown modes or unparseable input
+        """
+        if mode not in LVG_MODES:
+            raise BadServiceRequest('Unknown mode %r (expected one of %s)' % (mode, ', '.join(LVG_MODES)))
+        lvg_class = VariantLVG
+        if mode == 'ncbi':
+            from .ncbi import NCBIEnrichedLVG
+            lvg_class = NCBIEnrichedLVG
+
+        def compute():
+            try:
+                lex = lvg_class(hgvs_text, pool=self.pool)
+            except CriticalHgvsError as error:
+                raise BadServiceRequest('%s' % error)
+            result = lex._simple_dict()
+            result.update(degraded=lex.degraded, partial=lex.partial)
+            return result
+        return self._get((mode, hgvs_text), compute)
+
+    def slang(self, hgvs_text):
+        """ Returns {'hgvs_text', 'posedit', 'posedit_slang'} for hgvs_text (see VariantComponents).
+
+        :raises: BadServiceRequest for unparseable input or edit types without slang
+        """
+        def compute():
+            with self.pool.worker() as worker:
+                seqvar = VariantLVG.parse(hgvs_text, parser=worker.parser)
+            if seqvar is None:
+                raise BadServiceRequest('Cannot parse %r' % hgvs_text)
+            try:
+                comp = VariantComponents(seqvar)
+                return {'hgvs_text': hgvs_text, 'posedit': comp.posedit, 'posedit_slang': sorted(comp.posedit_slang)}
+            except (RejectedSeqVar, NotImplementedError) as error:
+                raise BadServiceRequest('%s' % error)
+        return self._get(('slang', hgvs_text), compute)
+
+    def health(self):
+        healthy = self.pool.is_healthy()
+        return {'status': 'ok' if healthy else 'unhealthy', 'pool': self.pool.stats()}
+
+    def metrics(self):
+        with self._lock:
+            out = dict(self.counters)
+        out['coalesced'] = self.flight.coalesced
+        out['cache'] = self.cache.stats()
+        out['pool'] = self.pool.stats()
+        out['uptime_seconds'] = time.time() - self.started
+        return out
+
+
+class LVGRequestHandler(BaseHTTPRequestHandler):
+    """ Maps GET requests onto the LVGService of the server (see make_server). """
+
+    def _send_json(self, status, obj):
+        body = json.dumps(obj).encode('utf-8')
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        service = self.server.service
+        url = urlparse(self.path)
+        params = dict((key, values[-1]) for key, values in parse_qs(url.query).items())
+        try:
+            if url.path == '/health':
+                health = service.health()
+                return self._send_json(200 if health['status'] == 'ok' else 503, health)
+            if url.path == '/metrics':
+                return self._send_json(200, service.metrics())
+            if url.path in ('/lvg', '/slang'):
+                if not params.get('hgvs'):
+                    raise BadServiceRequest('Missing "hgvs" parameter')
+                if url.path == '/lvg':
+                    return self._send_json(200, service.lvg(params['hgvs'], params.get('mode', 'lvg')))
+                return self._send_json(200, service.slang(params['hgvs']))
+            return self._send_json(404, {'error': 'Unknown path %s' % url.path})
+        except BadServiceRequest as error:
+            return self._send_json(400, {'error': '%s' % error})
+        except RuntimeError as error:
+            # e.g. timed out waiting for a free worker.
+            return self._send_json(503, {'error': '%s' % error})
+        except Exception as error:
+            log.exception('Error answering %s', self.path)
+            return self._send_json(500, {'error': '%r' % error})
+
+    def log_message(self, format, *args):
+        log.debug('%s - %s', self.address_string(), format % args)
+
+
+def make_server(service, host='127.0.0.1', port=8080):
+    """ Returns a threading HTTP server answering with service (call serve_forever() to run it).
+
+    :param service: LVGService
+    :param host: (str) [default: '127.0.0.1']
+    :param port: (int) 0 picks a free port (see server.server_address) [default: 8080]
+    """
+    server = ThreadingHTTPServer((host, port), LVGRequestHandler)
+    server.daemon_threads = True
+    server.service = service
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve VariantLVG results over HTTP (JSON).')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--pool-size', type=int, default=None, help='concurrent computations [default: UTA_POOL_MAX]')
+    parser.add_argument('--cache-size', type=int, default=DEFAULT_CACHE_SIZE)
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO)
+    pool = HgvsPool(size=args.pool_size) if args.pool_size else HgvsPool()
+    server = make_server(LVGService(pool=pool, cache_size=args.cache_size), args.host, args.port)
+    log.info('metavariant service listening on http://%s:%i', *server.server_address[:2])
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        pool.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,341 @@
+""" Provides LVGSynonymIndex, a multi-pattern index for finding the synonyms of many VariantLVGs in text in one pass,
+and ReverseSynonymIndex, for finding which variant a single synonym belongs to. """
+
+import gzip
+import logging
+import pickle
+
+from .config import PKGNAME
+
+log = logging.getLogger(PKGNAME)
+
+
+def lvg_synonyms(lex):
+    """ Returns the set of search terms for a VariantLVG: every hgvs_c/g/n/p string plus the
+    posedit_slang of each of its SequenceVariants (where slang is supported).
+
+    :param lex: VariantLVG or LiteLVG
+    :return: (set) of strings
+    """
+    terms = set(lex.hgvs_c + lex.hgvs_g + lex.hgvs_n + lex.hgvs_p)
+    for slang in lex.posedit_slang().values():
+        terms.update(slang)
+    return terms
+
+
+class LVGSynonymIndex(object):
+    """
+    LVGSynonymIndex
+
+    Compiles the synonyms of a set of VariantLVGs into a single Aho-Corasick automaton, so that a
+    document can be scanned once for all synonyms of all variants.
+
+    Variants can be added and removed at any time; the automaton's failure links are rebuilt lazily
+    on the next search after a change.
+
+    Usage:
+
+        index = LVGSynonymIndex([lex1, lex2])
+        index.add(lex3)
+        for variant_id, synonym, (start, end) in index.search(abstract_text):
+            ...
+        index.remove(lex1.hgvs_text)
+
+    Keywords:
+        whole_words (bool): only report matches not flanked by letters or digits [default: True]
+    """
+
+    def __init__(self, lvgs=None, whole_words=True):
+        self.whole_words = whole_words
+
+        # trie: node id -> {char: child node id}, plus the term ending at each node (or None).
+        self._goto = [{}]
+        self._term = [None]
+        self._fail = [0]
+        self._output_link = [0]
+
+        self._owners = {}       # term -> set of variant ids
+        self._variants = {}     # variant id -> set of terms
+        self._dead_nodes = 0
+        self._dirty = False
+
+        for lex in lvgs or []:
+            self.add(lex)
+
+    def __len__(self):
+        return len(self._variants)
+
+    def __contains__(self, variant_id):
+        return variant_id in self._variants
+
+    @property
+    def terms(self):
+        return list(self._owners.keys())
+
+    def add(self, lex, variant_id=None):
+        """ Adds all synonyms of a VariantLVG to the index under variant_id (default: lex.hgvs_text).
+
+        :param lex: VariantLVG
+        :param variant_id: any hashable identifier
+        """
+        if variant_id is None:
+            variant_id = lex.hgvs_text
+        self.add_terms(variant_id, lvg_synonyms(lex))
+
+    def add_terms(self, variant_id, terms):
+        """ Adds arbitrary search terms to the index under variant_id.
+
+        :param variant_id: any hashable identifier
+        :param terms: iterable of strings
+        """
+        known = self._variants.setdefault(variant_id, set())
+        for term in terms:
+            if not term or term in known:
+                continue
+            known.add(term)
+            if term not in self._owners:
+                self._owners[term] = set()
+                self._insert(term)
+            self._owners[term].add(variant_id)
+
+    def remove(self, variant_id):
+        """ Removes a variant (and any of its terms not shared with other variants) from the index.
+
+        :param variant_id: identifier used when the variant was added
+        :raises: KeyError if variant_id is not in the index
+        """
+        for term in self._variants.pop(variant_id):
+            owners = self._owners[term]
+            owners.discard(variant_id)
+            if not owners:
+                del self._owners[term]
+                self._term[self._find_node(term)] = None
+                self._dead_nodes += 1
+                self._dirty = True
+
+        # once most of the trie is dead weight, start over from the live terms.
+        if self._dead_nodes > len(self._owners):
+            self._rebuild_trie()
+
+    def _insert(self, term):
+        node = 0
+        for char in term:
+            child = self._goto[node].get(char)
+            if child is None:
+                child = len(self._goto)
+                self._goto.append({})
+                self._term.append(None)
+                self._fail.append(0)
+                self._output_link.append(0)
+                self._goto[node][char] = child
+            node = child
+        self._term[node] = term
+        self._dirty = True
+
+    def _find_node(self, term):
+        node = 0
+        for char in term:
+            node = self._goto[node][char]
+        return node
+
+    def _rebuild_trie(self):
+        self._goto = [{}]
+        self._term = [None]
+        self._fail = [0]
+        self._output_link = [0]
+        self._dead_nodes = 0
+        for term in self._owners:
+            self._insert(term)
+
+    def _build_links(self):
+        """ Computes failure links and output links breadth-first over the trie. """
+        goto, fail, term, output_link = self._goto, self._fail, self._term, self._output_link
+        queue = []
+        for child in goto[0].values():
+            fail[child] = 0
+            output_link[child] = 0
+            queue.append(child)
+
+        for node in queue:
+            for char, child in goto[node].items():
+                state = fail[node]
+                while state and char not in goto[state]:
+                    state = fail[state]
+                fail[child] = goto[state].get(char, 0)
+                target = fail[child]
+                output_link[child] = target if term[target] is not None else output_link[target]
+                queue.append(child)
+
+        self._dirty = False
+
+    def _is_word_boundary(self, text, start, end):
+        if start > 0 and text[start - 1].isalnum():
+            return False
+        if end < len(text) and text[end].isalnum():
+            return False
+        return True
+
+    def search(self, text):
+        """ Scans text once and returns every synonym occurrence as (variant_id, synonym, (start, end)),
+        ordered by position in text.
+
+        :param text: (str)
+        :return: (list) of tuples
+        """
+        if self._dirty:
+            self._build_links()
+
+        goto, fail, term, output_link = self._goto, self._fail, self._term, self._output_link
+        results = []
+        node = 0
+        for pos, char in enumerate(text):
+            while node and char not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(char, 0)
+
+            hit = node if term[node] is not None else output_link[node]
+            while hit:
+                found = term[hit]
+                end = pos + 1
+                start = end - len(found)
+                if not self.whole_words or self._is_word_boundary(text, start, end):
+                    for variant_id in self._owners[found]:
+                        results.append((variant_id, found, (start, end)))
+                hit = output_link[hit]
+
+        results.sort(key=lambda item: item[2])
+        return results
+
+
+# characters dropped when normalizing a synonym for lookup: p.(Arg85Cys) == p.Arg85Cys, and stray whitespace.
+_NORMALIZE_TABLE = str.maketrans('', '', '() \t\n')
+
+
+def normalize_synonym(term):
+    """ Returns the form of a synonym used as a ReverseSynonymIndex key (parentheses and whitespace removed).
+
+    :param term: (str) HGVS string or slang
+    :return: (str)
+    """
+    return term.translate(_NORMALIZE_TABLE)
+
+
+class ReverseSynonymIndex(object):
+    """
+    ReverseSynonymIndex
+
+    Maps any synonym of a variant -- an hgvs_c/g/n/p string or a posedit_slang term like 'C891T' --
+    back to the variant group(s) it belongs to, with one dict lookup. A group is one LVG result,
+    identified by its hgvs_text unless another id is given. Slang is often shared by several groups
+    (the same 'C891T' occurs in many genes), so lookups return a list.
+
+    Terms are normalized with normalize_synonym on the way in and on lookup. Groups can be added at
+    any time; save/load persist the whole index with pickle (load only files you trust).
+
+    Usage:
+
+        index = ReverseSynonymIndex([lex1, lex2])      # VariantLVGs or LiteLVGs
+        index.add(lex3)
+        index.lookup('NP_000146.2:p.Arg85Cys')         # ['NM_000155.3:c.253C>T']
+        index.save('synonyms.idx')
+        index = ReverseSynonymIndex.load('synonyms.idx')
+    """
+
+    FORMAT_VERSION = 1
+
+    def __init__(self, lvgs=None):
+        self.groups = []        # group number -> group id
+        self._numbers = {}      # group id -> group number
+        self._terms = {}        # normalized term -> group number, or tuple of them when shared
+
+        for lex in lvgs or []:
+            self.add(lex)
+
+    def __len__(self):
+        return len(self._terms)
+
+    def __contains__(self, term):
+        return normalize_synonym(term) in self._terms
+
+    def _group_number(self, group_id):
+        number = self._numbers.get(group_id)
+        if number is None:
+            number = self._numbers[group_id] = len(self.groups)
+            self.groups.append(group_id)
+        return number
+
+    def add(self, lex, group_id=None):
+        """ Adds all synonyms of an LVG result (see lvg_synonyms) under group_id (default: lex.hgvs_text).
+
+        :param lex: VariantLVG or LiteLVG
+        :param group_id: any hashable identifier
+        """
+        self.add_terms(lex.hgvs_text if group_id is None else group_id, lvg_synonyms(lex))
+
+    def add_terms(self, group_id, terms):
+        """ Adds arbitrary terms to the index under group_id.
+
+        :param group_id: any hashable identifier
+        :param terms: iterable of strings
+        """
+        number = self._group_number(group_id)
+        index = self._terms
+        for term in terms:
+            key = normalize_synonym(term)
+            if not key:
+                continue
+            current = index.get(key)
+            if current is None:
+                index[key] = number
+            elif isinstance(current, tuple):
+                if number not in current:
+                    index[key] = current + (number,)
+            elif current != number:
+                index[key] = (current, number)
+
+    def lookup(self, term):
+        """ Returns the ids of the groups term is a synonym of (empty if none).
+
+        :param term: (str) HGVS string or slang
+        :return: (list)
+        """
+        # most terms arrive already normalized, so only normalize after a miss.
+        found = self._terms.get(term)
+        if found is None:
+            found = self._terms.get(term.translate(_NORMALIZE_TABLE))
+            if found is None:
+                return []
+        if isinstance(found, tuple):
+            return [self.groups[number] for number in found]
+        return [self.groups[found]]
+
+    def lookup_many(self, terms):
+        """ Returns {term: [group ids]} for each of terms. """
+        return dict((term, self.lookup(term)) for term in terms)
+
+    def save(self, path):
+        """ Writes the index to path (pickle, gzipped if path ends in .gz). """
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'wb') as fh:
+            pickle.dump((self.FORMAT_VERSION, self.groups, self._terms), fh, protocol=pickle.HIGHEST_PROTOCOL)
+        log.info('ReverseSynonymIndex: %i terms, %i groups written to %s', len(self._terms), len(self.groups), path)
+
+    @classmethod
+    def load(cls, path):
+        """ Reads an index written by save.
+
+        :param path: (str)
+        :return: ReverseSynonymIndex
+        :raises: ValueError if the file was written by an incompatible version
+        """
+        opener = gzip.open if path.endswith('.gz') else open
+        with opener(path, 'rb') as fh:
+            version, groups, terms = pickle.load(fh)
+        if version != cls.FORMAT_VERSION:
+            raise ValueError('%s has ReverseSynonymIndex format %r (expected %r)' % (path, version, cls.FORMAT_VERSION))
+
+        index = cls()
+        index.groups = groups
+        index._numbers = dict((group_id, number) for number, group_id in enumerate(groups))
+        index._terms = terms
+        return index
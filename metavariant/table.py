@@ -0,0 +1,282 @@
+""" Provides ComponentsTable, a columnar (NumPy-backed) equivalent of many VariantComponents objects. """
+
+import logging
+from string import Formatter
+
+import numpy as np
+
+from .components import (VariantComponents, amino_acid_letters, dna_nucleotides, official_to_slang_map,
+                         posedit_templates, protein_long_names, protein_posedit_templates, lowercase_all_the_keys)
+from .config import PKGNAME
+
+log = logging.getLogger(PKGNAME)
+
+COMPONENT_FIELDS = ('seqtype', 'edittype', 'ref', 'pos', 'alt', 'fs_pos', 'dupx')
+
+# columns written by VariantComponents.to_mysql_dict, in executemany order.
+MYSQL_COLUMNS = ('Ref', 'Alt', 'SeqType', 'EditType', 'Pos')
+
+_mysql_column_fields = {'Ref': 'ref',
+                        'Alt': 'alt',
+                        'SeqType': 'seqtype',
+                        'EditType': 'edittype',
+                        'Pos': 'pos',
+                        'FS_Pos': 'fs_pos',
+                        'DupX': 'dupx',
+                       }
+
+# FS_Pos and DupX only apply to one edittype each (as in VariantComponents.to_mysql_dict).
+_mysql_column_edittypes = {'FS_Pos': 'FS', 'DupX': 'DUP'}
+
+# lookup table of unicode code points (< 128) that imply a protein sequence.
+_protein_code_points = np.zeros(128, dtype=bool)
+for _char in amino_acid_letters.difference(dna_nucleotides):
+    _protein_code_points[ord(_char)] = True
+
+
+def _str_column(values):
+    """ Returns values as a stripped NumPy unicode array (at least 1 char wide). """
+    column = np.array(['' if val is None else '%s' % val for val in values], dtype=str)
+    if column.dtype.itemsize == 0:
+        column = column.astype('<U1')
+    return np.char.strip(column)
+
+
+def infer_seqtypes(ref, alt):
+    """ Vectorized equivalent of VariantComponents._infer_seqtype over arrays of ref and alt.
+
+    :param ref: NumPy unicode array
+    :param alt: NumPy unicode array
+    :return: NumPy unicode array of 'n', 'p' or ''
+    """
+    refalt = np.char.upper(np.char.add(ref, alt))
+    out = np.full(len(refalt), '', dtype='<U1')
+    if not len(refalt):
+        return out
+
+    width = refalt.dtype.itemsize // 4
+    code_points = refalt.view(np.uint32).reshape(len(refalt), width)
+    is_protein = _protein_code_points[np.minimum(code_points, 127)].any(axis=1)
+
+    out[is_protein] = 'p'
+    out[np.char.find(refalt, 'U') >= 0] = 'n'
+    return out
+
+
+class ComponentsTable(object):
+    """
+    ComponentsTable
+
+    Holds the components (seqtype, edittype, ref, pos, alt, fs_pos, dupx) of many variants as NumPy
+    arrays, performing the same normalization and seqtype inference as VariantComponents in bulk.
+
+    Intended for loading millions of rows from the pubtator m2p_* MySQL tables without creating a
+    VariantComponents object per row.
+
+    Usage:
+
+        table = ComponentsTable.from_rows(cursor.fetchall())
+        table.posedit
+        table.posedit_slang()
+        cursor.executemany(insert_sql, table.to_mysql_tuples())
+
+        # back to objects, if needed:
+        comp = table[0]
+    """
+
+    def __init__(self, **columns):
+        lengths = set()
+        for field in COMPONENT_FIELDS:
+            column = _str_column(columns.get(field, []))
+            setattr(self, field, column)
+            lengths.add(len(column))
+
+        length = max(lengths)
+        for field in COMPONENT_FIELDS:
+            if len(getattr(self, field)) == 0 and length:
+                setattr(self, field, np.full(length, '', dtype='<U1'))
+            elif len(getattr(self, field)) != length:
+                raise ValueError('ComponentsTable columns must all be the same length')
+
+        # normalize DELINS to INDEL (synonymous)
+        self.edittype = np.char.upper(self.edittype)
+        self.edittype = np.where(self.edittype == 'DELINS', 'INDEL', self.edittype)
+
+        missing = self.seqtype == ''
+        if missing.any():
+            self.seqtype[missing] = infer_seqtypes(self.ref[missing], self.alt[missing])
+
+    @classmethod
+    def from_rows(cls, rows):
+        """ Builds a table from dictionaries shaped like MySQL m2p_* rows (keys are case-insensitive).
+
+        :param rows: iterable of dicts
+        :return: ComponentsTable
+        """
+        rows = [lowercase_all_the_keys(row) for row in rows]
+        return cls(**dict((field, [row.get(field, '') for row in rows]) for field in COMPONENT_FIELDS))
+
+    @classmethod
+    def from_components(cls, components):
+        """ Builds a table from a list of VariantComponents objects.
+
+        :param components: list of VariantComponents
+        :return: ComponentsTable
+        """
+        return cls(**dict((field, [getattr(comp, field, '') for comp in components]) for field in COMPONENT_FIELDS))
+
+    def __len__(self):
+        return len(self.seqtype)
+
+    def __getitem__(self, idx):
+        """ Returns the row at idx as a VariantComponents object. """
+        return VariantComponents(**dict((field, str(getattr(self, field)[idx])) for field in COMPONENT_FIELDS))
+
+    def to_components(self):
+        return [self[idx] for idx in range(len(self))]
+
+    @property
+    def posedit(self):
+        """ Returns an object array of posedits (or None where VariantComponents.posedit would not produce one).
+
+        Protein rows get the long-form amino acid names; other rows are built from their components
+        according to edittype.
+        """
+        out = np.full(len(self), None, dtype=object)
+
+        is_protein = self.seqtype == 'p'
+        if is_protein.any():
+            ref = _long_amino_names(self.ref[is_protein])
+            alt, alt_known = _long_amino_seqs(self.alt[is_protein])
+            edittype = self.edittype[is_protein]
+            posedits = np.full(len(ref), None, dtype=object)
+
+            # edittypes without a template of their own are treated as substitutions (as in VariantComponents).
+            templated = np.isin(edittype, list(protein_posedit_templates))
+            for prot_edittype, template in protein_posedit_templates.items():
+                rows = (edittype == prot_edittype) | ((prot_edittype == 'SUB') & ~templated)
+                if rows.any():
+                    posedits[rows] = _fill_template(template, ref=ref[rows], pos=self.pos[is_protein][rows], alt=alt[rows])
+
+            fs_pos = self.fs_pos[is_protein]
+            with_fs_pos = (edittype == 'FS') & (fs_pos != '')
+            if with_fs_pos.any():
+                posedits[with_fs_pos] = np.char.add(posedits[with_fs_pos].astype(str),
+                                                    np.char.add('Ter', fs_pos[with_fs_pos])).astype(object)
+
+            # VariantComponents raises KeyError for these; leave them empty.
+            posedits[(ref == '') | ~alt_known] = None
+            out[is_protein] = posedits
+
+        for edittype, template in posedit_templates.items():
+            rows = (~is_protein) & (self.edittype == edittype)
+            if rows.any():
+                out[rows] = _fill_template(template, pos=self.pos[rows], ref=self.ref[rows], alt=self.alt[rows])
+
+        return out
+
+    def posedit_slang(self):
+        """ Returns a list (one entry per row) of posedit slang lists, or None for rows that
+        VariantComponents.posedit_slang could not handle (unsupported edittype or unknown amino acid).
+        """
+        posedit = self.posedit
+        has_posedit = np.array([pe is not None for pe in posedit], dtype=bool)
+        posedit = np.array([pe or '' for pe in posedit], dtype=str)
+        short = np.char.add(np.char.add(self.ref, self.pos), self.alt)
+
+        is_protein = self.seqtype == 'p'
+        is_dna = ~is_protein
+        slang_rules = ((is_protein & has_posedit, self._slang_protein(posedit, short)),
+                       (is_dna & (self.edittype == 'SUB') & has_posedit, self._slang_SUB(posedit, short)),
+                       (is_dna & (self.edittype == 'DEL'), [np.char.add(self.pos, 'del')]),
+                       (is_dna & (self.edittype == 'DUP'), [np.char.add(self.pos, 'dup')]),
+                       (is_dna & np.isin(self.edittype, ['INDEL', 'INS']), []),
+                      )
+
+        out = [None] * len(self)
+        for rows, columns in slang_rules:
+            for idx in np.flatnonzero(rows):
+                out[idx] = list(set(str(column[idx]) for column in columns))
+        return out
+
+    @staticmethod
+    def _slang_protein(posedit, short):
+        # see VariantComponents._posedit_slang_protein
+        posedit = np.char.replace(np.char.replace(posedit, '(', ''), ')', '')
+        columns = [np.char.replace(posedit, 'Ter', item) for item in official_to_slang_map['Ter']]
+
+        # e.g. Ser1655TyrfsTer produces "Ser1655Tyrfs"; Lys2569Gly produces "K2569G"
+        before_fs, fs, _ = np.char.partition(posedit, 'fs').T
+        columns.append(np.where(fs == 'fs', np.char.add(before_fs, fs), short))
+        return columns
+
+    @staticmethod
+    def _slang_SUB(posedit, short):
+        # see VariantComponents._posedit_slang_SUB
+        columns = [np.char.replace(posedit, '>', slang_symbol) for slang_symbol in official_to_slang_map['>']]
+        columns.append(short)
+        return columns
+
+    def to_mysql_tuples(self, columns=MYSQL_COLUMNS):
+        """ Returns one tuple per row, with values in the order of columns, ready for cursor.executemany.
+
+        Columns may include 'FS_Pos' and 'DupX'; as with VariantComponents.to_mysql_dict, these are only
+        set for FS and DUP rows respectively (None elsewhere).
+
+        :param columns: sequence of MySQL column names
+        :return: list of tuples
+        """
+        values = []
+        for column in columns:
+            field_values = getattr(self, _mysql_column_fields[column]).astype(object)
+            if column in _mysql_column_edittypes:
+                field_values[self.edittype != _mysql_column_edittypes[column]] = None
+            values.append(field_values.tolist())
+        return list(zip(*values))
+
+    def to_mysql_dicts(self):
+        """ Returns the equivalent of VariantComponents.to_mysql_dict() for every row. """
+        out = []
+        for row, edittype, fs_pos, dupx in zip(self.to_mysql_tuples(), self.edittype.tolist(),
+                                               self.fs_pos.tolist(), self.dupx.tolist()):
+            outd = dict(zip(MYSQL_COLUMNS, row))
+            if edittype == 'FS':
+                outd['FS_Pos'] = fs_pos
+            if edittype == 'DUP':
+                outd['DupX'] = dupx
+            out.append(outd)
+        return out
+
+
+_short_amino_codes = np.array(sorted(protein_long_names), dtype=str)
+_long_amino_codes = np.array([protein_long_names[code] for code in _short_amino_codes], dtype=str)
+
+
+def _long_amino_names(short_names):
+    """ Maps an array of single-letter amino acid codes to their long names ('' where unknown). """
+    idx = np.minimum(np.searchsorted(_short_amino_codes, short_names), len(_short_amino_codes) - 1)
+    return np.where(_short_amino_codes[idx] == short_names, _long_amino_codes[idx], '')
+
+
+def _long_amino_seqs(short_seqs):
+    """ Maps an array of single-letter amino acid sequences to long names.
+
+    :return: (array of long-name sequences, boolean array of whether every code was known)
+    """
+    long_seqs = []
+    known = []
+    for seq in short_seqs.tolist():
+        names = [protein_long_names.get(short, '') for short in seq]
+        known.append(all(names))
+        long_seqs.append(''.join(names))
+    return np.array(long_seqs, dtype=str), np.array(known, dtype=bool)
+
+
+def _fill_template(template, **columns):
+    """ Vectorized str.format of a posedit template over equal-length arrays of fields. """
+    out = None
+    for literal, field, _, _ in Formatter().parse(template):
+        for part in (literal, columns[field] if field else ''):
+            if len(part):
+                out = part if out is None else np.char.add(out, part)
+    return out.astype(object)
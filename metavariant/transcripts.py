@@ -0,0 +1,154 @@
+""" Transcript selection policies, used by VariantLVG to limit which transcripts a genomic variant is mapped onto.
+
+A policy is any callable taking a list of transcript accessions (e.g. 'NM_000151.3') and returning
+the list of those to keep. Built-in policies can be referred to by name:
+
+    all       -- keep everything (default)
+    latest    -- keep only the latest version of each accession
+    nm_only   -- keep only RefSeq curated mRNA (NM_) transcripts
+
+Policies needing configuration are created with SelectTranscripts (e.g. MANE / RefSeq Select
+lists) and top_n.
+"""
+
+import logging
+
+from .config import PKGNAME
+
+log = logging.getLogger(PKGNAME)
+
+# preferred transcript prefixes, best first (see transcript_rank).
+TRANSCRIPT_PREFIX_RANK = ('NM_', 'NR_', 'XM_', 'XR_')
+
+
+def split_accession(ac):
+    """ Splits a versioned accession into (accession, version).
+
+    :param ac: (str) e.g. 'NM_000151.3'
+    :return: (str, int) e.g. ('NM_000151', 3); version is 0 if there is none
+    """
+    base, _, version = ac.partition('.')
+    try:
+        return base, int(version)
+    except ValueError:
+        return base, 0
+
+
+def all_transcripts(transcripts):
+    return list(transcripts)
+
+
+def latest_versions(transcripts):
+    """ Keeps only the highest version of each transcript accession. """
+    latest = {}
+    for ac in transcripts:
+        base, version = split_accession(ac)
+        if base not in latest or version > split_accession(latest[base])[1]:
+            latest[base] = ac
+    return [ac for ac in transcripts if latest[split_accession(ac)[0]] == ac]
+
+
+def nm_only(transcripts):
+    """ Keeps only RefSeq curated mRNA (NM_) transcripts. """
+    return [ac for ac in transcripts if ac.startswith('NM_')]
+
+
+def transcript_rank(ac):
+    """ Sort key putting the most useful transcripts first: NM_ before NR_, XM_ and XR_, then latest versions. """
+    base, version = split_accession(ac)
+    prefix = base[:3]
+    prefix_rank = TRANSCRIPT_PREFIX_RANK.index(prefix) if prefix in TRANSCRIPT_PREFIX_RANK else len(TRANSCRIPT_PREFIX_RANK)
+    return (prefix_rank, -version, base)
+
+
+def top_n(n):
+    """ Returns a policy keeping at most n transcripts, preferring (in order) NM_ over NR_ over XM_ over
+    XR_ accessions, then the latest versions.
+
+    :param n: (int)
+    :return: policy function
+    """
+    def policy(transcripts):
+        return sorted(transcripts, key=transcript_rank)[:n]
+    policy.__name__ = 'top_%i' % n
+    return policy
+
+
+class SelectTranscripts(object):
+    """
+    SelectTranscripts
+
+    Policy keeping only transcripts on a "select" list, such as MANE Select or RefSeq Select.
+    Accessions are matched without their version unless versioned=True.
+
+    The list can be supplied directly or loaded from a local file: either one accession per line,
+    or a tab-separated file with a header (e.g. the MANE summary file), in which case the
+    `column` column is used.
+
+    Usage:
+
+        policy = SelectTranscripts('MANE.GRCh38.v1.3.summary.txt')
+        lex = VariantLVG('NC_000019.9:g.1399792C>T', transcript_policy=policy)
+
+    Keywords:
+        accessions (iterable): accessions to select (in addition to any read from path)
+        versioned (bool): match accessions including their version [default: False]
+        column (str): column to read from a tab-separated file [default: 'RefSeq_nuc']
+    """
+
+    def __init__(self, path=None, accessions=None, versioned=False, column='RefSeq_nuc'):
+        self.versioned = versioned
+        self.accessions = set()
+        for ac in accessions or []:
+            self.accessions.add(self._key(ac))
+        if path:
+            self.load(path, column)
+
+    def _key(self, ac):
+        return ac if self.versioned else split_accession(ac)[0]
+
+    def load(self, path, column='RefSeq_nuc'):
+        """ Reads accessions from path (see class docstring for formats).
+
+        :param path: (str)
+        :param column: (str) column name for tab-separated files
+        """
+        col_idx = 0
+        with open(path) as fh:
+            for line in fh:
+                fields = line.rstrip('\n').split('\t')
+                if line.startswith('#') or column in fields:
+                    fields[0] = fields[0].lstrip('#')
+                    if column in fields:
+                        col_idx = fields.index(column)
+                    continue
+                if len(fields) > col_idx and fields[col_idx].strip():
+                    self.accessions.add(self._key(fields[col_idx].strip()))
+        log.debug('SelectTranscripts: %i accessions loaded from %s', len(self.accessions), path)
+
+    def __call__(self, transcripts):
+        return [ac for ac in transcripts if self._key(ac) in self.accessions]
+
+
+TRANSCRIPT_POLICIES = {'all': all_transcripts,
+                       'latest': latest_versions,
+                       'nm_only': nm_only,
+                      }
+
+
+def get_transcript_policy(policy=None):
+    """ Returns a transcript policy function.
+
+    :param policy: None (all), name from TRANSCRIPT_POLICIES, or a callable
+    :return: callable
+    :raises: ValueError for unknown policy names
+    """
+    if policy is None:
+        return all_transcripts
+    if callable(policy):
+        return policy
+    try:
+        return TRANSCRIPT_POLICIES[policy]
+    except KeyError:
+        raise ValueError('Unknown transcript policy %r (expected one of %s, or a callable)' %
+                         (policy, ', '.join(sorted(TRANSCRIPT_POLICIES))))
@@ -0,0 +1,195 @@
+""" Fake hgvs data provider, mappers and an HgvsPool using them, for testing metavariant without UTA. """
+
+import threading
+import time
+
+import hgvs.parser
+from bioutils.assemblies import make_ac_name_map
+from hgvs.exceptions import HGVSDataNotAvailableError
+
+from metavariant.pool import HgvsPool, HgvsWorker
+
+parser = hgvs.parser.Parser()
+
+VAR_C = 'NM_000155.3:c.253C>T'
+VAR_G = 'NC_000009.12:g.34648170C>T'
+TRANSCRIPTS = ['NM_000155.3', 'NM_000155.2', 'NR_026560.1']
+
+
+class FakeMapper(object):
+    """ Maps every variant onto the same small set of variants, optionally sleeping in each call. """
+
+    assembly_name = 'GRCh38'
+
+    def __init__(self, delay=0, tracker=None):
+        self.delay = delay
+        self.tracker = tracker
+
+    def _call(self, hgvs_text):
+        if self.tracker:
+            self.tracker.enter()
+        try:
+            time.sleep(self.delay)
+            return parser.parse_hgvs_variant(hgvs_text)
+        finally:
+            if self.tracker:
+                self.tracker.exit()
+
+    def c_to_g(self, var_c):
+        return self._call(VAR_G)
+
+    def c_to_n(self, var_c):
+        return self._call('%s:n.300C>T' % var_c.ac)
+
+    def c_to_p(self, var_c):
+        return self._call('NP_000146.2:p.(Arg85Cys)')
+
+    def g_to_c(self, var_g, tx_ac):
+        return self._call('%s:c.253C>T' % tx_ac)
+
+    def g_to_n(self, var_g, tx_ac):
+        return self._call('%s:n.300C>T' % tx_ac)
+
+    def relevant_transcripts(self, var_g):
+        time.sleep(self.delay)
+        return list(TRANSCRIPTS)
+
+
+# reference sequence of every accession, as far as FakeHdp knows: g.21_25 is a run of five A.
+FAKE_SEQ = 'ATGC' * 5 + 'AAAAA' + 'GCTG' * 20
+
+# the one transcript FakeHdp has alignments for: a single exon of NM_000151.3 (G6PC1).
+TX_INFO = {'hgnc': 'G6PC1', 'cds_start_i': 10, 'cds_end_i': 90, 'tx_ac': 'NM_000151.3',
+           'alt_ac': 'NC_000017.11', 'alt_aln_method': 'splign'}
+TX_EXONS = [{'ord': 0, 'tx_start_i': 0, 'tx_end_i': 100, 'alt_start_i': 1000, 'alt_end_i': 1100,
+             'alt_strand': 1, 'cigar': '100='}]
+
+TX_IDENTITY_FIELDS = ('tx_ac', 'alt_ac', 'alt_aln_method', 'cds_start_i', 'cds_end_i', 'lengths', 'hgnc')
+
+
+class FakeRow(tuple):
+    """ A get_tx_identity_info row, readable by position or by column name (like psycopg2's DictRow). """
+
+    def __getitem__(self, key):
+        if isinstance(key, str):
+            key = TX_IDENTITY_FIELDS.index(key)
+        return tuple.__getitem__(self, key)
+
+
+class FakeHdp(object):
+    """ Just enough of a UTA data provider to use metavariant without a database: assembly maps, FAKE_SEQ
+    for every accession, the genes of the NM_000155 transcripts (GALT) and of NM_000151.3 (G6PC1), and
+    the alignment of NM_000151.3 (TX_INFO, TX_EXONS). Counts its queries.
+
+    Keywords:
+        healthy (bool): whether the pool's health check query succeeds [default: True]
+        bulk_rows (dict): rows returned by _fetchall, by SQL [default: None, i.e. bulk queries fail]
+    """
+
+    def __init__(self, healthy=True, bulk_rows=None):
+        self.healthy = healthy
+        self.bulk_rows = bulk_rows
+        self.queries = 0
+
+    def get_assembly_map(self, assembly_name):
+        return make_ac_name_map(assembly_name)
+
+    def data_version(self):
+        return 'uta_test'
+
+    def schema_version(self):
+        return '1.1'
+
+    def _fetchone(self, sql, *args):
+        if not self.healthy:
+            raise Exception('database is down')
+        return [1]
+
+    def _fetchall(self, sql, *args):
+        self.queries += 1
+        if self.bulk_rows is None:
+            raise HGVSDataNotAvailableError('no bulk queries here')
+        return self.bulk_rows[sql]
+
+    def get_seq(self, ac, start_i=None, end_i=None):
+        return FAKE_SEQ[start_i:end_i]
+
+    def get_tx_identity_info(self, tx_ac):
+        self.queries += 1
+        if tx_ac.startswith('NM_000155.'):
+            return FakeRow((tx_ac, tx_ac, 'transcript', 0, 100, [100], 'GALT'))
+        if tx_ac == TX_INFO['tx_ac']:
+            return FakeRow((tx_ac, tx_ac, 'transcript', 10, 90, [100], 'G6PC1'))
+        raise HGVSDataNotAvailableError('No transcript definition for %s' % tx_ac)
+
+    def get_tx_for_gene(self, gene):
+        self.queries += 1
+        return [TX_INFO, dict(TX_INFO, alt_ac='NC_000017.10')] if gene == TX_INFO['hgnc'] else []
+
+    def get_tx_info(self, tx_ac, alt_ac, alt_aln_method):
+        self.queries += 1
+        return TX_INFO
+
+    def get_tx_exons(self, tx_ac, alt_ac, alt_aln_method):
+        self.queries += 1
+        return TX_EXONS
+
+
+class FakeMappers(object):
+
+    def __init__(self, mapper):
+        self.mapper = mapper
+
+    def get(self, assembly_name=None):
+        return self.mapper
+
+    def for_variant(self, seqvar, assembly_name=None):
+        return self.mapper
+
+
+class ConcurrencyTracker(object):
+    """ Records the largest number of calls in progress at once. """
+
+    def __init__(self):
+        self.current = 0
+        self.peak = 0
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def enter(self):
+        with self._lock:
+            self.current += 1
+            self.calls += 1
+            self.peak = max(self.peak, self.current)
+
+    def exit(self):
+        with self._lock:
+            self.current -= 1
+
+
+class FakePool(HgvsPool):
+
+    def __init__(self, size=4, delay=0, tracker=None):
+        self.delay = delay
+        self.tracker = tracker
+        HgvsPool.__init__(self, size=size, hdp=FakeHdp())
+
+    def _new_worker(self):
+        worker = HgvsWorker(self.hdp, parser=parser)
+        worker.mappers = FakeMappers(FakeMapper(self.delay, self.tracker))
+        return worker
+
+
+class DeadMapper(FakeMapper):
+    """ A mapper whose database connection is gone. """
+
+    def _call(self, hgvs_text):
+        raise OSError('connection refused')
+
+
+class DeadPool(FakePool):
+
+    def _new_worker(self):
+        worker = FakePool._new_worker(self)
+        worker.mappers = FakeMappers(DeadMapper())
+        return worker
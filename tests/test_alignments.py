@@ -0,0 +1,44 @@
+import unittest
+
+from metavariant.alignments import AlignmentCache
+from metavariant.assembly import MapperRegistry
+
+from fake_hgvs import FakeHdp
+
+
+class TestAlignmentCache(unittest.TestCase):
+
+    def test_shared_between_mappers(self):
+        hdp = FakeHdp()
+        cache = AlignmentCache(maxsize=10)
+        mapper1 = MapperRegistry(hdp, alignment_cache=cache).get()
+        mapper2 = MapperRegistry(hdp, alignment_cache=cache).get()
+
+        aln1 = mapper1._fetch_AlignmentMapper(tx_ac='NM_000151.3', alt_ac='NC_000017.11', alt_aln_method='splign')
+        aln2 = mapper2._fetch_AlignmentMapper(tx_ac='NM_000151.3', alt_ac='NC_000017.11', alt_aln_method='splign')
+        assert aln1 is aln2
+        assert hdp.queries == 2
+        assert cache.stats()['hits'] == 1
+        assert cache.stats()['misses'] == 1
+
+    def test_bounded(self):
+        hdp = FakeHdp()
+        cache = AlignmentCache(maxsize=2)
+        for alt_ac in ('NC_1', 'NC_2', 'NC_3'):
+            cache.get(hdp, 'NM_000151.3', alt_ac, 'splign')
+        assert len(cache) == 2
+        assert ('NM_000151.3', 'NC_1', 'splign') not in cache
+
+    def test_prefetch_genes(self):
+        hdp = FakeHdp()
+        cache = AlignmentCache()
+        assert cache.prefetch_genes(hdp, ['G6PC1', 'NOTAGENE']) == 2
+        assert ('NM_000151.3', 'NC_000017.11', 'splign') in cache
+        assert ('NM_000151.3', 'NM_000151.3', 'transcript') in cache
+        # GRCh37 alignment is not loaded for a GRCh38 prefetch.
+        assert ('NM_000151.3', 'NC_000017.10', 'splign') not in cache
+
+        # tx_info came from the gene query; exons and identity info took one query each.
+        assert hdp.queries == 4
+        cache.get(hdp, 'NM_000151.3', 'NC_000017.11', 'splign')
+        assert hdp.queries == 4
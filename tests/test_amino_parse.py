@@ -2,7 +2,9 @@ from __future__ import absolute_import, print_function
 
 import unittest
 
-from metavariant.components import VariantComponents, findall_aminochanges_in_text, parse_components_from_aminochange
+from metavariant.components import (VariantComponents, findall_aminochanges_in_text, findall_aminochanges_with_offsets,
+                                    parse_components_from_aminochange, parse_components_from_aminochanges)
+from metavariant.exceptions import RejectedSeqVar
 
 
 AA_synonyms = {'Leu653Arg': ['L653R', 'Leu653Arg', '(Leu653Arg)'],
@@ -22,6 +24,14 @@ class TestAminoChangeSearch(unittest.TestCase):
             for synonym in AA_synonyms[a_chg]:
                 assert synonym in found
 
+    def test_findall_frameshifts_and_stops_whole(self):
+        text = 'Patients carried Arg97ProfsTer23, R97* or p.(Glu1000_Glu1001del) but not AR97P or R97Px.'
+        found = findall_aminochanges_in_text(text)
+        assert found == ['Arg97ProfsTer23', 'R97*', 'p.(Glu1000_Glu1001del)']
+        for aminochange, start, end in findall_aminochanges_with_offsets(text):
+            assert text[start:end] == aminochange
+            assert parse_components_from_aminochange(aminochange) is not None
+
     def test_parse_components_from_aminochange(self):
         for a_chg_list in AA_synonyms.values():
             for a_chg in a_chg_list:
@@ -34,3 +44,67 @@ class TestAminoChangeSearch(unittest.TestCase):
         assert 'L653R' in comp.posedit_slang
 
 
+
+class TestAminoChangeGrammar(unittest.TestCase):
+
+    def test_unparseable_returns_None(self):
+        for bad in ['V777', 'Gen123Abc', 'boogers', '', 'Leu653Arg)', '(Leu653Arg']:
+            assert parse_components_from_aminochange(bad) is None
+
+    def test_substitutions_and_stops(self):
+        for achg in ['Arg97Ter', 'R97*', 'R97X', 'p.Arg97Ter', 'p.(Arg97*)']:
+            comp = parse_components_from_aminochange(achg)
+            assert (comp['ref'], comp['pos'], comp['alt'], comp['edittype']) == ('R', '97', 'X', 'SUB')
+        assert parse_components_from_aminochange('p.(Arg97*)')['predicted']
+
+    def test_frameshifts(self):
+        comp = parse_components_from_aminochange('Arg97ProfsTer23')
+        assert (comp['edittype'], comp['alt'], comp['fs_pos']) == ('FS', 'P', '23')
+        comp = parse_components_from_aminochange('R97fs')
+        assert (comp['edittype'], comp['alt'], comp['fs_pos']) == ('FS', '', '')
+        assert parse_components_from_aminochange('R97Pfs*23')['fs_pos'] == '23'
+
+    def test_del_dup_ins_delins_ext(self):
+        comp = parse_components_from_aminochange('Glu1000_Glu1001del')
+        assert (comp['edittype'], comp['ref'], comp['end_ref'], comp['end_pos']) == ('DEL', 'E', 'E', '1001')
+        assert parse_components_from_aminochange('Lys23dup')['edittype'] == 'DUP'
+        comp = parse_components_from_aminochange('p.(Leu747_Pro753delinsSer)')
+        assert (comp['edittype'], comp['alt']) == ('INDEL', 'S')
+        comp = parse_components_from_aminochange('Arg78_Gly79insGlnSer')
+        assert (comp['edittype'], comp['alt']) == ('INS', 'QS')
+        comp = parse_components_from_aminochange('Ter110GlnextTer17')
+        assert (comp['edittype'], comp['ref'], comp['alt'], comp['ext_pos']) == ('EXT', 'X', 'Q', '*17')
+        assert parse_components_from_aminochange('Met1ext-5')['ext_pos'] == '-5'
+
+    def test_batch_matches_single(self):
+        achgs = ['L653R', 'V777', 'Arg97ProfsTer23', 'L653R', 'Glu1000_Glu1001del', 'L653RR']
+        assert parse_components_from_aminochanges(achgs) == [parse_components_from_aminochange(a) for a in achgs]
+
+    def test_batch_matches_single_with_whitespace(self):
+        achgs = [' L653R', 'L653R ', '\tL653R\t', 'L653R\n', '\nL653R', 'L\n653R', ' ', '', 'p.(Arg97ProfsTer23) ',
+                 ' R97*', 'junk', 'L653R\nR97*']
+        single = [parse_components_from_aminochange(a) for a in achgs]
+        assert single[0] is not None and single[3] is not None
+        assert parse_components_from_aminochanges(achgs) == single
+
+    def test_components_from_aminochange_edittypes(self):
+        comp = VariantComponents(aminochange='Arg97ProfsTer23')
+        assert comp.edittype == 'FS'
+        assert comp.posedit == 'Arg97ProfsTer23'
+        assert 'Arg97Profs' in comp.posedit_slang
+        assert VariantComponents(aminochange='R97*').posedit == 'Arg97Ter'
+        with self.assertRaises(RejectedSeqVar):
+            VariantComponents(aminochange='V777')
+        with self.assertRaises(RejectedSeqVar):
+            VariantComponents(aminochange='Glu1000_Glu1001del')
+        with self.assertRaises(RejectedSeqVar):
+            VariantComponents(aminochange='Arg78insGln')
+
+    def test_protein_slang_keeps_edit(self):
+        assert sorted(VariantComponents(aminochange='Lys23del').posedit_slang) == ['K23del', 'Lys23del']
+        assert sorted(VariantComponents(aminochange='Lys23dup').posedit_slang) == ['K23dup', 'Lys23dup']
+        assert 'L747delinsS' in VariantComponents(aminochange='Leu747delinsSer').posedit_slang
+        for aminochange in ('Lys23del', 'Lys23dup', 'Leu653=', 'Leu747delinsSer'):
+            slang = VariantComponents(aminochange=aminochange).posedit_slang
+            assert not [term for term in slang if term.rstrip('0123456789') in ('K', 'L')], slang
+        assert 'L653R' in VariantComponents(aminochange='Leu653Arg').posedit_slang
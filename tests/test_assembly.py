@@ -0,0 +1,41 @@
+import unittest
+
+from metavariant.assembly import MapperRegistry, assembly_for_accession
+from metavariant.hgvs_samples import hgvs_g
+
+from fake_hgvs import FakeHdp
+
+
+class FakeVariant(object):
+
+    def __init__(self, ac, type):
+        self.ac = ac
+        self.type = type
+
+
+class TestAssembly(unittest.TestCase):
+
+    def test_assembly_for_accession(self):
+        assert assembly_for_accession('NC_000019.9') == 'GRCh37'
+        assert assembly_for_accession('NC_000019.10') == 'GRCh38'
+        assert assembly_for_accession('NM_000151.3') is None
+        assert assembly_for_accession('NM_000151.3', default='GRCh38') == 'GRCh38'
+
+        # all genomic samples are GRCh37.
+        for hgvs_text in hgvs_g.values():
+            assert assembly_for_accession(hgvs_text.split(':')[0]) == 'GRCh37'
+
+    def test_registry_reuses_mappers(self):
+        mappers = MapperRegistry(FakeHdp())
+        grch37 = mappers.get('GRCh37')
+        assert grch37.assembly_name == 'GRCh37'
+        assert mappers.get('GRCh37') is grch37
+        assert mappers.get().assembly_name == 'GRCh38'
+        assert sorted(mappers.assemblies) == ['GRCh37', 'GRCh38']
+
+    def test_for_variant(self):
+        mappers = MapperRegistry(FakeHdp())
+        assert mappers.for_variant(FakeVariant('NC_000019.9', 'g')).assembly_name == 'GRCh37'
+        assert mappers.for_variant(FakeVariant('NC_000019.10', 'g')).assembly_name == 'GRCh38'
+        assert mappers.for_variant(FakeVariant('NM_000151.3', 'c')).assembly_name == 'GRCh38'
+        assert mappers.for_variant(FakeVariant('NC_000019.10', 'g'), 'GRCh37').assembly_name == 'GRCh37'
@@ -0,0 +1,98 @@
+import time
+import unittest
+from unittest import mock
+
+import requests
+
+from metavariant import NCBIEnrichedLVG, VariantLVG
+from metavariant.breaker import CLOSED, HALF_OPEN, OPEN, CircuitBreaker, ncbi_breaker, uta_breaker
+from metavariant.exceptions import CircuitOpenError, NCBIRemoteError
+from metavariant.ncbi import get_ncbi_variant_report
+
+from fake_hgvs import VAR_C, DeadPool, FakePool
+
+
+def fail(error):
+    raise error
+
+
+class TestCircuitBreaker(unittest.TestCase):
+
+    def test_opens_after_threshold_and_rejects(self):
+        breaker = CircuitBreaker('test', failure_threshold=2, reset_timeout=60, failure_types=(OSError,))
+        self.assertRaises(OSError, breaker.call, fail, OSError())
+        assert breaker.state == CLOSED
+        self.assertRaises(OSError, breaker.call, fail, OSError())
+        assert breaker.state == OPEN
+
+        calls = []
+        self.assertRaises(CircuitOpenError, breaker.call, calls.append, 1)
+        assert calls == []
+        assert breaker.stats()['rejected'] == 1
+
+    def test_other_errors_and_successes_reset_count(self):
+        breaker = CircuitBreaker('test', failure_threshold=2, failure_types=(OSError,))
+        self.assertRaises(OSError, breaker.call, fail, OSError())
+        self.assertRaises(ValueError, breaker.call, fail, ValueError())
+        self.assertRaises(OSError, breaker.call, fail, OSError())
+        assert breaker.state == CLOSED
+        assert breaker.call(lambda: 'ok') == 'ok'
+        assert breaker.failures == 0
+
+    def test_half_open(self):
+        breaker = CircuitBreaker('test', failure_threshold=1, reset_timeout=0.05)
+        self.assertRaises(OSError, breaker.call, fail, OSError())
+        assert breaker.is_open
+        time.sleep(0.06)
+        assert breaker.state == HALF_OPEN
+
+        # a failed trial re-opens it at once.
+        self.assertRaises(OSError, breaker.call, fail, OSError())
+        assert breaker.state == OPEN
+        time.sleep(0.06)
+        assert breaker.call(lambda: 'ok') == 'ok'
+        assert breaker.state == CLOSED
+        assert breaker.stats()['opened'] == 2
+
+
+class TestDegradedResults(unittest.TestCase):
+
+    def setUp(self):
+        uta_breaker.reset()
+        ncbi_breaker.reset()
+
+    tearDown = setUp
+
+    def test_lvg_marked_degraded_when_uta_unavailable(self):
+        lex = VariantLVG(VAR_C, pool=DeadPool())
+        assert lex.degraded
+        assert lex.stats['backend_unavailable'] == 3
+        assert lex.hgvs_c == [VAR_C]
+
+        # once the breaker is open, calls fail fast but results are still marked.
+        rejected = uta_breaker.counters['rejected']
+        lex = VariantLVG(VAR_C, pool=DeadPool())
+        assert lex.degraded
+        assert uta_breaker.state == OPEN
+        assert uta_breaker.counters['rejected'] > rejected
+
+    def test_expand_retries_degraded(self):
+        lex = VariantLVG(VAR_C, pool=DeadPool())
+        assert lex.degraded
+        uta_breaker.reset()
+        lex._pool = FakePool()
+        lex.expand()
+        assert not lex.degraded
+        assert 'NM_000155.2:c.253C>T' in lex.hgvs_c
+        assert lex.hgvs_p == ['NP_000146.2:p.(Arg85Cys)']
+
+    def test_unmappable_is_not_degraded(self):
+        lex = VariantLVG(VAR_C, pool=FakePool())
+        assert not lex.degraded
+
+    def test_ncbi_unavailable(self):
+        with mock.patch('metavariant.ncbi.requests.get', side_effect=requests.ConnectionError('down')):
+            self.assertRaises(NCBIRemoteError, get_ncbi_variant_report, VAR_C)
+            lex = NCBIEnrichedLVG(VAR_C, pool=FakePool())
+        assert lex.degraded
+        assert lex.ncbierror
@@ -1,8 +1,10 @@
 from __future__ import absolute_import, print_function, unicode_literals
 
+import pickle
 import unittest
 
 from metavariant import Variant, VariantComponents
+from metavariant.components import FrozenVariantComponents, seqvar_posedit_slang, seqvars_posedit_slang
 
 from metavariant.hgvs_samples import hgvs_c, hgvs_g, hgvs_p, hgvs_n
 
@@ -44,4 +46,72 @@ class TestVariantComponents(unittest.TestCase):
         var_c = Variant(hgvs_c['INS'])
         comp = VariantComponents(var_c)
         pass
-    
+
+    def test_pickle_is_compact_and_lazy(self):
+        comp = VariantComponents(Variant(hgvs_c['SUB']))
+        data = pickle.dumps(comp)
+        assert len(data) < len(pickle.dumps(comp.__dict__))
+
+        restored = pickle.loads(data)
+        assert 'seqvar' not in restored.__dict__
+        assert restored.pos == comp.pos
+        assert restored.posedit == comp.posedit
+        assert restored.to_dict() == comp.to_dict()
+
+        comp = VariantComponents(seqtype='c', edittype='SUB', pos='891', ref='C', alt='T')
+        assert pickle.loads(pickle.dumps(comp)).to_dict() == comp.to_dict()
+
+
+class TestSeqvarPoseditSlang(unittest.TestCase):
+
+    def test_same_slang_as_VariantComponents(self):
+        for hgvs_text in (hgvs_c['SUB'], hgvs_c['DEL'], hgvs_c['DUP'], hgvs_p['SUB'], hgvs_p['FS']):
+            seqvar = Variant(hgvs_text)
+            comp = VariantComponents(seqvar)
+            assert seqvar_posedit_slang(seqvar) == (comp.posedit, tuple(sorted(comp.posedit_slang)))
+
+    def test_unsupported_edit_type(self):
+        # VariantComponents raises NotImplementedError for these; here they just have no slang.
+        seqvar = Variant(hgvs_n['INV'])
+        self.assertRaises(NotImplementedError, getattr, VariantComponents(seqvar), 'posedit_slang')
+        assert seqvar_posedit_slang(seqvar) == ('%s' % seqvar.posedit, ())
+
+    def test_deduplicated_by_posedit(self):
+        seqvars = [Variant('NM_000155.3:c.253C>T'), Variant('NM_000155.2:c.253C>T'), Variant(hgvs_c['SUB'])]
+        slang = seqvars_posedit_slang(seqvars + [None])
+        assert sorted(slang) == ['253C>T', '4786T>A']
+        assert 'C253T' in slang['253C>T']
+
+
+class TestFrozenVariantComponents(unittest.TestCase):
+
+    def test_same_api_as_VariantComponents(self):
+        for hgvs_text in (hgvs_c['SUB'], hgvs_c['DEL'], hgvs_c['DUP'], hgvs_p['SUB']):
+            seqvar = Variant(hgvs_text)
+            comp = VariantComponents(seqvar)
+            frozen = FrozenVariantComponents(seqvar)
+            assert frozen.to_dict() == comp.to_dict()
+            assert frozen.posedit == comp.posedit
+            assert sorted(frozen.posedit_slang) == sorted(comp.posedit_slang)
+            assert frozen.to_mysql_dict() == comp.to_mysql_dict()
+
+        frozen = FrozenVariantComponents(aminochange='Leu653Arg')
+        assert frozen.posedit == 'Leu653Arg'
+        assert 'L653R' in frozen.posedit_slang
+
+    def test_immutable_and_cached(self):
+        frozen = FrozenVariantComponents(seqtype='c', edittype='SUB', pos='891', ref='C', alt='T')
+        with self.assertRaises(AttributeError):
+            frozen.ref = 'G'
+        assert not hasattr(frozen, '__dict__')
+
+        slang = frozen.posedit_slang
+        slang.append('garbage')
+        assert 'garbage' not in frozen.posedit_slang
+        frozen.to_dict()['ref'] = 'G'
+        assert frozen.ref == 'C'
+
+    def test_unsupported_edittype_raises_NotImplementedError(self):
+        frozen = FrozenVariantComponents(seqtype='c', edittype='FS', pos='826', ref='', alt='')
+        with self.assertRaises(NotImplementedError):
+            frozen.posedit_slang
@@ -0,0 +1,102 @@
+import time
+import unittest
+from unittest import mock
+
+from metavariant.enrich import EnrichmentOrchestrator, ncbi_report_to_hgvs
+from metavariant.exceptions import CriticalHgvsError, LOVDRemoteError
+from metavariant.genenames import gene_name_cache
+
+from fake_hgvs import VAR_C, VAR_G, FakePool
+
+REPORT = [{'Hgvs_c': 'NM_000155.3:c.253C>T', 'Hgvs_p': 'NP_000146.2:p.Arg85Cys', 'Hgvs_g': 'NC_000009.12:g.34648170C>T',
+           'PMIDs': ['123', '456']},
+          {'Hgvs_c': 'NM_000155.4:c.253C>T', 'Hgvs_n': 'not an hgvs string', 'PMIDs': ['123']}]
+
+
+def slow(result, delay, calls=None):
+    def func(*args):
+        if calls is not None:
+            calls.append(args)
+        time.sleep(delay)
+        if isinstance(result, Exception):
+            raise result
+        return result
+    return func
+
+
+class TestEnrichmentOrchestrator(unittest.TestCase):
+
+    def setUp(self):
+        gene_name_cache.clear()
+
+    def enrich(self, hgvs_text=VAR_C, ncbi=None, lovd=None, delay=0, timeouts=None):
+        ncbi = ncbi or slow(REPORT, 0)
+        lovd = lovd or slow(set(['NM_000155.3:c.1A>G']), 0)
+        with mock.patch('metavariant.enrich.get_ncbi_variant_report', ncbi), \
+                mock.patch('metavariant.enrich.get_variants_for_gene_name', lovd):
+            with EnrichmentOrchestrator(pool=FakePool(delay=delay), timeouts=timeouts) as orchestrator:
+                return orchestrator.enrich(hgvs_text)
+
+    def test_merges_sources(self):
+        record = self.enrich()
+        assert record.gene_name == 'GALT'
+        assert 'NM_000155.4:c.253C>T' in record.hgvs_c          # NCBI only
+        assert 'NM_000155.2:c.253C>T' in record.hgvs_c          # UTA only
+        assert 'NP_000146.2:p.(Arg85Cys)' in record.hgvs_p
+        assert record.hgvs_n == sorted(record.lvg.hgvs_n)        # unparseable NCBI string dropped
+        assert record.pmids == [123, 456]
+        assert record.lovd_variants == ['NM_000155.3:c.1A>G']
+        assert sorted(record.sources) == ['lovd', 'ncbi', 'uta']
+        assert all(result.status == 'ok' for result in record.sources.values())
+        assert not record.degraded
+        assert record.to_dict()['sources']['uta']['status'] == 'ok'
+
+    def test_sources_run_concurrently(self):
+        started = time.time()
+        record = self.enrich(ncbi=slow(REPORT, 0.3), lovd=slow(set(), 0.3), delay=0.05)
+        elapsed = time.time() - started
+        assert record.sources['uta'].seconds > 0.2
+        assert elapsed < 0.3 + record.sources['uta'].seconds
+        assert record.sources['ncbi'].seconds >= 0.3
+
+    def test_gene_name_from_lvg_for_genomic_input(self):
+        calls = []
+        record = self.enrich(VAR_G, lovd=slow(set(), 0, calls))
+        assert calls == [('GALT',)]
+        assert record.sources['lovd'].status == 'ok'
+
+    def test_source_timeout(self):
+        started = time.time()
+        record = self.enrich(ncbi=slow(REPORT, 1.0), timeouts={'ncbi': 0.1})
+        assert time.time() - started < 0.8
+        assert record.sources['ncbi'].status == 'timeout'
+        assert record.sources['uta'].status == 'ok'
+        assert record.pmids == []
+        assert record.degraded
+
+    def test_uta_deadline_gives_partial_lvg(self):
+        record = self.enrich(delay=0.1, timeouts={'uta': 0.15})
+        assert record.sources['uta'].status == 'ok'
+        assert record.partial
+
+    def test_source_error(self):
+        record = self.enrich(lovd=slow(LOVDRemoteError('lovd.nl returned HTTP 404'), 0))
+        assert record.sources['lovd'].status == 'error'
+        assert 'LOVDRemoteError' in record.sources['lovd'].error
+        assert record.sources['ncbi'].status == 'ok'
+        assert record.lovd_variants == []
+
+    def test_unparseable_input(self):
+        self.assertRaises(CriticalHgvsError, self.enrich, 'not a variant')
+
+
+class TestNCBIReportToHgvs(unittest.TestCase):
+
+    def test_columns(self):
+        hgvs = ncbi_report_to_hgvs(REPORT)
+        assert hgvs['c'] == ['NM_000155.3:c.253C>T', 'NM_000155.4:c.253C>T']
+        assert hgvs['n'] == ['not an hgvs string']
+
+
+if __name__ == '__main__':
+    unittest.main()
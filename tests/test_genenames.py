@@ -0,0 +1,78 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from metavariant.genenames import GeneNameCache, GeneNameCaches, SQL_PROTEIN_GENES, SQL_TRANSCRIPT_GENES
+
+from fake_hgvs import FakeHdp
+
+BULK_ROWS = {SQL_TRANSCRIPT_GENES: [('NM_000151.3', 'G6PC1'), ('NM_000151.4', 'G6PC1'), ('NR_000001.1', None)],
+             SQL_PROTEIN_GENES: [('NP_000142.2', 'G6PC1')],
+            }
+
+
+class TestGeneNameCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_bulk_load(self):
+        hdp = FakeHdp(bulk_rows=BULK_ROWS)
+        cache = GeneNameCache()
+        assert cache.get('NM_000151.3', hdp) == 'G6PC1'
+        assert cache.get('NP_000142.2', hdp) == 'G6PC1'
+        assert cache.get('NM_999999.1', hdp) is None
+        assert cache.get_many(['NM_000151.4', 'NR_000001.1'], hdp) == {'NM_000151.4': 'G6PC1', 'NR_000001.1': None}
+        # two bulk queries, no per-accession lookups.
+        assert hdp.queries == 2
+
+    def test_fallback(self):
+        hdp = FakeHdp()
+        cache = GeneNameCache()
+        assert cache.get('NM_000151.3', hdp) == 'G6PC1'
+        assert cache.get('NM_000151.3', hdp) == 'G6PC1'
+        assert cache.get('NM_999999.1', hdp) is None
+        assert not cache.is_loaded
+        # one failed bulk query, then one lookup per accession.
+        assert hdp.queries == 3
+
+    def test_retry_after_failed_load(self):
+        hdp = FakeHdp()
+        cache = GeneNameCache(retry_after=0)
+        assert cache.get('NM_000151.3', hdp) == 'G6PC1'
+        assert not cache.is_loaded
+        hdp.bulk_rows = BULK_ROWS
+        assert cache.get('NP_000142.2', hdp) == 'G6PC1'
+        assert cache.is_loaded
+
+        cache = GeneNameCache(retry_after=60)
+        cache.get('NM_000151.3', FakeHdp())
+        assert cache.get('NP_000142.2', FakeHdp(bulk_rows=BULK_ROWS)) is None
+        assert not cache.is_loaded
+
+    def test_one_mapping_per_hdp(self):
+        caches = GeneNameCaches()
+        failing, working = FakeHdp(), FakeHdp(bulk_rows=BULK_ROWS)
+        failing.get_tx_identity_info = lambda tx_ac: None
+        assert caches.get('NM_000151.3', failing) is None
+        assert caches.get('NM_000151.3', working) == 'G6PC1'
+        assert caches.for_hdp(working).is_loaded and not caches.for_hdp(failing).is_loaded
+
+        caches.clear()
+        assert not caches.for_hdp(working).is_loaded
+
+    def test_save_and_load(self):
+        cache = GeneNameCache()
+        cache.load_from_uta(FakeHdp(bulk_rows=BULK_ROWS))
+        for filename in ('gene_names.tsv', 'gene_names.tsv.gz'):
+            path = os.path.join(self.tmpdir, filename)
+            cache.save(path)
+
+            offline = GeneNameCache(path)
+            assert offline.get('NP_000142.2') == 'G6PC1'
+            assert offline.source == path
+            assert len(offline) == 3
@@ -0,0 +1,35 @@
+import pickle
+import unittest
+
+from metavariant import VariantLVG
+from metavariant.lite import LiteLVG
+
+from fake_hgvs import VAR_C, FakePool
+
+
+class TestLiteLVG(unittest.TestCase):
+
+    def setUp(self):
+        self.lex = VariantLVG(VAR_C, pool=FakePool(), gene_name='GALT')
+        self.lite = self.lex.to_lite()
+
+    def test_properties(self):
+        for prop in ('hgvs_text', 'hgvs_c', 'hgvs_g', 'hgvs_n', 'hgvs_p', 'gene_name'):
+            assert getattr(self.lite, prop) == getattr(self.lex, prop)
+        assert sorted(self.lite.transcripts) == sorted(self.lex.transcripts)
+        assert not hasattr(self.lite, '__dict__')
+
+    def test_seqvars_on_demand(self):
+        assert str(self.lite.seqvar) == str(self.lex.seqvar)
+        assert dict((seqtype, sorted(seqvars)) for seqtype, seqvars in self.lite.variants.items()) == \
+               dict((seqtype, sorted(seqvars)) for seqtype, seqvars in self.lex.variants.items())
+        assert len(self.lite.seqvars) == len(self.lex.seqvars)
+
+    def test_interned(self):
+        other = LiteLVG.from_json(self.lite.to_json())
+        assert other == self.lite
+        assert other.transcripts[0] is self.lite.transcripts[0]
+
+    def test_json_and_pickle(self):
+        assert LiteLVG.from_json(self.lex.to_json()) == self.lite
+        assert pickle.loads(pickle.dumps(self.lite)) == self.lite
@@ -0,0 +1,59 @@
+import asyncio
+import unittest
+
+from metavariant import VariantLVG
+
+from fake_hgvs import VAR_C, ConcurrencyTracker, FakePool
+
+
+class TestVariantLVGCreate(unittest.TestCase):
+
+    def test_same_as_sync(self):
+        pool = FakePool()
+        lex = VariantLVG(VAR_C, pool=pool)
+        alex = asyncio.run(VariantLVG.create(VAR_C, pool=pool, concurrency=4))
+
+        assert alex.variants == lex.variants
+        assert alex.transcripts == lex.transcripts
+        assert alex.hgvs_text == lex.hgvs_text
+        assert 'NM_000155.2:c.253C>T' in alex.hgvs_c
+        assert 'NR_026560.1:n.300C>T' in alex.hgvs_n
+        assert 'NR_026560.1:c.253C>T' not in alex.hgvs_c
+
+    def test_concurrency_limit(self):
+        tracker = ConcurrencyTracker()
+        pool = FakePool(size=8, delay=0.02, tracker=tracker)
+        asyncio.run(VariantLVG.create(VAR_C, pool=pool, concurrency=2))
+        assert tracker.peak == 2
+
+        tracker.peak = 0
+        asyncio.run(VariantLVG.create(VAR_C, pool=pool, concurrency=8))
+        assert tracker.peak > 2
+
+    def test_many_concurrent_creates(self):
+        pool = FakePool(size=4, delay=0.005)
+
+        async def create_many():
+            return await asyncio.gather(*[VariantLVG.create(VAR_C, pool=pool) for _ in range(20)])
+
+        lexes = asyncio.run(create_many())
+        assert len(set(tuple(sorted(lex.hgvs_c)) for lex in lexes)) == 1
+        assert pool.stats()['created'] <= 4
+
+    def test_cancel(self):
+        tracker = ConcurrencyTracker()
+        pool = FakePool(size=1, delay=0.05, tracker=tracker)
+
+        async def create_and_cancel():
+            task = asyncio.ensure_future(VariantLVG.create(VAR_C, pool=pool))
+            await asyncio.sleep(0.08)
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
+                return True
+            return False
+
+        assert asyncio.run(create_and_cancel())
+        # not every one of the mapping calls was made.
+        assert tracker.calls < 10
@@ -0,0 +1,63 @@
+import asyncio
+import time
+import unittest
+
+from metavariant import VariantLVG
+
+from fake_hgvs import VAR_C, FakePool
+
+
+class TestVariantLVGDeadline(unittest.TestCase):
+
+    def test_no_deadline(self):
+        lex = VariantLVG(VAR_C, pool=FakePool())
+        assert not lex.partial
+        assert lex.skipped == {'stages': [], 'transcripts': []}
+
+    def test_expired_deadline(self):
+        lex = VariantLVG(VAR_C, pool=FakePool(), deadline=0)
+        assert lex.partial
+        assert lex.skipped['stages'] == ['from_c']
+        assert lex.hgvs_c == [VAR_C]
+        assert lex.hgvs_g == []
+
+    def test_partial(self):
+        # each mapping call takes 0.1s: the three calls from the input 'c' and the transcript
+        # lookup fit in the budget; the fan-out to transcripts doesn't.
+        for build in (lambda **kw: VariantLVG(VAR_C, **kw),
+                      lambda **kw: asyncio.run(VariantLVG.create(VAR_C, concurrency=1, **kw))):
+            lex = build(pool=FakePool(delay=0.1), deadline=0.45)
+            assert lex.partial
+            assert lex.skipped['stages'] == ['fan_out']
+            assert lex.skipped['transcripts'] == ['NM_000155.3', 'NM_000155.2', 'NR_026560.1']
+            assert lex.hgvs_g and lex.hgvs_p
+            assert 'NM_000155.2:c.253C>T' not in lex.hgvs_c
+
+    def test_async_deadline_bounds_running_calls(self):
+        async def timed():
+            started = time.time()
+            lex = await VariantLVG.create(VAR_C, pool=FakePool(delay=0.5), deadline=0.1)
+            return lex, time.time() - started
+
+        # create returns at the deadline; the running calls finish in their threads.
+        lex, elapsed = asyncio.run(timed())
+        assert elapsed < 0.4
+        assert lex.partial
+        assert lex.skipped['stages'] == ['from_c']
+        assert lex.hgvs_g == []
+
+    def test_expand_completes_partial(self):
+        full = VariantLVG(VAR_C, pool=FakePool())
+        lex = VariantLVG(VAR_C, pool=FakePool(delay=0.05), deadline=0.12)
+        assert lex.partial
+        for _ in range(10):
+            if not lex.partial:
+                break
+            lex.expand()
+        assert not lex.partial
+        assert lex.skipped == {'stages': [], 'transcripts': []}
+        assert sorted(lex.seqvars, key=str) == sorted(full.seqvars, key=str)
+
+
+if __name__ == '__main__':
+    unittest.main()
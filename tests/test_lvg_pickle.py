@@ -0,0 +1,53 @@
+import json
+import pickle
+import unittest
+
+from metavariant import VariantLVG
+
+from fake_hgvs import VAR_C, FakePool
+
+
+class TestVariantLVGPickle(unittest.TestCase):
+
+    def setUp(self):
+        self.lex = VariantLVG(VAR_C, pool=FakePool(), gene_name='GALT')
+
+    def test_round_trip(self):
+        restored = pickle.loads(pickle.dumps(self.lex))
+        for prop in ('hgvs_text', 'hgvs_c', 'hgvs_g', 'hgvs_n', 'hgvs_p', 'gene_name', 'transcripts',
+                     'assembly', 'partial', 'skipped', 'stats'):
+            assert getattr(restored, prop) == getattr(self.lex, prop)
+        # transcripts is a set, so compare the JSON without depending on its iteration order.
+        restored_json, lex_json = json.loads(restored.to_json()), json.loads(self.lex.to_json())
+        assert sorted(restored_json.pop('transcripts')) == sorted(lex_json.pop('transcripts'))
+        assert restored_json == lex_json
+
+    def test_variants_parsed_on_demand(self):
+        restored = pickle.loads(pickle.dumps(self.lex))
+        assert 'variants' not in restored.__dict__
+        assert restored.hgvs_c == self.lex.hgvs_c
+        assert 'variants' not in restored.__dict__
+
+        assert str(restored.seqvar) == str(self.lex.seqvar)
+        assert dict((seqtype, sorted(seqvars)) for seqtype, seqvars in restored.variants.items()) == \
+               dict((seqtype, sorted(seqvars)) for seqtype, seqvars in self.lex.variants.items())
+        assert restored.variants['c'][VAR_C] is restored.seqvar
+        assert pickle.loads(pickle.dumps(restored)).hgvs_p == self.lex.hgvs_p
+
+    def test_compact(self):
+        # the pool is dropped, and no SequenceVariant object graphs are written.
+        assert len(pickle.dumps(self.lex)) < 1000
+        self.assertRaises(AttributeError, getattr, pickle.loads(pickle.dumps(self.lex)), 'no_such_attribute')
+
+    def test_partial_expands_after_unpickling(self):
+        lex = VariantLVG(VAR_C, pool=FakePool(delay=0.1), deadline=0.15)
+        assert lex.partial
+        restored = pickle.loads(pickle.dumps(lex))
+        assert restored.partial and restored.skipped == lex.skipped
+
+        assert restored.expand(pool=FakePool()) is restored
+        assert not restored.partial and restored.skipped == self.lex.skipped
+        for prop in ('hgvs_c', 'hgvs_g', 'hgvs_n', 'hgvs_p'):
+            assert sorted(getattr(restored, prop)) == sorted(getattr(self.lex, prop))
+        assert restored.transcripts == self.lex.transcripts
+
@@ -0,0 +1,53 @@
+import pickle
+import unittest
+
+from metavariant import VariantComponents, VariantLVG
+from metavariant.lvg import posedit_slang_many
+from metavariant.synonyms import lvg_synonyms
+
+from fake_hgvs import VAR_C, FakePool
+
+
+class TestVariantLVGPoseditSlang(unittest.TestCase):
+
+    def setUp(self):
+        self.lex = VariantLVG(VAR_C, pool=FakePool())
+
+    def test_all_variants(self):
+        slang = self.lex.posedit_slang()
+        expected = set()
+        for seqvar in self.lex.seqvars:
+            expected.update(VariantComponents(seqvar).posedit_slang)
+        assert set().union(*slang.values()) == expected
+        # c. on two transcripts, and n. on three, share one posedit each.
+        assert sorted(slang) == ['(Arg85Cys)', '253C>T', '300C>T', '34648170C>T']
+
+    def test_cached(self):
+        slang = self.lex.posedit_slang()
+        assert self.lex.__dict__['_posedit_slang'] == slang
+        slang.clear()   # callers get a copy
+        assert self.lex.posedit_slang()
+
+        self.lex._add_result(VariantLVG.parse('NM_000155.3:c.260del'))
+        assert '260del' in self.lex.posedit_slang()
+
+    def test_unpickled(self):
+        restored = pickle.loads(pickle.dumps(self.lex))
+        assert restored.posedit_slang() == self.lex.posedit_slang()
+
+    def test_lite(self):
+        assert self.lex.to_lite(with_gene_name=False).posedit_slang() == self.lex.posedit_slang()
+
+    def test_many(self):
+        other = VariantLVG('NM_000155.3:c.260del', pool=FakePool())
+        results = posedit_slang_many([self.lex, other.to_lite(with_gene_name=False)])
+        assert results == [self.lex.posedit_slang(), other.posedit_slang()]
+
+    def test_lvg_synonyms(self):
+        terms = lvg_synonyms(self.lex)
+        assert VAR_C in terms
+        assert 'C253T' in terms and 'R85C' in terms
+
+
+if __name__ == '__main__':
+    unittest.main()
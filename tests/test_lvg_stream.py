@@ -0,0 +1,53 @@
+import asyncio
+import time
+import unittest
+
+from metavariant import VariantLVG
+from metavariant.genenames import gene_name_cache
+from metavariant.lvg import LVGEvent, LVGSummary
+
+from fake_hgvs import VAR_C, FakePool
+
+
+class TestVariantLVGStream(unittest.TestCase):
+
+    def setUp(self):
+        gene_name_cache.clear()
+
+    def check_events(self, events, lex):
+        assert events[0] == LVGEvent('c', VAR_C, events[0].seqvar)
+        summary = events[-1]
+        assert isinstance(summary, LVGSummary)
+        assert summary.transcripts == sorted(lex.transcripts)
+        assert summary.gene_name == 'GALT'
+
+        found = [(event.seqtype, event.hgvs_text) for event in events[:-1]]
+        # no duplicates, and every variant of the full LVG was streamed.
+        assert len(found) == len(set(found))
+        assert set(found) == set((seqtype, hgvs_text) for seqtype in lex.variants for hgvs_text in lex.variants[seqtype])
+
+    def test_stream(self):
+        pool = FakePool()
+        lex = VariantLVG(VAR_C, pool=pool)
+        events = list(VariantLVG.stream(VAR_C, pool=pool))
+        self.check_events(events, lex)
+        assert events[-1].lvg.variants == lex.variants
+
+    def test_astream(self):
+        pool = FakePool()
+        lex = VariantLVG(VAR_C, pool=pool)
+
+        async def collect():
+            return [event async for event in VariantLVG.astream(VAR_C, pool=pool, concurrency=4)]
+
+        self.check_events(asyncio.run(collect()), lex)
+
+    def test_first_result_before_finish(self):
+        started = time.time()
+        stream = VariantLVG.stream(VAR_C, pool=FakePool(delay=0.05))
+        next(stream)                # the input variant
+        first_mapped = next(stream)
+        assert first_mapped.seqtype == 'g'
+        assert time.time() - started < 0.2
+        events = list(stream)
+        assert isinstance(events[-1], LVGSummary)
@@ -0,0 +1,77 @@
+import pickle
+import unittest
+
+from metavariant import VariantLVG
+
+from fake_hgvs import VAR_C, VAR_G, ConcurrencyTracker, FakePool
+
+
+def make_lvg(hgvs_text=VAR_C, **kwargs):
+    tracker = ConcurrencyTracker()
+    return VariantLVG(hgvs_text, pool=FakePool(tracker=tracker), **kwargs), tracker
+
+
+class TestVariantLVGTargets(unittest.TestCase):
+
+    def setUp(self):
+        self.full, self.full_calls = make_lvg()
+
+    def test_p_only_skips_fan_out(self):
+        lex, calls = make_lvg(targets=['p'])
+        assert calls.calls == 1                 # c_to_p only
+        assert lex.transcripts == set()
+        assert not lex.variants['g'] and not lex.variants['n']
+        assert lex.hgvs_p == ['NP_000146.2:p.(Arg85Cys)']
+        assert calls.calls == 1
+
+    def test_g_only(self):
+        lex, calls = make_lvg(targets='g')
+        assert lex.hgvs_g == [VAR_G]
+        assert calls.calls == 1
+
+    def test_filled_in_on_demand(self):
+        lex, calls = make_lvg(targets=['p'])
+        assert sorted(lex.hgvs_c) == sorted(self.full.hgvs_c)
+        assert sorted(lex.hgvs_p) == sorted(self.full.hgvs_p)
+        assert lex.transcripts == self.full.transcripts
+        assert sorted(lex.hgvs_n) == sorted(self.full.hgvs_n)
+        # no mapping call was made twice.
+        assert calls.calls == self.full_calls.calls
+
+    def test_expand(self):
+        lex, calls = make_lvg(targets=['g'])
+        assert lex.expand() is lex
+        assert sorted(lex.seqvars, key=str) == sorted(self.full.seqvars, key=str)
+        assert calls.calls == self.full_calls.calls
+        lex.expand()
+        assert calls.calls == self.full_calls.calls
+
+    def test_genomic_input_p_needs_fan_out(self):
+        lex, _ = make_lvg(VAR_G, targets=['p'])
+        assert lex.transcripts
+        assert lex.hgvs_p == ['NP_000146.2:p.(Arg85Cys)']
+        assert not lex.variants['n']
+
+    def test_bad_targets(self):
+        self.assertRaises(ValueError, make_lvg, targets=['x'])
+        self.assertRaises(ValueError, make_lvg, targets=[])
+
+    def test_pickling_keeps_targets(self):
+        lex, calls = make_lvg(targets=['p'])
+        restored = pickle.loads(pickle.dumps(lex))
+        assert calls.calls == 1                 # pickling maps nothing
+        assert lex.unmapped_seqtypes == restored.unmapped_seqtypes == ['c', 'g', 'n']
+        assert restored.hgvs_c == [VAR_C]       # nor does asking for an unmapped seqtype once unpickled
+        assert restored.hgvs_p == lex.hgvs_p
+
+        restored.expand(pool=FakePool())
+        assert restored.unmapped_seqtypes == []
+        assert sorted(restored.hgvs_c) == sorted(self.full.hgvs_c)
+        assert sorted(restored.hgvs_n) == sorted(self.full.hgvs_n)
+        assert restored.hgvs_p == self.full.hgvs_p
+        assert restored.transcripts == self.full.transcripts
+        assert not restored.partial
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from metavariant.lite import LiteLVG
+from metavariant.lvgstore import LVGStore, build_lvg_store, iter_lvg_json
+
+LVG_GALT = {'hgvs_text': 'NM_000155.3:c.253C>T',
+            'gene_name': 'GALT',
+            'transcripts': ['NM_000155.3', 'NM_000155.2'],
+            'hgvs_c': ['NM_000155.3:c.253C>T', 'NM_000155.2:c.253C>T'],
+            'hgvs_g': ['NC_000009.12:g.34647855C>T', 'NC_000009.11:g.34647852C>T'],
+            'hgvs_n': ['NM_000155.3:n.317C>T'],
+            'hgvs_p': ['NP_000146.2:p.(Arg85Cys)'],
+           }
+
+LVG_NO_GENE = {'hgvs_text': 'NC_000001.11:g.100A>G',
+               'gene_name': None,
+               'transcripts': [],
+               'hgvs_c': [],
+               'hgvs_g': ['NC_000001.11:g.100A>G'],
+               'hgvs_n': [],
+               'hgvs_p': [],
+              }
+
+
+class TestLVGStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.jsonl_path = os.path.join(self.tmpdir, 'lvgs.jsonl.gz')
+        with gzip.open(self.jsonl_path, 'wt') as fh:
+            for lvgd in (LVG_GALT, LVG_NO_GENE):
+                fh.write(json.dumps(lvgd) + '\n')
+        self.store_path = os.path.join(self.tmpdir, 'lvgs.store')
+        self.stats = build_lvg_store(iter_lvg_json([self.jsonl_path]), self.store_path)
+        self.store = LVGStore(self.store_path)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_build(self):
+        assert self.stats['records'] == 2
+        # accessions are stored once: NM_000155.3/.2, NC_000009.12/.11, NP_000146.2, NC_000001.11, GALT
+        assert self.stats['strings'] == 7
+        assert len(self.store) == 2
+        assert sorted(self.store.keys()) == sorted([LVG_GALT['hgvs_text'], LVG_NO_GENE['hgvs_text']])
+
+    def test_synonyms(self):
+        assert self.store.synonyms('NM_000155.3:c.253C>T', 'p') == ['NP_000146.2:p.(Arg85Cys)']
+        assert self.store.synonyms('NM_000155.3:c.253C>T', 'g') == LVG_GALT['hgvs_g']
+        assert self.store.synonyms('NC_000001.11:g.100A>G') == {'c': [], 'g': ['NC_000001.11:g.100A>G'], 'n': [], 'p': []}
+        assert self.store.synonyms('NM_000155.3:c.999C>T') is None
+        assert 'NM_000155.3:c.253C>T' in self.store
+        assert 'NM_000155.2:c.253C>T' not in self.store
+
+    def test_get(self):
+        assert self.store.get('NM_000155.3:c.253C>T') == LiteLVG(**LVG_GALT)
+        assert self.store.get('NC_000001.11:g.100A>G').gene_name is None
+        assert self.store.get('NM_000155.3:c.999C>T') is None
+
+    def test_last_record_wins(self):
+        store_path = os.path.join(self.tmpdir, 'dupes.store')
+        updated = dict(LVG_GALT, hgvs_p=['NP_000146.2:p.Arg85Cys'])
+        assert build_lvg_store([LVG_GALT, updated], store_path)['records'] == 1
+        store = LVGStore(store_path)
+        assert store.synonyms('NM_000155.3:c.253C>T', 'p') == ['NP_000146.2:p.Arg85Cys']
+        store.close()
+
+    def test_long_strings_and_lists(self):
+        store_path = os.path.join(self.tmpdir, 'big.store')
+        long_p = 'NP_000146.2:p.(Arg85_Ter86insCys%s)' % ('Cys' * 25000)       # 75 kB after the colon
+        many_c = ['NM_000155.3:c.%iC>T' % pos for pos in range(70000)]
+        build_lvg_store([dict(LVG_GALT, hgvs_p=[long_p], hgvs_c=many_c)], store_path)
+        store = LVGStore(store_path)
+        assert store.synonyms('NM_000155.3:c.253C>T', 'p') == [long_p]
+        assert store.synonyms('NM_000155.3:c.253C>T', 'c') == many_c
+        assert store.synonyms('NM_000155.3:c.253C>T', 'n') == LVG_GALT['hgvs_n']
+        store.close()
+
+    def test_empty_store(self):
+        store_path = os.path.join(self.tmpdir, 'empty.store')
+        build_lvg_store([], store_path)
+        store = LVGStore(store_path)
+        assert len(store) == 0
+        assert store.get('NM_000155.3:c.253C>T') is None
+        store.close()
+
+    def test_not_a_store(self):
+        path = os.path.join(self.tmpdir, 'junk')
+        with open(path, 'wb') as fh:
+            fh.write(b'x' * 100)
+        self.assertRaises(ValueError, LVGStore, path)
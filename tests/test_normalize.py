@@ -0,0 +1,85 @@
+import unittest
+
+import hgvs.normalizer
+
+from metavariant import VariantLVG
+from metavariant.normalize import CanonicalKeyCache, canonical_key
+
+from fake_hgvs import VAR_C, VAR_G, FakeHdp, FakeMapper, FakeMappers, FakePool, parser
+
+# the same deletion of one A from the run at g.21_25, written three ways.
+DEL_5 = 'NC_000009.12:g.21del'
+DEL_MID = 'NC_000009.12:g.23delA'
+DEL_3 = 'NC_000009.12:g.25del'
+
+
+class ShiftingMapper(FakeMapper):
+    """ Maps c to the 5' spelling of the deletion. """
+
+    def c_to_g(self, var_c):
+        return self._call(DEL_5)
+
+
+class ShiftingPool(FakePool):
+
+    def _new_worker(self):
+        worker = FakePool._new_worker(self)
+        worker.mappers = FakeMappers(ShiftingMapper())
+        return worker
+
+
+class TestCanonicalKey(unittest.TestCase):
+
+    def setUp(self):
+        self.normalizer = hgvs.normalizer.Normalizer(FakeHdp(), validate=False)
+
+    def test_reference_bases_dropped(self):
+        assert canonical_key(parser.parse_hgvs_variant(DEL_MID)) == 'NC_000009.12:g.23del'
+
+    def test_shifted_forms_share_key(self):
+        keys = set(canonical_key(parser.parse_hgvs_variant(hgvs_text), self.normalizer)
+                   for hgvs_text in (DEL_5, DEL_MID, DEL_3))
+        assert keys == set([DEL_3])
+
+    def test_cache(self):
+        cache = CanonicalKeyCache(maxsize=1)
+        seqvar = parser.parse_hgvs_variant(DEL_5)
+        assert cache.get(seqvar, self.normalizer) == DEL_3
+        assert cache.get(seqvar) == DEL_3           # no normalizer needed once cached
+        assert cache.stats()['hits'] == 1
+        cache.get(parser.parse_hgvs_variant(DEL_MID), self.normalizer)
+        assert len(cache) == 1
+
+    def test_unnormalizable_not_cached(self):
+        cache = CanonicalKeyCache()
+        seqvar = parser.parse_hgvs_variant('NP_000146.2:p.(Arg85Cys)')
+        assert cache.get(seqvar, self.normalizer) == 'NP_000146.2:p.(Arg85Cys)'
+        assert len(cache) == 0
+
+
+class TestVariantLVGNormalize(unittest.TestCase):
+
+    def test_enrichment_duplicates_collapsed(self):
+        lex = VariantLVG(VAR_C, pool=FakePool(), hgvs_g=[DEL_5, DEL_MID], normalize=True)
+        assert lex.hgvs_g.count(DEL_5) + lex.hgvs_g.count(DEL_MID) == 1
+        assert VAR_G in lex.hgvs_g
+        assert lex.stats['normalized_duplicates'] == 1
+
+    def test_input_kept(self):
+        lex = VariantLVG(DEL_MID, pool=FakePool(), hgvs_g=[DEL_5], normalize=True)
+        assert lex.hgvs_g == [str(lex.seqvar)]
+        assert lex.variants['g'][str(lex.seqvar)] is lex.seqvar
+
+    def test_mapped_duplicates_collapsed(self):
+        lex = VariantLVG(VAR_C, pool=ShiftingPool(), hgvs_g=[DEL_3], normalize=True)
+        assert lex.hgvs_g == [DEL_3]
+        assert lex.stats['normalized_duplicates'] == 1
+
+    def test_off_by_default(self):
+        lex = VariantLVG(VAR_C, pool=ShiftingPool(), hgvs_g=[DEL_3])
+        assert sorted(lex.hgvs_g) == sorted([DEL_3, DEL_5])
+        assert 'normalized_duplicates' not in lex.stats
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,60 @@
+import gzip
+import json
+import os
+import shutil
+import tempfile
+import unittest
+
+from metavariant.components import findall_aminochanges_with_offsets
+from metavariant.pipeline import extract_components, run_pipeline, process_lines, RECORD_FIELDS
+
+PUBTATOR_SAMPLE = ['123|t|A Cys344Tyr mutation in a gene\n',
+                   '123|a|We found L653R and (Leu653Arg) but not V777.\n',
+                   '123\t2\t9\tCys344Tyr\tProteinMutation\tp|SUB|C|344|Y\n',
+                   '\n',
+                   '456|t|Nothing to see here\n',
+                   '456|a|No variants.\n',
+                  ]
+
+
+class TestPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.dump_path = os.path.join(self.tmpdir, 'sample.gz')
+        with gzip.open(self.dump_path, 'wt') as fh:
+            fh.writelines(PUBTATOR_SAMPLE * 3)
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_offsets(self):
+        text = 'We found L653R here.'
+        for aminochange, start, end in findall_aminochanges_with_offsets(text):
+            assert text[start:end] == aminochange
+
+    def test_insertion_without_range_skipped(self):
+        records = extract_components('123', 'a', 'Both p.Arg78insGln and Lys23del were seen.')
+        assert [(rec['edittype'], rec['posedit']) for rec in records] == [('DEL', 'Lys23del')]
+
+    def test_process_lines(self):
+        records = process_lines(PUBTATOR_SAMPLE)
+        posedits = [rec['posedit'] for rec in records]
+        assert posedits.count('Cys344Tyr') == 1
+        assert posedits.count('Leu653Arg') == 2
+        assert all(rec['doc_id'] == '123' for rec in records)
+
+    def test_run_pipeline_jsonl(self):
+        out_path = os.path.join(self.tmpdir, 'out.jsonl')
+        stats = run_pipeline([self.dump_path], out_path, processes=2, chunk_size=2, max_pending=2)
+        rows = [json.loads(line) for line in open(out_path)]
+        assert stats['lines'] == len(PUBTATOR_SAMPLE) * 3
+        assert stats['records'] == len(rows) == 9
+        assert all(len(row) == len(RECORD_FIELDS) for row in rows)
+
+    def test_run_pipeline_tsv_in_process(self):
+        out_path = os.path.join(self.tmpdir, 'out.tsv')
+        stats = run_pipeline([self.dump_path], out_path, output_format='tsv', processes=1)
+        lines = open(out_path).read().splitlines()
+        assert lines[0].split('\t') == list(RECORD_FIELDS)
+        assert len(lines) - 1 == stats['records'] == 9
@@ -0,0 +1,68 @@
+import threading
+import unittest
+
+from metavariant.pool import HgvsPool
+
+from fake_hgvs import FakeHdp
+
+
+class TestHgvsPool(unittest.TestCase):
+
+    def test_workers_are_per_thread_and_bounded(self):
+        pool = HgvsPool(size=2, hdp=FakeHdp())
+        barrier = threading.Barrier(2)
+        leased = []
+
+        def lease():
+            with pool.worker() as worker:
+                leased.append(worker)
+                barrier.wait(timeout=5)
+
+        threads = [threading.Thread(target=lease) for _ in range(2)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert leased[0] is not leased[1]
+        assert leased[0].mapper is not leased[1].mapper
+        assert pool.stats()['created'] == 2
+        assert pool.stats()['idle'] == 2
+
+        # both workers are reused rather than new ones created.
+        with pool.worker() as worker:
+            assert worker in leased
+        assert pool.stats()['created'] == 2
+
+    def test_nested_lease_reuses_worker(self):
+        pool = HgvsPool(size=1, hdp=FakeHdp(), timeout=0.1)
+        with pool.worker() as outer:
+            with pool.worker() as inner:
+                assert inner is outer
+        assert pool.stats()['idle'] == 1
+
+    def test_timeout(self):
+        pool = HgvsPool(size=1, hdp=FakeHdp(), timeout=0.1)
+        with pool.worker():
+            errors = []
+
+            def lease():
+                try:
+                    with pool.worker():
+                        pass
+                except RuntimeError as error:
+                    errors.append(error)
+
+            thread = threading.Thread(target=lease)
+            thread.start()
+            thread.join()
+            assert len(errors) == 1
+
+    def test_health(self):
+        hdp = FakeHdp()
+        pool = HgvsPool(size=1, hdp=hdp)
+        assert pool.is_healthy()
+        hdp.healthy = False
+        assert not pool.is_healthy()
+        # a pool cannot reconnect a data provider it was handed.
+        assert not pool.check_health()
@@ -0,0 +1,95 @@
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from unittest import mock
+
+from metavariant import VariantLVG, lvg
+from metavariant.refresh import LVGResultDB, refresh_lvgs
+
+from fake_hgvs import VAR_C, FakePool
+
+VAR_C2 = 'NM_000155.3:c.254G>A'
+BAD = 'NM_000155.3:c.garbage'
+
+
+class NewerVariantLVG(VariantLVG):
+    VERSION = VariantLVG.VERSION + '.1'
+
+
+class TestRefresh(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.db_path = os.path.join(self.tmpdir, 'lvgs.sqlite')
+        self.db = LVGResultDB(self.db_path)
+        assert self.db.add([VAR_C, VAR_C2, BAD]) == 3
+        assert self.db.add([VAR_C]) == 0
+        self.lvg_kwargs = {'pool': FakePool()}
+
+    def tearDown(self):
+        self.db.close()
+        shutil.rmtree(self.tmpdir)
+
+    def refresh(self, lvg_class=VariantLVG, **kwargs):
+        return refresh_lvgs(self.db_path, lvg_class, processes=1, batch_size=2, lvg_kwargs=self.lvg_kwargs, **kwargs)
+
+    def test_refresh_and_resume(self):
+        assert self.db.counts() == {'total': 3, 'current': 0, 'stale': 3, 'failed': 0}
+
+        # stop after the first batch, then resume.
+        stats = self.refresh(limit=1)
+        assert stats['done'] == 2
+        assert self.db.counts()['stale'] == 1
+
+        stats = self.refresh()
+        assert stats['done'] == 1
+        assert self.db.counts() == {'total': 3, 'current': 2, 'stale': 1, 'failed': 1}
+        assert json.loads(self.db.get(VAR_C))['hgvs_text'] == VAR_C
+        assert self.db.get(BAD) is None
+
+        # failed entries are retried on every run; current ones are not recomputed.
+        assert self.refresh()['done'] == 1
+
+    def test_version_and_schema_make_entries_stale(self):
+        self.refresh()
+        assert self.db.counts(NewerVariantLVG)['stale'] == 3
+        assert self.db.counts(VariantLVG, uta_schema='uta_20210129')['stale'] == 3
+
+        stats = self.refresh(NewerVariantLVG)
+        assert (stats['ok'], stats['failed']) == (2, 1)
+        assert self.db.counts(NewerVariantLVG)['current'] == 2
+        assert self.db.counts(VariantLVG)['current'] == 0
+        assert len(list(self.db.iter_results())) == 2
+
+    def test_partial_results_are_retried(self):
+        self.lvg_kwargs['deadline'] = 0
+        stats = self.refresh()
+        assert stats['failed'] == 3
+        assert json.loads(self.db.get(VAR_C))['hgvs_text'] == VAR_C
+        assert self.db.counts()['stale'] == 3
+
+    def test_processes_open_own_connections(self):
+        pids_path = os.path.join(self.tmpdir, 'pids')
+        get_uta_connection = lvg.get_uta_connection
+
+        def connect(*args, **kwargs):
+            with open(pids_path, 'a') as fh:
+                fh.write('%i\n' % os.getpid())
+            return get_uta_connection(*args, **kwargs)
+
+        # FakePool cannot be pickled, so the workers use the module connection.
+        with mock.patch('metavariant.lvg.get_uta_connection', connect):
+            stats = refresh_lvgs(self.db_path, processes=2, batch_size=1)
+        assert stats['done'] == 3
+        assert self.db.counts()['total'] == 3
+        with open(pids_path) as fh:
+            pids = set(int(line) for line in fh)
+        assert 1 <= len(pids) <= 2
+        assert os.getpid() not in pids
+        assert lvg.get_uta_connection is get_uta_connection
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,78 @@
+import gzip
+import os
+import shutil
+import tempfile
+import unittest
+
+from metavariant.seqstore import SeqStore, SeqStoreFetcher, build_seqstore, iter_fasta
+
+FASTA = ('>NM_000151.3 Homo sapiens glucose-6-phosphatase\n'
+         'ACGTACGTAC\n'
+         'GGGCCC\n'
+         '>NR_026560.1 some ncRNA\n'
+         'TTTT\n'
+         '>NM_EMPTY.1\n')
+
+
+class FakeFetcher(object):
+
+    def fetch_seq(self, ac, start_i=None, end_i=None):
+        return 'NNNN'
+
+
+class TestSeqStore(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+        self.fasta_path = os.path.join(self.tmpdir, 'rna.fna.gz')
+        with gzip.open(self.fasta_path, 'wt') as fh:
+            fh.write(FASTA)
+        self.store_path = os.path.join(self.tmpdir, 'rna.seq')
+        self.stats = build_seqstore([self.fasta_path], self.store_path)
+        self.store = SeqStore(self.store_path)
+
+    def tearDown(self):
+        self.store.close()
+        shutil.rmtree(self.tmpdir)
+
+    def test_iter_fasta(self):
+        assert list(iter_fasta(self.fasta_path))[0] == ('NM_000151.3', 'ACGTACGTACGGGCCC')
+
+    def test_build(self):
+        assert self.stats == {'sequences': 3, 'bases': 20, 'duplicates': 0}
+        assert len(self.store) == 3
+
+    def test_build_skips_duplicates(self):
+        other_path = os.path.join(self.tmpdir, 'other.fna')
+        with open(other_path, 'w') as fh:
+            fh.write('>NR_026560.1 again\nGGGGGGGG\n>NM_000152.1\nCA\n')
+        store_path = os.path.join(self.tmpdir, 'both.seq')
+        stats = build_seqstore([self.fasta_path, other_path], store_path)
+        assert stats == {'sequences': 4, 'bases': 22, 'duplicates': 1}
+        assert os.path.getsize(store_path) == 22
+        store = SeqStore(store_path)
+        assert store.fetch_seq('NR_026560.1') == 'TTTT'
+        assert store.fetch_seq('NM_000152.1') == 'CA'
+        store.close()
+
+    def test_fetch_seq(self):
+        assert self.store.fetch_seq('NM_000151.3') == 'ACGTACGTACGGGCCC'
+        assert self.store.fetch_seq('NM_000151.3', 10, 13) == 'GGG'
+        assert self.store.fetch_seq('NM_000151.3', 13) == 'CCC'
+        assert self.store.fetch_seq('NR_026560.1') == 'TTTT'
+        assert self.store.fetch_seq('NM_EMPTY.1') == ''
+        assert bytes(self.store.view('NR_026560.1')) == b'TTTT'
+        self.assertRaises(KeyError, self.store.fetch_seq, 'NM_999999.1')
+
+    def test_fetcher(self):
+        fetcher = SeqStoreFetcher(self.store, fallback=FakeFetcher())
+        assert fetcher.fetch_seq('NR_026560.1', 0, 2) == 'TT'
+        assert fetcher.fetch_seq('NM_999999.1') == 'NNNN'
+        assert fetcher.fetch_seq('NM_999999.1') == 'NNNN'
+
+        report = fetcher.report()
+        assert report['hits'] == 1
+        assert report['misses'] == 2
+        assert report['top_misses'] == [('NM_999999.1', 2)]
+
+        self.assertRaises(KeyError, SeqStoreFetcher(self.store).fetch_seq, 'NM_999999.1')
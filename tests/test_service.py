@@ -0,0 +1,151 @@
+import json
+import threading
+import time
+import unittest
+from urllib.error import HTTPError
+from urllib.parse import quote
+from urllib.request import urlopen
+
+from metavariant.breaker import uta_breaker
+from metavariant.exceptions import BadServiceRequest
+from metavariant.genenames import gene_name_cache
+from metavariant.service import LVGService, ResultCache, SingleFlight, make_server
+
+from fake_hgvs import VAR_C, ConcurrencyTracker, DeadPool, FakePool
+
+
+class TestSingleFlight(unittest.TestCase):
+
+    def test_coalesces_concurrent_calls(self):
+        flight = SingleFlight()
+        started = threading.Event()
+        release = threading.Event()
+        calls = []
+
+        def compute():
+            calls.append(1)
+            started.set()
+            release.wait()
+            return 'result'
+
+        results = []
+        leader = threading.Thread(target=lambda: results.append(flight.do('key', compute)))
+        leader.start()
+        started.wait()
+        followers = [threading.Thread(target=lambda: results.append(flight.do('key', compute))) for _ in range(4)]
+        for thread in followers:
+            thread.start()
+        while flight.coalesced < 4:
+            time.sleep(0.001)
+        release.set()
+        for thread in [leader] + followers:
+            thread.join()
+
+        assert results == ['result'] * 5
+        assert len(calls) == 1
+        assert flight.do('key', lambda: 'again') == 'again'
+
+    def test_shares_errors(self):
+        flight = SingleFlight()
+        self.assertRaises(ValueError, flight.do, 'key', lambda: int('x'))
+
+    def test_result_cache(self):
+        cache = ResultCache(maxsize=2)
+        cache.put('a', 1)
+        cache.put('b', 2)
+        cache.get('a')
+        cache.put('c', 3)
+        assert cache.get('b') is None
+        assert cache.get('a') == 1
+        assert cache.stats() == {'size': 2, 'maxsize': 2, 'hits': 2, 'misses': 1}
+
+
+class TestLVGService(unittest.TestCase):
+
+    def setUp(self):
+        gene_name_cache.clear()
+        self.tracker = ConcurrencyTracker()
+        self.service = LVGService(pool=FakePool(size=2, delay=0.01, tracker=self.tracker))
+        self.server = make_server(self.service, port=0)
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.start()
+        self.url = 'http://%s:%i' % self.server.server_address[:2]
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.thread.join()
+
+    def get(self, path):
+        try:
+            with urlopen(self.url + path) as response:
+                return response.status, json.loads(response.read().decode('utf-8'))
+        except HTTPError as error:
+            return error.code, json.loads(error.read().decode('utf-8'))
+
+    def test_lvg(self):
+        status, result = self.get('/lvg?hgvs=%s' % quote(VAR_C))
+        assert status == 200
+        assert result['hgvs_text'] == VAR_C
+        assert 'NM_000155.2:c.253C>T' in result['hgvs_c']
+        assert result['gene_name'] == 'GALT'
+        assert (result['degraded'], result['partial']) == (False, False)
+
+        calls = self.tracker.calls
+        assert self.get('/lvg?hgvs=%s' % quote(VAR_C)) == (200, result)
+        assert self.tracker.calls == calls
+        assert self.service.metrics()['cache']['hits'] == 1
+
+    def test_degraded_not_cached(self):
+        service = LVGService(pool=DeadPool(size=1))
+        try:
+            result = service.lvg(VAR_C)
+            assert result['degraded']
+            assert result['hgvs_c'] == [VAR_C]
+            assert service.lvg(VAR_C) == result
+            assert service.metrics()['computed'] == 2
+            assert len(service.cache) == 0
+        finally:
+            uta_breaker.reset()
+
+    def test_coalescing(self):
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(self.get('/lvg?hgvs=%s' % quote(VAR_C))))
+                   for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(set(json.dumps(result, sort_keys=True) for result in results)) == 1
+        metrics = self.service.metrics()
+        assert metrics['requests'] == 8
+        assert metrics['computed'] == 1
+        assert metrics['coalesced'] + metrics['cache']['hits'] == 7
+
+    def test_slang(self):
+        status, result = self.get('/slang?hgvs=%s' % quote('NM_014874.3:c.891C>T'))
+        assert status == 200
+        assert result['posedit'] == '891C>T'
+        assert 'C891T' in result['posedit_slang']
+
+    def test_errors(self):
+        assert self.get('/lvg?hgvs=garbage')[0] == 400
+        assert self.get('/lvg')[0] == 400
+        assert self.get('/lvg?hgvs=%s&mode=nope' % quote(VAR_C))[0] == 400
+        assert self.get('/nowhere')[0] == 404
+        self.assertRaises(BadServiceRequest, self.service.lvg, 'garbage')
+        assert self.service.metrics()['errors'] == 2
+
+    def test_health_and_metrics(self):
+        self.service.pool.is_healthy = lambda: True
+        status, health = self.get('/health')
+        assert status == 200
+        assert health['pool']['size'] == 2
+
+        self.service.pool.is_healthy = lambda: False
+        assert self.get('/health')[0] == 503
+
+        status, metrics = self.get('/metrics')
+        assert status == 200
+        assert set(['requests', 'computed', 'coalesced', 'cache', 'pool', 'uptime_seconds']) <= set(metrics)
@@ -0,0 +1,100 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from metavariant import VariantLVG
+from metavariant.lite import LiteLVG
+from metavariant.synonyms import LVGSynonymIndex, ReverseSynonymIndex, lvg_synonyms, normalize_synonym
+
+
+class TestLVGSynonymIndex(unittest.TestCase):
+
+    def test_lvg_synonyms_include_slang(self):
+        lex = VariantLVG('NM_014874.3:c.891C>T')
+        terms = lvg_synonyms(lex)
+        assert 'NM_014874.3:c.891C>T' in terms
+        assert 'C891T' in terms
+        assert '891C->T' in terms
+
+    def test_search_overlapping_terms(self):
+        index = LVGSynonymIndex()
+        index.add_terms('v1', ['891C>T', 'C891T'])
+        index.add_terms('v2', ['c.891C>T', 'he'])
+        text = 'the c.891C>T (C891T) variant'
+        results = index.search(text)
+        assert ('v1', '891C>T', (6, 12)) in results
+        assert ('v2', 'c.891C>T', (4, 12)) in results
+        assert ('v1', 'C891T', (14, 19)) in results
+        # "he" inside "the" is not a whole word.
+        assert 'he' not in [found for _, found, _ in results]
+        for _, found, (start, end) in results:
+            assert text[start:end] == found
+
+    def test_incremental_add_remove(self):
+        index = LVGSynonymIndex()
+        index.add_terms('v1', ['C891T', 'shared'])
+        index.add_terms('v2', ['shared'])
+        assert len(index.search('C891T shared')) == 3
+
+        index.remove('v1')
+        assert 'v1' not in index
+        assert index.search('C891T shared') == [('v2', 'shared', (6, 12))]
+
+        index.add_terms('v3', ['C891T'])
+        assert ('v3', 'C891T', (0, 5)) in index.search('C891T shared')
+
+
+LITE_GALT = LiteLVG('NM_000155.3:c.253C>T',
+                    hgvs_c=['NM_000155.3:c.253C>T', 'NM_000155.2:c.253C>T'],
+                    hgvs_g=['NC_000009.12:g.34647855C>T'],
+                    hgvs_p=['NP_000146.2:p.(Arg85Cys)'],
+                    transcripts=['NM_000155.3', 'NM_000155.2'],
+                    gene_name='GALT')
+
+
+class TestReverseSynonymIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmpdir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.tmpdir)
+
+    def test_normalize_synonym(self):
+        assert normalize_synonym(' NP_000146.2:p.(Arg85Cys) ') == 'NP_000146.2:p.Arg85Cys'
+
+    def test_lookup_hgvs_and_slang(self):
+        index = ReverseSynonymIndex([LITE_GALT])
+        group = ['NM_000155.3:c.253C>T']
+        assert index.lookup('NM_000155.2:c.253C>T') == group
+        assert index.lookup('NC_000009.12:g.34647855C>T') == group
+        assert index.lookup('NP_000146.2:p.Arg85Cys') == group
+        assert index.lookup('C253T') == group
+        assert index.lookup('253C->T') == group
+        assert index.lookup('R85C') == group
+        assert index.lookup('NM_000155.3:c.254C>T') == []
+        assert 'C253T' in index
+
+    def test_shared_terms(self):
+        index = ReverseSynonymIndex()
+        index.add_terms('v1', ['C891T', 'NM_014874.3:c.891C>T'])
+        index.add_terms('v2', ['C891T'])
+        index.add_terms('v2', ['C891T'])
+        index.add_terms('v3', ['C891T'])
+        assert index.lookup('C891T') == ['v1', 'v2', 'v3']
+        assert index.lookup_many(['NM_014874.3:c.891C>T', 'nothing']) == {'NM_014874.3:c.891C>T': ['v1'], 'nothing': []}
+
+    def test_save_load(self):
+        index = ReverseSynonymIndex([LITE_GALT])
+        index.add_terms('v2', ['C253T'])
+        path = os.path.join(self.tmpdir, 'synonyms.idx.gz')
+        index.save(path)
+
+        loaded = ReverseSynonymIndex.load(path)
+        assert len(loaded) == len(index)
+        assert loaded.lookup('C253T') == ['NM_000155.3:c.253C>T', 'v2']
+
+        # incremental inserts after loading keep the existing group numbers.
+        loaded.add_terms('v3', ['C253T'])
+        assert loaded.lookup('C253T') == ['NM_000155.3:c.253C>T', 'v2', 'v3']
@@ -0,0 +1,53 @@
+import unittest
+
+from metavariant import Variant, VariantComponents
+from metavariant.table import ComponentsTable, MYSQL_COLUMNS
+
+# rows shaped like the pubtator m2p_* MySQL tables.
+M2P_ROWS = [{'SeqType': 'c', 'EditType': 'SUB', 'Ref': 'C', 'Pos': '891', 'Alt': 'T'},
+            {'SeqType': '', 'EditType': '', 'Ref': 'L', 'Pos': '653', 'Alt': 'R'},
+            {'SeqType': '', 'EditType': 'SUB', 'Ref': 'A', 'Pos': '12', 'Alt': 'U'},
+            {'SeqType': 'c', 'EditType': 'DEL', 'Ref': '', 'Pos': '4964_4982', 'Alt': ''},
+            {'SeqType': 'c', 'EditType': 'DUP', 'Ref': 'A', 'Pos': '191', 'Alt': '', 'DupX': '2'},
+            {'SeqType': 'c', 'EditType': 'delins', 'Ref': 'AT', 'Pos': '883_884', 'Alt': 'CTT'},
+            {'SeqType': 'p', 'EditType': 'FS', 'Ref': 'S', 'Pos': '1655', 'Alt': 'Y', 'FS_Pos': '12'},
+            {'SeqType': '', 'EditType': 'SUB', 'Ref': ' G ', 'Pos': '10', 'Alt': 'A'},
+           ]
+
+
+class TestComponentsTable(unittest.TestCase):
+
+    def setUp(self):
+        self.table = ComponentsTable.from_rows(M2P_ROWS)
+        self.comps = [VariantComponents(**row) for row in M2P_ROWS]
+
+    def test_same_components_as_objects(self):
+        for idx, comp in enumerate(self.comps):
+            for field in ('seqtype', 'edittype', 'ref', 'pos', 'alt'):
+                assert getattr(self.table, field)[idx] == getattr(comp, field)
+        assert list(self.table.seqtype) == ['c', 'p', 'n', 'c', 'c', 'c', 'p', '']
+
+    def test_same_posedit_and_slang_as_objects(self):
+        slang = self.table.posedit_slang()
+        for idx, comp in enumerate(self.comps):
+            assert self.table.posedit[idx] == comp.posedit
+            try:
+                expected = comp.posedit_slang
+            except NotImplementedError:
+                expected = None
+            if expected is None:
+                assert slang[idx] is None
+            else:
+                assert sorted(slang[idx]) == sorted(expected)
+
+    def test_same_mysql_export_as_objects(self):
+        assert self.table.to_mysql_dicts() == [comp.to_mysql_dict() for comp in self.comps]
+        rows = self.table.to_mysql_tuples(MYSQL_COLUMNS + ('FS_Pos', 'DupX'))
+        assert rows[6][-2:] == ('12', None)
+        assert rows[4][-2:] == (None, '2')
+
+    def test_from_components_roundtrip(self):
+        comps = [VariantComponents(Variant('NM_014874.3:c.891C>T')), VariantComponents(aminochange='Cys344Tyr')]
+        table = ComponentsTable.from_components(comps)
+        assert list(table.posedit) == ['891C>T', 'Cys344Tyr']
+        assert table[1].posedit == 'Cys344Tyr'
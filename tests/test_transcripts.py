@@ -0,0 +1,49 @@
+import os
+import tempfile
+import unittest
+
+from metavariant.transcripts import (SelectTranscripts, get_transcript_policy, latest_versions, nm_only,
+                                     split_accession, top_n)
+
+TRANSCRIPTS = ['NM_000151.2', 'NM_000151.3', 'NR_026560.1', 'XM_005257628.1', 'NM_001270397.1', 'NM_000151.1']
+
+MANE_SUMMARY = ('#NCBI_GeneID\tEnsembl_Gene\tHGNC_ID\tsymbol\tname\tRefSeq_nuc\tRefSeq_prot\n'
+                'GeneID:2538\tENSG00000131482.10\tHGNC:4056\tG6PC1\tglucose-6-phosphatase\tNM_000151.4\tNP_000142.2\n')
+
+
+class TestTranscriptPolicies(unittest.TestCase):
+
+    def test_split_accession(self):
+        assert split_accession('NM_000151.3') == ('NM_000151', 3)
+        assert split_accession('NM_000151') == ('NM_000151', 0)
+
+    def test_latest_versions(self):
+        assert latest_versions(TRANSCRIPTS) == ['NM_000151.3', 'NR_026560.1', 'XM_005257628.1', 'NM_001270397.1']
+
+    def test_nm_only(self):
+        assert 'NR_026560.1' not in nm_only(TRANSCRIPTS)
+        assert 'XM_005257628.1' not in nm_only(TRANSCRIPTS)
+        assert len(nm_only(TRANSCRIPTS)) == 4
+
+    def test_top_n(self):
+        assert top_n(2)(TRANSCRIPTS) == ['NM_000151.3', 'NM_000151.2']
+        assert top_n(10)(TRANSCRIPTS)[-2:] == ['NR_026560.1', 'XM_005257628.1']
+
+    def test_select_transcripts(self):
+        fd, path = tempfile.mkstemp()
+        with os.fdopen(fd, 'w') as fh:
+            fh.write(MANE_SUMMARY)
+        try:
+            policy = SelectTranscripts(path)
+        finally:
+            os.remove(path)
+
+        # unversioned match by default.
+        assert policy(TRANSCRIPTS) == ['NM_000151.2', 'NM_000151.3', 'NM_000151.1']
+        assert SelectTranscripts(accessions=['NM_000151.3'], versioned=True)(TRANSCRIPTS) == ['NM_000151.3']
+
+    def test_get_transcript_policy(self):
+        assert get_transcript_policy()(TRANSCRIPTS) == TRANSCRIPTS
+        assert get_transcript_policy('latest') is latest_versions
+        assert get_transcript_policy(nm_only) is nm_only
+        self.assertRaises(ValueError, get_transcript_policy, 'mane')